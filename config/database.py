@@ -1,18 +1,80 @@
 import asyncio
+import importlib.util
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
 from pymongo.server_api import ServerApi
 from dotenv import load_dotenv
 from colorama import Fore, Style, init
+from utils.db_monitoring import DbTimingListener
 
 load_dotenv() # Cargamos variables de entorno
 
 MONGO_URI = os.getenv("MONGODB_URI")
 DB_NAME = os.getenv("DATABASE_NAME")
 
-client = AsyncIOMotorClient(MONGO_URI)
+# Lectura de reportes/exportaciones: por defecto el mismo cluster, pero se puede
+# apuntar a un nodo de analytics con MONGODB_REPORTING_URI
+MONGO_REPORTING_URI = os.getenv("MONGODB_REPORTING_URI") or MONGO_URI
+
+# Módulo de Python que necesita cada compresor de protocolo
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _available_compressors() -> str:
+    """
+    Compresores pedidos en MONGO_COMPRESSORS (en orden de preferencia) que
+    están instalados. El servidor elige el primero que también soporte.
+    """
+    requested = [c.strip() for c in os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib").split(",") if c.strip()]
+    available = [
+        c for c in requested
+        if c in COMPRESSOR_MODULES and importlib.util.find_spec(COMPRESSOR_MODULES[c]) is not None
+    ]
+    return ",".join(available)
+
+
+def _client_options(prefix: str, max_pool_default: int, min_pool_default: int) -> dict:
+    """Opciones del pool y timeouts, configurables por variables de entorno."""
+    options = {
+        "maxPoolSize": _env_int(f"{prefix}_MAX_POOL_SIZE", max_pool_default),
+        "minPoolSize": _env_int(f"{prefix}_MIN_POOL_SIZE", min_pool_default),
+        "maxIdleTimeMS": _env_int(f"{prefix}_MAX_IDLE_TIME_MS", 300000),
+        "serverSelectionTimeoutMS": _env_int(f"{prefix}_SERVER_SELECTION_TIMEOUT_MS", 10000),
+        "connectTimeoutMS": _env_int(f"{prefix}_CONNECT_TIMEOUT_MS", 10000),
+        "waitQueueTimeoutMS": _env_int(f"{prefix}_WAIT_QUEUE_TIMEOUT_MS", 10000),
+        "event_listeners": [DbTimingListener()]
+    }
+    # Sin límite por defecto: reportes, exportaciones y scripts de migración
+    # pueden tardar más que cualquier valor fijo. Si se configura, aplica a
+    # cada lectura/escritura del socket (0 también es sin límite)
+    socket_timeout = _env_int(f"{prefix}_SOCKET_TIMEOUT_MS", 0)
+    if socket_timeout:
+        options["socketTimeoutMS"] = socket_timeout
+    compressors = _available_compressors()
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+client = AsyncIOMotorClient(MONGO_URI, **_client_options("MONGO", 50, 5))
 database  = client[DB_NAME]
 
+# ✅ Cliente aparte (pool propio) para reportes y exportaciones: lee de secundarios
+# cuando hay, así las lecturas pesadas no compiten con las escrituras de los drivers
+reporting_options = _client_options("MONGO_REPORTING", 10, 0)
+reporting_options["readPreference"] = "secondaryPreferred"
+reporting_max_staleness = _env_int("MONGO_REPORTING_MAX_STALENESS_SECONDS", 0)
+if reporting_max_staleness:
+    reporting_options["maxStalenessSeconds"] = reporting_max_staleness  # Mínimo 90 segundos
+
+reporting_client = AsyncIOMotorClient(MONGO_REPORTING_URI, **reporting_options)
+reporting_database = reporting_client[DB_NAME]
+
 
 async def ping_database():
     try:
@@ -21,20 +83,46 @@ async def ping_database():
     except Exception as e:
         print(Fore.RED + f"❌ Failed to connect to MongoDB: {e}")
 
+    if MONGO_REPORTING_URI != MONGO_URI:
+        try:
+            await reporting_client.admin.command('ping')
+            print(Fore.GREEN + "✅ Successfully connected to MongoDB reporting node!")
+        except Exception as e:
+            print(Fore.RED + f"❌ Failed to connect to MongoDB reporting node: {e}")
+
+coversheets_collection = database.coversheets
+daily_load_rollups_collection = database.daily_load_rollups
 depts_collection = database.depts
+emailBatches_collection = database.emailBatches
+emailBatchRecipients_collection = database.emailBatchRecipients
 directions_collection = database.directions
+downtimes_collection = database.downtimes
+drivers_collection = database.drivers
 duringTheIncidents_collection = database.duringTheIncidents
 employees_collection = database.employees
 employeeSignatures_collection = database.employeeSignatures
 generalinformations_collection = database.generalinformations
 incidentDetails_collection = database.incidentDetails
+incident_monthly_rollups_collection = database.incident_monthly_rollups
+jobs_collection = database.jobs
+landfills_collection = database.landfills
+loads_collection = database.loads
+materials_collection = database.materials
+productivity_daily_cache_collection = database.productivity_daily_cache
 roadConditions_collection = database.roadConditions
+routes_collection = database.routes
+spare_truck_rollups_collection = database.spare_truck_rollups
+sparetruckinfos_collection = database.sparetruckinfos
 supervisors_collection = database.supervisors
 supervisorNotes_collection = database.supervisorNotes
 trucks_collection = database.trucks
 typeOfIncidents_collection = database.typeOfIncidents
 users_collection = database.users
 weatherConditions_collection = database.weatherConditions
+
+# Firmas de empleados (imágenes) en GridFS; los documentos solo guardan la referencia
+signatures_bucket = AsyncIOMotorGridFSBucket(database, bucket_name="signatures")
+signatureFiles_collection = database["signatures.files"]
    
 
 
@@ -0,0 +1,151 @@
+# config/indexes.py
+from pymongo import ASCENDING, DESCENDING, TEXT, GEOSPHERE
+from colorama import Fore
+
+from config.database import (
+    emailBatchRecipients_collection,
+    jobs_collection,
+    daily_load_rollups_collection,
+    productivity_daily_cache_collection,
+    downtimes_collection,
+    spare_truck_rollups_collection,
+    loads_collection,
+    coversheets_collection,
+    incidentDetails_collection,
+    duringTheIncidents_collection,
+    supervisorNotes_collection,
+    employeeSignatures_collection,
+    generalinformations_collection,
+    incident_monthly_rollups_collection,
+    signatureFiles_collection,
+    trucks_collection,
+    routes_collection,
+    drivers_collection,
+    sparetruckinfos_collection
+)
+
+
+async def ensure_indexes():
+    """
+    Crea (si no existen) los índices que usan las consultas de la API.
+    create_index es idempotente, así que se puede llamar en cada arranque.
+    """
+    try:
+        # Envíos masivos: siguiente bloque de pendientes por batch
+        await emailBatchRecipients_collection.create_index(
+            [("batch_id", ASCENDING), ("status", ASCENDING), ("seq", ASCENDING)]
+        )
+
+        # Cola de jobs: siguiente job disponible
+        await jobs_collection.create_index([("status", ASCENDING), ("availableAt", ASCENDING)])
+        # Los jobs terminados se borran solos a los 7 días
+        await jobs_collection.create_index(
+            [("finishedAt", ASCENDING)],
+            expireAfterSeconds=7 * 24 * 60 * 60,
+            partialFilterExpression={"status": "done"}
+        )
+
+        # Rollups diarios de tonelaje: una fila por día/ruta/landfill/material
+        await daily_load_rollups_collection.create_index(
+            [("day", ASCENDING), ("route_id", ASCENDING), ("landFill_id", ASCENDING), ("material_id", ASCENDING)],
+            unique=True
+        )
+
+        # Caché de productividad: un documento por día cerrado
+        await productivity_daily_cache_collection.create_index([("day", ASCENDING)], unique=True)
+
+        # Reporte de downtime: igualdad antes que rango. Con camión usa
+        # (active, truck_id, date); sin camión, (active, date)
+        await downtimes_collection.create_index(
+            [("active", ASCENDING), ("truck_id", ASCENDING), ("date", ASCENDING)]
+        )
+        await downtimes_collection.create_index([("active", ASCENDING), ("date", ASCENDING)])
+
+        # Refresco incremental del snapshot de dashboards ($or por createdAt / updatedAt)
+        for collection in (loads_collection, downtimes_collection):
+            await collection.create_index([("createdAt", ASCENDING)])
+            await collection.create_index([("updatedAt", ASCENDING)])
+
+        # Rollups de spare trucks: uno por número de camión
+        await spare_truck_rollups_collection.create_index([("spareTruckNumber", ASCENDING)], unique=True)
+
+        # Búsqueda de texto (un índice de texto por colección). El ticket pesa más que la nota.
+        await loads_collection.create_index(
+            [("ticketNumber", TEXT), ("note", TEXT)],
+            weights={"ticketNumber": 10, "note": 1},
+            name="loads_text"
+        )
+        await downtimes_collection.create_index([("downtimeReason", TEXT)], name="downtimes_text")
+        await incidentDetails_collection.create_index(
+            [("incidentDescription", TEXT), ("describeAnyInjuries", TEXT), ("whatDamageWasDone", TEXT)],
+            name="incidentDetails_text"
+        )
+
+        # Hijos de los reportes de incidentes: búsqueda por el padre
+        for collection in (
+            incidentDetails_collection,
+            duringTheIncidents_collection,
+            supervisorNotes_collection,
+            employeeSignatures_collection
+        ):
+            await collection.create_index([("generalInformation_ref_id", ASCENDING)])
+
+        # Línea de tiempo por conductor: coversheets por fecha (keyset) y
+        # sus loads/downtimes/spare trucks por coversheet ($in de la página)
+        await coversheets_collection.create_index(
+            [("active", ASCENDING), ("driver_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)]
+        )
+        for collection in (loads_collection, downtimes_collection, sparetruckinfos_collection):
+            await collection.create_index([("coversheet_ref_id", ASCENDING)])
+
+        # Ubicación de los incidentes: cercanía, polígono y mapa de calor
+        await generalinformations_collection.create_index(
+            [("geoLocation", GEOSPHERE), ("active", ASCENDING), ("date", DESCENDING)],
+            name="generalinformations_geo"
+        )
+
+        # Rollups de incidentes: una fila por mes/tipo de incidente/departamento
+        await incident_monthly_rollups_collection.create_index(
+            [("month", ASCENDING), ("typeOfIncident_id", ASCENDING), ("dept_id", ASCENDING)],
+            unique=True
+        )
+
+        # Llaves del import CSV de catálogos (upsert por lote) y login de drivers
+        await trucks_collection.create_index([("truckNumber", ASCENDING)])
+        await routes_collection.create_index([("routeNumber", ASCENDING)])
+        await drivers_collection.create_index([("email", ASCENDING)])
+
+        # Firmas en GridFS: una sola copia por contenido (sha256)
+        await signatureFiles_collection.create_index([("metadata.sha256", ASCENDING)])
+
+        # Listado de incidentes: orden por fecha (keyset) con cada filtro como prefijo
+        await generalinformations_collection.create_index(
+            [("active", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)]
+        )
+        for field in ("dept_id", "supervisor_id", "typeOfIncident_id", "employee_id", "truck_id", "wasAnyOneHurt"):
+            await generalinformations_collection.create_index(
+                [("active", ASCENDING), (field, ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)]
+            )
+
+        print(Fore.GREEN + "✅ Índices verificados")
+    except Exception as e:
+        print(Fore.RED + f"❌ Error al crear índices: {e}")
+
+    try:
+        # Reemplazado por los dos índices de downtime de arriba
+        if "active_1_date_1_truck_id_1" in await downtimes_collection.index_information():
+            await downtimes_collection.drop_index("active_1_date_1_truck_id_1")
+    except Exception as e:
+        print(Fore.RED + f"❌ Error al borrar índice viejo de downtimes: {e}")
+
+    try:
+        # Un ticket de báscula por load activo (para conciliar los CSV del landfill).
+        # Va aparte: si ya hay tickets repetidos falla solo este índice.
+        await loads_collection.create_index(
+            [("ticketNumber", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"active": True, "ticketNumber": {"$gt": ""}},
+            name="loads_ticketNumber_unique"
+        )
+    except Exception as e:
+        print(Fore.RED + f"❌ Error al crear índice único de ticketNumber (¿tickets repetidos?): {e}")
@@ -1,13 +1,23 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from fastapi.staticfiles import StaticFiles
 import os
+import time
 
 from contextlib import asynccontextmanager
 
 from config.database import ping_database
 from config.database import client
+from config.indexes import ensure_indexes
+from utils.metrics import (
+    registry,
+    start_request_timing,
+    http_request_duration_seconds,
+    http_requests_total,
+    http_requests_in_flight
+)
 
 
 from routes.route_routes import router as route_router
@@ -23,11 +33,27 @@ from routes.load_routes import router as load_router
 
 from routes.user_routes import router as user_router
 from routes.email_routes import router as email_router
+from routes.job_routes import router as job_router
+from routes.monitoring_routes import router as monitoring_router
+from routes.report_routes import router as report_router
+from routes.search_routes import router as search_router
+from routes.incident_routes import router as incident_router
+from routes.catalog_routes import router as catalog_router
+from routes.timeline_routes import router as timeline_router
+from routes.safety_catalog_routes import (
+    dept_router,
+    direction_router,
+    weather_router,
+    road_router,
+    type_incident_router,
+    supervisor_router
+)
 
 
 @asynccontextmanager
 async def lifespan(application: FastAPI):
     await ping_database()
+    await ensure_indexes()
     yield
     
 app = FastAPI(lifespan=lifespan)
@@ -59,11 +85,50 @@ app.add_middleware(
 
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
-    response = await call_next(request)
-    print("Hola desde el middleware")
+    """
+    Mide cada request: histograma de latencia y contador por ruta/código,
+    requests en curso, y header Server-Timing (db, serialize, app, total).
+    """
+    if request.url.path == "/metrics":
+        return await call_next(request)
+
+    timings = start_request_timing()
+    method = request.method
+    http_requests_in_flight.inc((method,))
+    start = time.perf_counter()
+    status_code = 500
+
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        total = time.perf_counter() - start
+        http_requests_in_flight.dec((method,))
+
+        # Usamos la plantilla de la ruta (/api/load/{id}) para no crear una serie por ID
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        labels = (method, route_path, str(status_code))
+        http_request_duration_seconds.observe(labels, total)
+        http_requests_total.inc(labels)
+
+    db_ms = timings["db"] * 1000
+    serialize_ms = timings["serialize"] * 1000
+    total_ms = total * 1000
+    app_ms = max(total_ms - db_ms - serialize_ms, 0.0)
+    response.headers["Server-Timing"] = (
+        f"db;dur={db_ms:.1f}, serialize;dur={serialize_ms:.1f}, "
+        f"app;dur={app_ms:.1f}, total;dur={total_ms:.1f}"
+    )
     return response
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas en formato de texto de Prometheus (por proceso)."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 # Sirve archivos estáticos desde la carpeta 'uploads'
 if not os.path.exists("uploads"):
     os.makedirs("uploads")
@@ -73,6 +138,8 @@ app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 # Incluijmos las rutas de la API
 
 app.include_router(email_router, prefix="/api/utils", tags=["Email"])
+app.include_router(job_router, prefix="/api/jobs", tags=["Jobs"])
+app.include_router(monitoring_router, prefix="/api/monitoring", tags=["Monitoring"])
 
 
 app.include_router(route_router, prefix="/api/routes", tags=["Routes"])
@@ -87,6 +154,17 @@ app.include_router(downtime_router, prefix="/api/downtime", tags=["Downtime"])
 app.include_router(load_router, prefix="/api/load", tags=["Load"])
 
 app.include_router(user_router, prefix="/api/users", tags=["Users"])
+app.include_router(report_router, prefix="/api/reports", tags=["Reports"])
+app.include_router(search_router, prefix="/api/search", tags=["Search"])
+app.include_router(incident_router, prefix="/api/incidents", tags=["Incidents"])
+app.include_router(catalog_router, prefix="/api/catalogs", tags=["Catalogs"])
+app.include_router(timeline_router, prefix="/api/timeline", tags=["Timeline"])
+app.include_router(dept_router, prefix="/api/depts", tags=["Depts"])
+app.include_router(direction_router, prefix="/api/directions", tags=["Directions"])
+app.include_router(weather_router, prefix="/api/weather-conditions", tags=["Weather Conditions"])
+app.include_router(road_router, prefix="/api/road-conditions", tags=["Road Conditions"])
+app.include_router(type_incident_router, prefix="/api/incident-types", tags=["Incident Types"])
+app.include_router(supervisor_router, prefix="/api/supervisors", tags=["Supervisors"])
 
 
 
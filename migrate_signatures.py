@@ -0,0 +1,86 @@
+"""
+Script para sacar las firmas en base64 de employeeSignatures y pasarlas a GridFS
+Ejecutar: python migrate_signatures.py [--restart]
+
+Procesa por lotes: sube cada imagen al bucket "signatures" (una sola copia por
+contenido) y reemplaza el campo employeeSignature por la referencia al archivo
+con un bulk_write por lote. Guarda el último _id procesado en la colección
+"migrations", así que si se interrumpe continúa donde quedó.
+Las firmas que no son base64 válido se dejan como están y se cuentan.
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from pymongo import UpdateOne
+
+from config.database import database, employeeSignatures_collection
+from utils.signatures import store_signature
+
+BATCH_SIZE = 200
+CHECKPOINT_ID = "signatures:employeeSignatures"
+
+
+async def migrate_signatures(restart: bool = False) -> dict:
+    if restart:
+        await database.migrations.delete_one({"_id": CHECKPOINT_ID})
+    checkpoint = await database.migrations.find_one({"_id": CHECKPOINT_ID}) or {}
+    last_id = checkpoint.get("lastId")
+
+    stats = {"scanned": 0, "migrated": 0, "invalid": 0}
+
+    while True:
+        query = {"employeeSignature": {"$type": "string", "$ne": ""}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        docs = await employeeSignatures_collection.find(
+            query, {"employeeSignature": 1}
+        ).sort("_id", 1).limit(BATCH_SIZE).to_list(length=BATCH_SIZE)
+        if not docs:
+            break
+
+        ops = []
+        for doc in docs:
+            stats["scanned"] += 1
+            try:
+                reference = await store_signature(doc["employeeSignature"])
+            except ValueError:
+                stats["invalid"] += 1
+                continue
+            ops.append(UpdateOne(
+                {"_id": doc["_id"], "employeeSignature": doc["employeeSignature"]},
+                {"$set": reference, "$unset": {"employeeSignature": ""}}
+            ))
+
+        if ops:
+            result = await employeeSignatures_collection.bulk_write(ops, ordered=False)
+            stats["migrated"] += result.modified_count
+
+        last_id = docs[-1]["_id"]
+        await database.migrations.update_one(
+            {"_id": CHECKPOINT_ID},
+            {"$set": {"lastId": last_id, "updatedAt": datetime.now(ZoneInfo("America/Denver"))}},
+            upsert=True
+        )
+        print(f"   employeeSignatures: {stats['scanned']} revisadas, {stats['migrated']} migradas")
+
+    return stats
+
+
+async def main(restart: bool):
+    print("Iniciando migración de firmas a GridFS...")
+    print("=" * 60)
+    stats = await migrate_signatures(restart)
+    print(
+        f"✅ employeeSignatures: {stats['scanned']} revisadas, {stats['migrated']} migradas, "
+        f"{stats['invalid']} firmas inválidas"
+    )
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mueve las firmas en base64 a GridFS")
+    parser.add_argument("--restart", action="store_true", help="Ignora el avance guardado y empieza desde el principio")
+    args = parser.parse_args()
+    asyncio.run(main(args.restart))
@@ -0,0 +1,118 @@
+"""
+Script para convertir las horas guardadas como texto a datetime de Denver
+Ejecutar: python migrate_time_fields.py loads downtimes sparetruckinfos coversheets [--restart]
+
+Convierte por lotes (un bulk_write por lote) y guarda el último _id procesado
+en la colección "migrations", así que si se interrumpe continúa donde quedó.
+Los textos que no se pueden interpretar se dejan como están y se cuentan.
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from pymongo import UpdateOne
+
+from config.database import database
+from utils.date_utils import normalize_time_fields, LOAD_TIME_PAIRS, YARD_TIME_PAIRS, DOWNTIME_TIME_PAIRS
+
+BATCH_SIZE = 1000
+
+# Colección -> pares de horas que se convierten
+TIME_FIELDS = {
+    "loads": LOAD_TIME_PAIRS,
+    "downtimes": DOWNTIME_TIME_PAIRS,
+    "sparetruckinfos": YARD_TIME_PAIRS,
+    "coversheets": YARD_TIME_PAIRS
+}
+
+
+async def _base_days(collection: str, docs: list) -> dict:
+    """Día base de cada documento: su campo date o, si no tiene, el de su coversheet."""
+    days = {doc["_id"]: doc.get("date") for doc in docs}
+    if collection == "coversheets":
+        return days
+
+    missing = {doc["coversheet_ref_id"] for doc in docs if not doc.get("date") and doc.get("coversheet_ref_id")}
+    if missing:
+        coversheet_days = {}
+        async for coversheet in database.coversheets.find({"_id": {"$in": list(missing)}}, {"date": 1}):
+            coversheet_days[coversheet["_id"]] = coversheet.get("date")
+        for doc in docs:
+            if not days[doc["_id"]]:
+                days[doc["_id"]] = coversheet_days.get(doc.get("coversheet_ref_id"))
+    return days
+
+
+async def migrate_collection(collection: str, restart: bool = False) -> dict:
+    pairs = TIME_FIELDS[collection]
+    fields = [field for pair in pairs for field in pair]
+    checkpoint_id = f"time_fields:{collection}"
+
+    if restart:
+        await database.migrations.delete_one({"_id": checkpoint_id})
+    checkpoint = await database.migrations.find_one({"_id": checkpoint_id}) or {}
+    last_id = checkpoint.get("lastId")
+
+    stats = {"scanned": 0, "converted": 0, "unparsed": 0}
+    projection = {field: 1 for field in fields}
+    projection.update({"date": 1, "coversheet_ref_id": 1})
+
+    while True:
+        query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        docs = await database[collection].find(query, projection).sort("_id", 1).limit(BATCH_SIZE).to_list(length=BATCH_SIZE)
+        if not docs:
+            break
+
+        base_days = await _base_days(collection, docs)
+        ops = []
+        now = datetime.now(ZoneInfo("America/Denver"))
+        for doc in docs:
+            stats["scanned"] += 1
+            values = {field: doc.get(field) for field in fields}
+            normalize_time_fields(values, pairs, base_days[doc["_id"]])
+
+            updates = {
+                field: value for field, value in values.items()
+                if isinstance(value, datetime) and value != doc.get(field)
+            }
+            stats["unparsed"] += sum(1 for v in values.values() if isinstance(v, str) and v.strip())
+            if updates:
+                # updatedAt para que el snapshot de dashboards vea el cambio
+                ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {**updates, "updatedAt": now}}))
+
+        if ops:
+            await database[collection].bulk_write(ops, ordered=False)
+            stats["converted"] += len(ops)
+
+        last_id = docs[-1]["_id"]
+        await database.migrations.update_one(
+            {"_id": checkpoint_id},
+            {"$set": {"lastId": last_id, "updatedAt": datetime.now(ZoneInfo("America/Denver"))}},
+            upsert=True
+        )
+        print(f"   {collection}: {stats['scanned']} revisados, {stats['converted']} convertidos")
+
+    return stats
+
+
+async def main(targets: list, restart: bool):
+    print("Iniciando migración de horas a datetime...")
+    print("=" * 60)
+    for target in targets:
+        stats = await migrate_collection(target, restart)
+        print(
+            f"✅ {target}: {stats['scanned']} revisados, {stats['converted']} convertidos, "
+            f"{stats['unparsed']} valores sin interpretar"
+        )
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convierte horas en texto a datetime de Denver")
+    parser.add_argument("targets", nargs="+", choices=sorted(TIME_FIELDS))
+    parser.add_argument("--restart", action="store_true", help="Ignora el avance guardado y empieza desde el principio")
+    args = parser.parse_args()
+    asyncio.run(main(args.targets, args.restart))
@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 from bson import ObjectId
+from models.geo_model import GeoPointModel
 
 
 class GeneralInformationModel(BaseModel):
@@ -20,6 +21,7 @@ class GeneralInformationModel(BaseModel):
     supervisor_id: Optional[str] = None
     typeOfIncident_id: Optional[str] = None
     location: Optional[str] = None
+    geoLocation: Optional[GeoPointModel] = None  # Punto GeoJSON junto al texto de location
     
     time: Optional[str] = None
     timeWorkedYears: Optional[int] = None
@@ -0,0 +1,52 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Literal, Optional
+
+
+def _check_position(position: List[float]) -> List[float]:
+    lng, lat = position
+    if not -180 <= lng <= 180 or not -90 <= lat <= 90:
+        raise ValueError("Coordenadas fuera de rango: [longitud, latitud]")
+    return position
+
+
+class GeoPointModel(BaseModel):
+
+    # ✅ PUNTO GEOJSON: coordinates = [longitud, latitud]
+
+    type: Literal["Point"] = "Point"
+    coordinates: List[float] = Field(min_length=2, max_length=2)
+
+    @field_validator("coordinates")
+    @classmethod
+    def check_coordinates(cls, value):
+        return _check_position(value)
+
+
+class GeoPolygonModel(BaseModel):
+
+    # ✅ POLÍGONO GEOJSON: anillos cerrados de [longitud, latitud]
+
+    type: Literal["Polygon"] = "Polygon"
+    coordinates: List[List[List[float]]] = Field(min_length=1)
+
+    @field_validator("coordinates")
+    @classmethod
+    def check_rings(cls, value):
+        for ring in value:
+            if len(ring) < 4 or ring[0] != ring[-1]:
+                raise ValueError("Cada anillo necesita al menos 4 posiciones y debe cerrar en la primera")
+            for position in ring:
+                if len(position) != 2:
+                    raise ValueError("Cada posición debe ser [longitud, latitud]")
+                _check_position(position)
+        return value
+
+
+class GeoWithinModel(BaseModel):
+
+    # ✅ BÚSQUEDA DE INCIDENTES DENTRO DE UN POLÍGONO
+
+    polygon: GeoPolygonModel
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    limit: int = Field(default=500, ge=1, le=5000)
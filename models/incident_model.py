@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional
+
+from models.generalinformation_model import GeneralInformationModel
+from models.incidentdetail_model import IncidentDetailModel
+from models.duringtheincident_model import DuringTheIncidentModel
+from models.supervisorNotes_model import SupervisorNotesModel
+from models.employeesignature_model import IncidentDetailsModel as EmployeeSignatureModel
+
+
+class IncidentBundleModel(BaseModel):
+
+    # ✅ REPORTE COMPLETO: general information + sus hijos
+    # (el generalInformation_ref_id de los hijos lo asigna el servidor)
+
+    generalInformation: GeneralInformationModel
+    incidentDetail: Optional[IncidentDetailModel] = None
+    duringTheIncident: Optional[DuringTheIncidentModel] = None
+    supervisorNotes: Optional[SupervisorNotesModel] = None
+    employeeSignature: Optional[EmployeeSignatureModel] = None
@@ -0,0 +1,277 @@
+"""
+Script para recalcular los rollups desde los documentos originales
+Ejecutar: python rebuild_rollups.py loads downtimes spare-trucks summaries incident-flags incidents
+
+Los rollups se mantienen solos con $inc desde las rutas; este script es para
+la carga inicial o para corregir diferencias.
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from pymongo import UpdateOne
+
+from config.database import database
+from config.indexes import ensure_indexes
+from utils.date_utils import minutes_between
+from utils.rollups import spare_truck_derived_fields, repair_coversheet_summaries
+
+BATCH_SIZE = 1000
+
+
+async def rebuild_load_rollups():
+    """
+    Recalcula daily_load_rollups agrupando los loads activos por día, ruta,
+    landfill y material. $out reemplaza la colección de forma atómica y
+    conserva sus índices.
+    """
+    # 1. Loads antiguos sin fecha: copiar la fecha del coversheet
+    await database.loads.aggregate([
+        {"$match": {"date": {"$exists": False}, "coversheet_ref_id": {"$ne": None}}},
+        {"$lookup": {
+            "from": "coversheets",
+            "localField": "coversheet_ref_id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"date": 1}}],
+            "as": "coversheet"
+        }},
+        {"$project": {"date": {"$first": "$coversheet.date"}}},
+        {"$match": {"date": {"$ne": None}}},
+        {"$set": {"updatedAt": "$$NOW"}},
+        {"$merge": {"into": "loads", "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}}
+    ]).to_list(length=None)
+
+    # 2. Recalcular los rollups
+    await database.loads.aggregate([
+        {"$match": {"active": True, "date": {"$ne": None}}},
+        {"$group": {
+            "_id": {
+                "day": "$date",
+                "route_id": "$route_id",
+                "landFill_id": "$landFill_id",
+                "material_id": "$material_id"
+            },
+            "loads": {"$sum": 1},
+            "tons": {"$sum": {"$ifNull": ["$tons", 0]}},
+            "grossWeight": {"$sum": {"$ifNull": ["$grossWeight", 0]}},
+            "tareWeight": {"$sum": {"$ifNull": ["$tareWeight", 0]}},
+            "routeNumber": {"$last": "$routeNumber"},
+            "landfillName": {"$last": "$landfillName"},
+            "materialName": {"$last": "$materialName"}
+        }},
+        {"$project": {
+            "_id": 0,
+            "day": "$_id.day",
+            "route_id": "$_id.route_id",
+            "landFill_id": "$_id.landFill_id",
+            "material_id": "$_id.material_id",
+            "loads": 1,
+            "tons": 1,
+            "grossWeight": 1,
+            "tareWeight": 1,
+            "routeNumber": 1,
+            "landfillName": 1,
+            "materialName": 1,
+            "updatedAt": "$$NOW"
+        }},
+        {"$out": "daily_load_rollups"}
+    ]).to_list(length=None)
+
+    total = await database.daily_load_rollups.count_documents({})
+    print(f"✅ daily_load_rollups recalculado: {total} documentos")
+
+
+async def backfill_downtime_durations():
+    """
+    Downtimes guardados antes de calcular la duración al escribir: copia la
+    fecha del coversheet y calcula durationMinutes por lotes.
+    """
+    await database.downtimes.aggregate([
+        {"$match": {"date": {"$exists": False}, "coversheet_ref_id": {"$ne": None}}},
+        {"$lookup": {
+            "from": "coversheets",
+            "localField": "coversheet_ref_id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"date": 1}}],
+            "as": "coversheet"
+        }},
+        {"$project": {"date": {"$first": "$coversheet.date"}}},
+        {"$match": {"date": {"$ne": None}}},
+        {"$set": {"updatedAt": "$$NOW"}},
+        {"$merge": {"into": "downtimes", "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}}
+    ]).to_list(length=None)
+
+    updated = 0
+    ops = []
+    now = datetime.now(ZoneInfo("America/Denver"))
+    cursor = database.downtimes.find(
+        {"durationMinutes": {"$exists": False}},
+        {"startTime": 1, "endTime": 1, "date": 1}
+    )
+    async for doc in cursor:
+        minutes = minutes_between(doc.get("startTime"), doc.get("endTime"), doc.get("date"))
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"durationMinutes": minutes, "updatedAt": now}}))
+        if len(ops) >= BATCH_SIZE:
+            await database.downtimes.bulk_write(ops, ordered=False)
+            updated += len(ops)
+            ops = []
+    if ops:
+        await database.downtimes.bulk_write(ops, ordered=False)
+        updated += len(ops)
+
+    print(f"✅ durationMinutes calculado para {updated} downtimes")
+
+
+async def rebuild_spare_truck_rollups():
+    """
+    Calcula miles/hoursOut en los spare truck infos que no los tienen y
+    recalcula spare_truck_rollups con una agregación.
+    """
+    ops = []
+    cursor = database.sparetruckinfos.aggregate([
+        {"$match": {"miles": {"$exists": False}}},
+        {"$lookup": {
+            "from": "coversheets",
+            "localField": "coversheet_ref_id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"date": 1}}],
+            "as": "coversheet"
+        }},
+        {"$project": {
+            "startMiles": 1, "endMiles": 1, "leaveYard": 1, "backInYard": 1,
+            "date": {"$ifNull": ["$date", {"$first": "$coversheet.date"}]}
+        }}
+    ])
+    async for doc in cursor:
+        ops.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": {"date": doc.get("date"), **spare_truck_derived_fields(doc)}}
+        ))
+        if len(ops) >= BATCH_SIZE:
+            await database.sparetruckinfos.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        await database.sparetruckinfos.bulk_write(ops, ordered=False)
+
+    def as_number(field):
+        return {"$cond": [{"$isNumber": field}, field, 0]}
+
+    with_fuel = {"$and": [{"$gt": [as_number("$miles"), 0]}, {"$gt": [as_number("$fuel"), 0]}]}
+
+    await database.sparetruckinfos.aggregate([
+        {"$match": {"active": True, "spareTruckNumber": {"$nin": [None, ""]}}},
+        {"$group": {
+            "_id": "$spareTruckNumber",
+            "usages": {"$sum": 1},
+            "miles": {"$sum": as_number("$miles")},
+            "fuel": {"$sum": as_number("$fuel")},
+            "hoursOut": {"$sum": as_number("$hoursOut")},
+            "milesWithFuel": {"$sum": {"$cond": [with_fuel, "$miles", 0]}},
+            "fuelWithMiles": {"$sum": {"$cond": [with_fuel, "$fuel", 0]}}
+        }},
+        {"$project": {
+            "_id": 0,
+            "spareTruckNumber": "$_id",
+            "usages": 1, "miles": 1, "fuel": 1, "hoursOut": 1,
+            "milesWithFuel": 1, "fuelWithMiles": 1,
+            "updatedAt": "$$NOW"
+        }},
+        {"$out": "spare_truck_rollups"}
+    ]).to_list(length=None)
+
+    total = await database.spare_truck_rollups.count_documents({})
+    print(f"✅ spare_truck_rollups recalculado: {total} documentos")
+
+
+async def rebuild_coversheet_summaries():
+    result = await repair_coversheet_summaries()
+    print(f"✅ Resúmenes revisados: {result['checked']}, corregidos: {result['repaired']}")
+
+
+async def backfill_incident_flags():
+    """Copia wasAnyOneHurt y wereAnyVehiclesTowed del incident detail activo a su general information."""
+    await database.generalinformations.aggregate([
+        {"$project": {"_id": 1}},
+        {"$lookup": {
+            "from": "incidentDetails",
+            "localField": "_id",
+            "foreignField": "generalInformation_ref_id",
+            "pipeline": [{"$match": {"active": True}}, {"$project": {"wasAnyOneHurt": 1, "wereAnyVehiclesTowed": 1}}],
+            "as": "detail"
+        }},
+        {"$project": {
+            "wasAnyOneHurt": {"$ifNull": [{"$first": "$detail.wasAnyOneHurt"}, None]},
+            "wereAnyVehiclesTowed": {"$ifNull": [{"$first": "$detail.wereAnyVehiclesTowed"}, None]}
+        }},
+        {"$merge": {"into": "generalinformations", "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}}
+    ]).to_list(length=None)
+
+    total = await database.generalinformations.count_documents({"wasAnyOneHurt": True})
+    print(f"✅ Banderas copiadas a general information: {total} con heridos")
+
+
+async def rebuild_incident_rollups():
+    """
+    Recalcula incident_monthly_rollups agrupando los reportes activos por mes
+    (de Denver), tipo de incidente y departamento. Usa las banderas
+    desnormalizadas: correr antes incident-flags si hay reportes antiguos.
+    """
+    def flag_count(field):
+        return {"$sum": {"$cond": [{"$eq": [field, True]}, 1, 0]}}
+
+    await database.generalinformations.aggregate([
+        {"$match": {"active": True, "date": {"$ne": None}}},
+        {"$group": {
+            "_id": {
+                "month": {"$dateTrunc": {"date": "$date", "unit": "month", "timezone": "America/Denver"}},
+                "typeOfIncident_id": "$typeOfIncident_id",
+                "dept_id": "$dept_id"
+            },
+            "incidents": {"$sum": 1},
+            "injuries": flag_count("$wasAnyOneHurt"),
+            "towed": flag_count("$wereAnyVehiclesTowed"),
+            "typeOfIncidentName": {"$last": "$typeOfIncidentName"},
+            "deptName": {"$last": "$deptName"}
+        }},
+        {"$project": {
+            "_id": 0,
+            "month": "$_id.month",
+            "typeOfIncident_id": "$_id.typeOfIncident_id",
+            "dept_id": "$_id.dept_id",
+            "incidents": 1,
+            "injuries": 1,
+            "towed": 1,
+            "typeOfIncidentName": 1,
+            "deptName": 1,
+            "updatedAt": "$$NOW"
+        }},
+        {"$out": "incident_monthly_rollups"}
+    ]).to_list(length=None)
+
+    total = await database.incident_monthly_rollups.count_documents({})
+    print(f"✅ incident_monthly_rollups recalculado: {total} documentos")
+
+
+REBUILDERS = {
+    "loads": rebuild_load_rollups,
+    "downtimes": backfill_downtime_durations,
+    "spare-trucks": rebuild_spare_truck_rollups,
+    "summaries": rebuild_coversheet_summaries,
+    "incident-flags": backfill_incident_flags,
+    "incidents": rebuild_incident_rollups,
+}
+
+
+async def main(targets):
+    await ensure_indexes()
+    for target in targets:
+        print(f"Recalculando rollups de {target}...")
+        await REBUILDERS[target]()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcula los rollups desde los documentos originales")
+    parser.add_argument("targets", nargs="+", choices=sorted(REBUILDERS))
+    args = parser.parse_args()
+    asyncio.run(main(args.targets))
@@ -0,0 +1,178 @@
+import hashlib
+from fastapi import APIRouter, Request, Response, status, UploadFile, File, Depends
+from bson import ObjectId
+from config.database import database
+from config.dependencies import get_current_user
+from utils.catalog_cache import get_catalog, catalogs
+from utils.catalog_import import import_catalog_csv, CATALOG_IMPORTS
+from utils.response_helper import success_response, error_response
+
+router = APIRouter()
+
+# Helper de cada catálogo registrado con build_catalog_router (para el bundle)
+catalog_helpers = {}
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    return etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+
+
+def _with_etag(response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"  # Se puede guardar, pero se revalida con el ETag
+    return response
+
+
+def build_catalog_router(name: str, model, helper, label: str, plural: str, feminine: bool = False) -> APIRouter:
+    """
+    Genera el CRUD de un catálogo pequeño a partir de su modelo y su helper:
+    - GET / se sirve desde la caché en memoria con ETag (304 si no cambió)
+    - GET /{id} lee de la caché
+    - POST, PUT y DELETE escriben en MongoDB e invalidan la caché
+
+    label / plural / feminine solo se usan en los mensajes ("Ruta creada").
+    """
+    catalog_router = APIRouter()
+    cache = get_catalog(name)
+    collection = database[cache.collection]
+    ending = "a" if feminine else "o"
+    catalog_helpers[name] = helper
+
+    @catalog_router.post("/")
+    async def create_item(item: model):
+        try:
+            new = await collection.insert_one(item.model_dump())
+            cache.invalidate()
+            created = await collection.find_one({"_id": new.inserted_id})
+            return success_response(helper(created), msg=f"{label} cread{ending} exitosamente")
+        except Exception as e:
+            return error_response(f"Error al crear {label.lower()}: {str(e)}")
+
+    @catalog_router.get("/")
+    async def get_all_items(request: Request):
+        try:
+            data, etag = await cache.listing(helper)
+            if _not_modified(request, etag):
+                return _with_etag(Response(status_code=status.HTTP_304_NOT_MODIFIED), etag)
+            return _with_etag(success_response(data, msg=f"Lista de {plural} obtenida"), etag)
+        except Exception as e:
+            return error_response(f"Error al obtener {plural}: {str(e)}")
+
+    @catalog_router.get("/{id}")
+    async def get_item(id: str):
+        try:
+            if not ObjectId.is_valid(id):
+                return error_response(f"ID de {label.lower()} inválido", status_code=status.HTTP_400_BAD_REQUEST)
+            doc = await cache.get(ObjectId(id))
+            if doc:
+                return success_response(helper(doc), msg=f"{label} encontrad{ending}")
+            return error_response(f"{label} no encontrad{ending}", status_code=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return error_response(f"Error al obtener {label.lower()}: {str(e)}")
+
+    @catalog_router.put("/{id}")
+    async def update_item(id: str, item: model):
+        try:
+            if not ObjectId.is_valid(id):
+                return error_response(f"ID de {label.lower()} inválido", status_code=status.HTTP_400_BAD_REQUEST)
+            res = await collection.update_one({"_id": ObjectId(id)}, {"$set": item.model_dump()})
+            if res.matched_count == 0:
+                return error_response(f"{label} no encontrad{ending}", status_code=status.HTTP_404_NOT_FOUND)
+            cache.invalidate()
+            updated = await collection.find_one({"_id": ObjectId(id)})
+            return success_response(helper(updated), msg=f"{label} actualizad{ending}")
+        except Exception as e:
+            return error_response(f"Error al actualizar {label.lower()}: {str(e)}")
+
+    @catalog_router.delete("/{id}")
+    async def delete_item(id: str):
+        try:
+            if not ObjectId.is_valid(id):
+                return error_response(f"ID de {label.lower()} inválido", status_code=status.HTTP_400_BAD_REQUEST)
+            res = await collection.delete_one({"_id": ObjectId(id)})
+            if res.deleted_count:
+                cache.invalidate()
+                return success_response(None, msg=f"{label} eliminad{ending}")
+            return error_response(f"{label} no encontrad{ending}", status_code=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return error_response(f"Error al eliminar {label.lower()}: {str(e)}")
+
+    return catalog_router
+
+
+@router.get("/bundle")
+async def get_catalog_bundle(request: Request, names: str = None):
+    """
+    Varios catálogos en una sola respuesta, para que el frontend arranque con
+    una petición en lugar de diez. Cada catálogo trae su ETag y la respuesta
+    completa tiene uno propio (304 si ninguno cambió).
+
+    Parámetros:
+    - names: catálogos separados por coma (default: todos)
+
+    Ejemplo: GET /api/catalogs/bundle?names=trucks,routes,landfills,materials
+    """
+    try:
+        selected = [n.strip() for n in names.split(",") if n.strip()] if names else list(catalog_helpers)
+        invalid = [n for n in selected if n not in catalog_helpers or n not in catalogs]
+        if not selected or invalid:
+            return error_response(
+                f"Catálogo inválido. Opciones: {', '.join(catalog_helpers)}",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        data = {}
+        etags = []
+        for name in selected:
+            items, etag = await get_catalog(name).listing(catalog_helpers[name])
+            data[name] = {"data": items, "etag": etag}
+            etags.append(f"{name}:{etag}")
+
+        bundle_etag = f'"{hashlib.sha1("|".join(etags).encode()).hexdigest()}"'
+        if _not_modified(request, bundle_etag):
+            return _with_etag(Response(status_code=status.HTTP_304_NOT_MODIFIED), bundle_etag)
+        return _with_etag(success_response(data, msg="Catálogos obtenidos"), bundle_etag)
+    except Exception as e:
+        return error_response(f"Error al obtener catálogos: {str(e)}")
+
+
+@router.post("/import/{kind}")
+async def import_catalog(
+    kind: str,
+    file: UploadFile = File(...),
+    overwritePasswords: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Alta masiva desde CSV (para abrir un yard nuevo): crea o actualiza por
+    la llave de cada tipo, por lotes con bulk_write.
+
+    Tipos y columnas (el encabezado no distingue mayúsculas, espacios ni símbolos):
+    - trucks: Truck Number (llave)
+    - routes: Route Number (llave), LOB, Active (true/false, default true al crear)
+    - drivers: Email (llave), Name, Rol (default Driver; solo los de
+      DRIVER_IMPORT_ROLES), Password (requerida para drivers nuevos; en uno
+      existente solo se reemplaza con ?overwritePasswords=true)
+
+    Solo para usuarios Admin (no drivers).
+
+    Devuelve cuántos registros se crearon y actualizaron, cuántas filas
+    fallaron (errors) y las primeras filas con error (errorRows).
+
+    Ejemplo: POST /api/catalogs/import/drivers (multipart con file=drivers.csv)
+    """
+    try:
+        if current_user.get("type") != "user" or current_user.get("rol") != "Admin":
+            return error_response("No tienes permiso para importar catálogos", status_code=status.HTTP_403_FORBIDDEN)
+        if kind not in CATALOG_IMPORTS:
+            return error_response(
+                f"Tipo inválido. Opciones: {', '.join(CATALOG_IMPORTS)}",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if not file.filename or not file.filename.lower().endswith(".csv"):
+            return error_response("El archivo debe ser un CSV", status_code=status.HTTP_400_BAD_REQUEST)
+
+        result = await import_catalog_csv(kind, file, overwrite_passwords=overwritePasswords)
+        return success_response(result, msg=f"Importación de {kind} terminada")
+    except Exception as e:
+        return error_response(f"Error al importar {kind}: {str(e)}")
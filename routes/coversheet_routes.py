@@ -1,5 +1,7 @@
+import asyncio
 from zoneinfo import ZoneInfo
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Response
+from fastapi.responses import StreamingResponse
 from models.coversheet_model import CoverSheetModel
 from config.database import coversheets_collection
 from schemas.incidentdetail_scheme import coversheet_helper
@@ -15,6 +17,19 @@ from schemas.sparetruckinfo_scheme import sparetruckinfo_helper
 from schemas.truck_scheme import truck_helper
 from schemas.route_scheme import route_helper
 from schemas.employee_scheme import driver_helper
+from utils.rollups import apply_load_changes, apply_spare_truck_changes, apply_downtime_changes
+from utils.job_queue import enqueue_job
+from schemas.coversheet_summary_scheme import coversheet_summary_helper
+from utils.productivity_report import invalidate_productivity_days
+from utils.date_utils import denver_day_key, denver_isoformat, parse_date_range, normalize_time_fields, YARD_TIME_PAIRS
+from utils.coversheet_pdf import (
+    get_pdf_pool,
+    render_coversheet_pdf,
+    coversheet_pdf_filename,
+    coversheet_error_filename,
+    open_zip_stream,
+    PDF_BATCH_SIZE
+)
 
 # Importación de Colecciones
 from config.database import (
@@ -33,33 +48,102 @@ router = APIRouter()
 # FUNCIONES HELPER
 # ===========================
 
-async def expand_related_data_from_doc(doc):
+def coversheet_out(doc) -> dict:
     """
-    Expande datos relacionados desde el documento MongoDB original.
-    Usa referencia inversa (coversheet_ref_id en las colecciones hijas).
+    coversheet_helper con leaveYard / backInYard en ISO de Denver: desde la
+    migración de horas se guardan como datetime y el helper los deja tal cual.
+    """
+    return {
+        **coversheet_helper(doc),
+        "leaveYard": denver_isoformat(doc.get("leaveYard")),
+        "backInYard": denver_isoformat(doc.get("backInYard"))
+    }
+
+
+async def expand_related_data_for_docs(docs: list) -> list:
+    """
+    Expande varios coversheets a la vez: una consulta $in por colección hija
+    (loads, downtimes, spareTruckInfos) en lugar de tres por coversheet.
+    Devuelve los coversheets en el mismo orden que docs.
     """
     try:
-        c_id = doc["_id"]  # Ya es ObjectId
-        
-        # Búsquedas directas por referencia inversa
-        loads_cursor = loads_collection.find({"coversheet_ref_id": c_id, "active": True})
-        downtimes_cursor = downtimes_collection.find({"coversheet_ref_id": c_id, "active": True})
-        spares_cursor = sparetruckinfos_collection.find({"coversheet_ref_id": c_id, "active": True})
-        
-        # Convertir el coversheet primero
-        coversheet_dict = coversheet_helper(doc)
-        
-        # Agregar las relaciones
-        coversheet_dict["loads"] = [load_helper(d) for d in await loads_cursor.to_list(length=None)]
-        coversheet_dict["downtimes"] = [downtime_helper(d) for d in await downtimes_cursor.to_list(length=None)]
-        coversheet_dict["spareTruckInfos"] = [sparetruckinfo_helper(d) for d in await spares_cursor.to_list(length=None)]
-        
-        return coversheet_dict
+        ids = [doc["_id"] for doc in docs]
+        children = {c_id: {"loads": [], "downtimes": [], "spareTruckInfos": []} for c_id in ids}
+        if not ids:
+            return []
+
+        query = {"coversheet_ref_id": {"$in": ids}, "active": True}
+        sources = (
+            ("loads", loads_collection, load_helper),
+            ("downtimes", downtimes_collection, downtime_helper),
+            ("spareTruckInfos", sparetruckinfos_collection, sparetruckinfo_helper)
+        )
+        for key, collection, helper in sources:
+            async for child in collection.find(query):
+                children[child["coversheet_ref_id"]][key].append(helper(child))
+
+        result = []
+        for doc in docs:
+            coversheet_dict = coversheet_out(doc)
+            coversheet_dict["summary"] = coversheet_summary_helper(doc)
+            coversheet_dict.update(children[doc["_id"]])
+            result.append(coversheet_dict)
+        return result
     except Exception as e:
         print(f"Error en expansión de datos: {e}")
         raise
 
 
+async def expand_related_data_from_doc(doc):
+    """
+    Expande datos relacionados desde el documento MongoDB original.
+    Usa referencia inversa (coversheet_ref_id en las colecciones hijas).
+    """
+    expanded = await expand_related_data_for_docs([doc])
+    return expanded[0]
+
+
+async def stream_coversheets_zip(query: dict):
+    """
+    Genera el ZIP de PDFs por lotes: expande PDF_BATCH_SIZE coversheets con
+    expand_related_data_for_docs, los renderiza en el pool de procesos y
+    entrega los bytes de cada lote antes de leer el siguiente.
+
+    El 200 ya se envió cuando se renderiza, así que un coversheet que falla
+    no corta el ZIP: en su lugar va un .txt con el error.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_pdf_pool()
+    writer, archive = open_zip_stream()
+
+    cursor = coversheets_collection.find(query).sort([("date", 1), ("_id", 1)]).batch_size(PDF_BATCH_SIZE)
+    batch = []
+
+    async def render_batch(docs):
+        expanded = await expand_related_data_for_docs(docs)
+        pdfs = await asyncio.gather(*[
+            loop.run_in_executor(pool, render_coversheet_pdf, coversheet) for coversheet in expanded
+        ], return_exceptions=True)
+        for coversheet, pdf in zip(expanded, pdfs):
+            if isinstance(pdf, Exception):
+                print(f"Error al renderizar coversheet {coversheet['id']}: {pdf}")
+                archive.writestr(coversheet_error_filename(coversheet), f"No se pudo generar el PDF: {pdf}\n")
+                continue
+            archive.writestr(coversheet_pdf_filename(coversheet), pdf)
+        return writer.drain()
+
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= PDF_BATCH_SIZE:
+            yield await render_batch(batch)
+            batch = []
+    if batch:
+        yield await render_batch(batch)
+
+    archive.close()
+    yield writer.drain()
+
+
 # ===========================
 # RUTAS
 # ===========================
@@ -159,7 +243,7 @@ async def get_all_coversheets(
         docs = await cursor.to_list(length=limit)
         
         # Procesar documentos
-        coversheets = [coversheet_helper(d) for d in docs]
+        coversheets = [{**coversheet_out(d), "summary": coversheet_summary_helper(d)} for d in docs]
         
         # Calcular metadata de paginación
         total_pages = (total_count + limit - 1) // limit if total_count > 0 else 0
@@ -211,11 +295,65 @@ async def get_coversheets_by_date(date_str: str):
             "active": True
         })
         docs = await cursor.to_list(length=None)
-        return success_response([coversheet_helper(d) for d in docs])
+        return success_response([{**coversheet_out(d), "summary": coversheet_summary_helper(d)} for d in docs])
     except Exception as e:
         return error_response(f"Error al obtener coversheets por fecha: {str(e)}")
 
 
+@router.get("/pdf")
+async def get_coversheets_pdf_zip(start_date: str, end_date: str, current_user: dict = Depends(get_current_user)):
+    """
+    Descarga un ZIP con el PDF de cada coversheet activo del rango.
+    Se genera en streaming por lotes, así que la memoria no crece con el
+    número de coversheets.
+
+    Ejemplo: GET /api/coversheets/pdf?start_date=2025-10-01&end_date=2025-10-07
+    """
+    try:
+        try:
+            date_filter = parse_date_range(start_date, end_date)
+        except ValueError as ve:
+            return error_response(str(ve), status_code=400)
+
+        query = {"active": True, "date": date_filter}
+        if not await coversheets_collection.find_one(query, {"_id": 1}):
+            return error_response("No hay coversheets en el rango indicado", status_code=404)
+
+        return StreamingResponse(
+            stream_coversheets_zip(query),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="coversheets_{start_date}_{end_date}.zip"'}
+        )
+    except Exception as e:
+        return error_response(f"Error al generar PDFs: {str(e)}")
+
+
+@router.get("/{id}/pdf")
+async def get_coversheet_pdf(id: str, current_user: dict = Depends(get_current_user)):
+    """
+    PDF imprimible de un coversheet con sus loads, downtimes y spare truck info.
+
+    Ejemplo: GET /api/coversheets/685594bedb4f505f5f680e2d9/pdf
+    """
+    try:
+        if not ObjectId.is_valid(id):
+            return error_response("ID de Coversheet inválido", status_code=400)
+
+        doc = await coversheets_collection.find_one({"_id": ObjectId(id), "active": True})
+        if not doc:
+            return error_response("Coversheet no encontrada o está eliminada", status_code=404)
+
+        coversheet = await expand_related_data_from_doc(doc)
+        pdf = await asyncio.get_running_loop().run_in_executor(get_pdf_pool(), render_coversheet_pdf, coversheet)
+        return Response(
+            content=pdf,
+            media_type="application/pdf",
+            headers={"Content-Disposition": f'inline; filename="{coversheet_pdf_filename(coversheet)}"'}
+        )
+    except Exception as e:
+        return error_response(f"Error al generar PDF: {str(e)}")
+
+
 @router.get("/{id}")
 async def get_coversheet_by_id(id: str, expand: bool = False):
     """
@@ -246,7 +384,7 @@ async def get_coversheet_by_id(id: str, expand: bool = False):
             data = await expand_related_data_from_doc(doc)
             return success_response(data)
         else:
-            return success_response(coversheet_helper(doc))
+            return success_response({**coversheet_out(doc), "summary": coversheet_summary_helper(doc)})
         
     except Exception as e:
         return error_response(f"Error al obtener coversheet: {str(e)}")
@@ -317,18 +455,23 @@ async def create_coversheet(coversheet: CoverSheetModel):
                 tzinfo=tz
             )
         
+        normalize_time_fields(data, YARD_TIME_PAIRS, data["date"])
+
         data["createdAt"] = now_denver
         data["updatedAt"] = None
         
         # ✅ PASO 3: Establecer active en True
         data["active"] = data.get("active", True)
+
+        # Resumen materializado (lo mantienen las rutas de load, downtime y spare truck)
+        data["summary"] = {"loadCount": 0, "totalTons": 0.0, "downtimeMinutes": 0.0, "spareTruckCount": 0}
         
         # ✅ PASO 4: Insertar en la base de datos
         result = await coversheets_collection.insert_one(data)
         
         # ✅ PASO 5: Recuperar el documento insertado y devolverlo
         new_doc = await coversheets_collection.find_one({"_id": result.inserted_id})
-        return success_response(coversheet_helper(new_doc), msg="Coversheet creada exitosamente")
+        return success_response(coversheet_out(new_doc), msg="Coversheet creada exitosamente")
         
     except Exception as e:
         return error_response(f"Error al crear coversheet: {str(e)}")
@@ -353,6 +496,7 @@ async def update_coversheet(id: str, coversheet: CoverSheetModel):
             del data["date"]  # No permitir cambiar la fecha
         if "active" in data:
             del data["active"]  # No permitir cambiar active a través de este endpoint
+        data.pop("summary", None)  # Lo mantienen las rutas hijas
         
         # ✅ PASO 2: Actualizar updatedAt
         tz = ZoneInfo("America/Denver")
@@ -376,6 +520,13 @@ async def update_coversheet(id: str, coversheet: CoverSheetModel):
             driver_doc = await drivers_collection.find_one({"_id": data["driver_id"]})
             if driver_doc and driver_doc.get("name"):
                 data["driverName"] = driver_doc["name"]
+
+        # Horas del yard como datetime de Denver del día del coversheet
+        if "leaveYard" in data or "backInYard" in data:
+            current = await coversheets_collection.find_one(
+                {"_id": ObjectId(id)}, {"date": 1, "leaveYard": 1, "backInYard": 1}
+            ) or {}
+            normalize_time_fields(data, YARD_TIME_PAIRS, current.get("date"), current)
         
         # ✅ PASO 4: Actualizar solo si el coversheet está activo
         res = await coversheets_collection.update_one(
@@ -391,8 +542,12 @@ async def update_coversheet(id: str, coversheet: CoverSheetModel):
         
         # ✅ PASO 5: Recuperar el documento actualizado y devolverlo
         updated = await coversheets_collection.find_one({"_id": ObjectId(id)})
+
+        # El driver o la ruta pudieron cambiar: recalcular productividad de ese día
+        if updated.get("date"):
+            await invalidate_productivity_days([denver_day_key(updated["date"])])
         return success_response(
-            coversheet_helper(updated),
+            coversheet_out(updated),
             msg="Coversheet actualizada exitosamente"
         )
         
@@ -436,6 +591,10 @@ async def delete_coversheet(id: str):
             }
         )
         
+        # Restar de los rollups los loads que siguen activos
+        active_loads = await loads_collection.find({"coversheet_ref_id": coversheet_oid, "active": True}).to_list(length=None)
+        await apply_load_changes([(load, None) for load in active_loads])
+
         # Marcar todos los loads relacionados como inactivos
         await loads_collection.update_many(
             {"coversheet_ref_id": coversheet_oid},
@@ -447,6 +606,10 @@ async def delete_coversheet(id: str):
             }
         )
         
+        # Restar del resumen los downtimes activos
+        active_downtimes = await downtimes_collection.find({"coversheet_ref_id": coversheet_oid, "active": True}).to_list(length=None)
+        await apply_downtime_changes([(downtime, None) for downtime in active_downtimes])
+
         # Marcar todos los downtimes relacionados como inactivos
         await downtimes_collection.update_many(
             {"coversheet_ref_id": coversheet_oid},
@@ -458,6 +621,10 @@ async def delete_coversheet(id: str):
             }
         )
         
+        # Restar de los rollups los spare truck infos activos
+        active_spares = await sparetruckinfos_collection.find({"coversheet_ref_id": coversheet_oid, "active": True}).to_list(length=None)
+        await apply_spare_truck_changes([(spare, None) for spare in active_spares])
+
         # Marcar todos los spare truck infos relacionados como inactivos
         await sparetruckinfos_collection.update_many(
             {"coversheet_ref_id": coversheet_oid},
@@ -507,6 +674,12 @@ async def permanent_delete_coversheet(id: str, current_user: str = Depends(get_c
         downtimes_count = await downtimes_collection.count_documents({"coversheet_ref_id": coversheet_oid})
         spares_count = await sparetruckinfos_collection.count_documents({"coversheet_ref_id": coversheet_oid})
         
+        # Restar de los rollups lo que seguía activo (si ya hubo soft delete, ya se restó)
+        active_loads = await loads_collection.find({"coversheet_ref_id": coversheet_oid, "active": True}).to_list(length=None)
+        await apply_load_changes([(load, None) for load in active_loads])
+        active_spares = await sparetruckinfos_collection.find({"coversheet_ref_id": coversheet_oid, "active": True}).to_list(length=None)
+        await apply_spare_truck_changes([(spare, None) for spare in active_spares])
+
         # Eliminar documentos relacionados
         await loads_collection.delete_many({"coversheet_ref_id": coversheet_oid})
         await downtimes_collection.delete_many({"coversheet_ref_id": coversheet_oid})
@@ -535,6 +708,23 @@ async def permanent_delete_coversheet(id: str, current_user: str = Depends(get_c
         return error_response(f"Error al eliminar permanentemente: {str(e)}")
 
 
+@router.post("/repair-summaries", status_code=status.HTTP_202_ACCEPTED)
+async def repair_summaries(current_user: dict = Depends(get_current_user)):
+    """
+    Programa un job que recalcula el resumen (loads, tons, minutos de downtime,
+    spare trucks) de todos los coversheets activos y corrige los desviados.
+    """
+    try:
+        job_id = await enqueue_job("coversheets.repair_summaries")
+        return success_response(
+            {"job_id": str(job_id)},
+            msg="Reparación de resúmenes programada",
+            status_code=status.HTTP_202_ACCEPTED
+        )
+    except Exception as e:
+        return error_response(f"Error al programar la reparación: {str(e)}")
+
+
 # ===========================
 # RUTAS DE RELACIONES
 # ===========================
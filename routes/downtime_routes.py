@@ -1,7 +1,9 @@
 from fastapi import APIRouter, status
 from models.duringtheincident_model import DowntimeModel
-from config.database import downtimes_collection, trucks_collection
+from config.database import downtimes_collection, trucks_collection, coversheets_collection
 from schemas.downtime_scheme import downtime_helper
+from utils.date_utils import minutes_between, normalize_time_fields, DOWNTIME_TIME_PAIRS
+from utils.rollups import apply_downtime_changes
 from utils.response_helper import success_response, error_response
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -25,6 +27,16 @@ async def create_downtime(downtime: DowntimeModel):
         coversheet_ref_id = data.get("coversheet_ref_id")
         if coversheet_ref_id:
             data["coversheet_ref_id"] = ObjectId(coversheet_ref_id)
+
+            # Desnormalizar la fecha del coversheet (día del downtime para reportes)
+            coversheet_doc = await coversheets_collection.find_one({"_id": data["coversheet_ref_id"]}, {"date": 1})
+            data["date"] = coversheet_doc.get("date") if coversheet_doc else None
+
+        # Horas como datetime de Denver del día del coversheet
+        normalize_time_fields(data, DOWNTIME_TIME_PAIRS, data.get("date"))
+
+        # ✅ Calcular la duración una sola vez al guardar
+        data["durationMinutes"] = minutes_between(data.get("startTime"), data.get("endTime"), data.get("date"))
         
         # Convertir truck_id a ObjectId si existe
         truck_id = data.get("truck_id")
@@ -43,6 +55,9 @@ async def create_downtime(downtime: DowntimeModel):
         new = await downtimes_collection.insert_one(data)
         created = await downtimes_collection.find_one({"_id": new.inserted_id})
 
+        # ✅ Sumar los minutos al resumen del coversheet
+        await apply_downtime_changes([(None, created)])
+
         # ❌ Ya NO llamamos a add_entity_to_coversheet
         # El coversheet ya no mantiene arrays de IDs
 
@@ -106,6 +121,22 @@ async def update_downtime(id: str, downtime: DowntimeModel):
         
         # 🆕 Actualizar timestamp
         data["updatedAt"] = datetime.now(ZoneInfo("America/Denver"))
+
+        existing = await downtimes_collection.find_one({"_id": ObjectId(id), "active": True})
+        if not existing:
+            return error_response(
+                "Downtime no encontrada o no está activa", 
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+
+        # ✅ Recalcular la duración si cambió alguna de las horas
+        if "startTime" in data or "endTime" in data:
+            normalize_time_fields(data, DOWNTIME_TIME_PAIRS, existing.get("date"), existing)
+            data["durationMinutes"] = minutes_between(
+                data.get("startTime", existing.get("startTime")),
+                data.get("endTime", existing.get("endTime")),
+                existing.get("date")
+            )
         
         # Convertir truck_id a ObjectId si está siendo actualizado
         truck_id = data.get("truck_id")
@@ -130,6 +161,10 @@ async def update_downtime(id: str, downtime: DowntimeModel):
             )
 
         updated = await downtimes_collection.find_one({"_id": ObjectId(id)})
+
+        # ✅ Ajustar los minutos de downtime del coversheet
+        await apply_downtime_changes([(existing, updated)])
+
         return success_response(downtime_helper(updated), msg="Downtime actualizada")
     except Exception as e:
         return error_response(f"Error al actualizar downtime: {str(e)}")
@@ -142,21 +177,10 @@ async def delete_downtime(id: str):
     ❌ Ya NO es un hard delete
     """
     try:
-        # Verificar que el downtime existe y está activo
-        downtime = await downtimes_collection.find_one({
-            "_id": ObjectId(id),
-            "active": True
-        })
-        
-        if not downtime:
-            return error_response(
-                "Downtime no encontrada o ya fue eliminada", 
-                status_code=status.HTTP_404_NOT_FOUND
-            )
-        
-        # 🆕 Soft delete: marcar como inactivo
-        await downtimes_collection.update_one(
-            {"_id": ObjectId(id)},
+        # 🆕 Soft delete atómico: solo el request que lo desactiva recibe el
+        # documento (estado anterior) y resta del resumen
+        downtime = await downtimes_collection.find_one_and_update(
+            {"_id": ObjectId(id), "active": True},
             {
                 "$set": {
                     "active": False,
@@ -164,7 +188,16 @@ async def delete_downtime(id: str):
                 }
             }
         )
+
+        if not downtime:
+            return error_response(
+                "Downtime no encontrada o ya fue eliminada", 
+                status_code=status.HTTP_404_NOT_FOUND
+            )
         
+        # ✅ Restar los minutos del resumen del coversheet
+        await apply_downtime_changes([(downtime, None)])
+
         return success_response(None, msg="Downtime eliminada (soft delete)")
     except Exception as e:
         return error_response(f"Error al eliminar downtime: {str(e)}")
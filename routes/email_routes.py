@@ -1,18 +1,117 @@
 # routes/email_routes.py
-from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Form
-from utils.email_utils import send_email
+from typing import Optional
+from fastapi import APIRouter, HTTPException, status, Form
+from bson import ObjectId
+from jinja2 import TemplateSyntaxError
+from utils.bulk_email import resolve_recipients, create_email_batch
+from utils.email_utils import message_env
+from utils.job_queue import enqueue_job
+from utils.response_helper import success_response, error_response
+from schemas.email_batch_scheme import email_batch_helper, email_batch_recipient_helper
+from config.database import emailBatches_collection, emailBatchRecipients_collection
 
 router = APIRouter()
 
 @router.post("/send-email")
 async def send_test_email(
-    background_tasks: BackgroundTasks,
     to: str = Form(...),
     subject: str = Form(...),
     message: str = Form(...)
 ):
     try:
-        background_tasks.add_task(send_email, to, subject, message)
+        # Se procesa en el worker (python worker.py), no en el request
+        await enqueue_job("email.send", {"to": to, "subject": subject, "message": message})
         return {"message": f"Envío de correo programado a {to}"}
     except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.post("/send-bulk-email", status_code=status.HTTP_202_ACCEPTED)
+async def send_bulk_email(
+    subject: str = Form(...),
+    message: str = Form(...),
+    target: str = Form("drivers"),
+    route_id: Optional[str] = Form(None)
+):
+    """
+    Envío masivo a drivers (mail-merge).
+
+    Parámetros:
+    - subject / message: el mensaje puede usar {{ name }} y {{ email }}
+    - target: "drivers" (todos) o "route" (drivers que trabajan la ruta)
+    - route_id: requerido si target="route"
+
+    Devuelve el batch creado; el progreso se consulta en GET /bulk-email/{batch_id}
+    """
+    try:
+        if target not in ("drivers", "route"):
+            return error_response("target debe ser 'drivers' o 'route'", status_code=status.HTTP_400_BAD_REQUEST)
+        if target == "route" and (not route_id or not ObjectId.is_valid(route_id)):
+            return error_response("route_id inválido", status_code=status.HTTP_400_BAD_REQUEST)
+
+        # Se compila aquí (mismo sandbox que el worker) para no crear un batch que fallaría completo
+        try:
+            message_env.from_string(message)
+        except TemplateSyntaxError as te:
+            return error_response(
+                f"El mensaje tiene un error de plantilla (línea {te.lineno}): {te.message}",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        recipients = await resolve_recipients(target, route_id)
+        if not recipients:
+            return error_response("No hay destinatarios para el filtro indicado", status_code=status.HTTP_404_NOT_FOUND)
+
+        batch_id = await create_email_batch(
+            recipients, subject, message,
+            filters={"target": target, "route_id": route_id}
+        )
+        await enqueue_job("email.bulk", {"batch_id": str(batch_id)})
+
+        batch = await emailBatches_collection.find_one({"_id": batch_id})
+        return success_response(
+            email_batch_helper(batch),
+            msg=f"Envío masivo programado a {len(recipients)} destinatarios",
+            status_code=status.HTTP_202_ACCEPTED
+        )
+    except Exception as e:
+        return error_response(f"Error al programar el envío masivo: {str(e)}", status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@router.get("/bulk-email/{batch_id}")
+async def get_bulk_email_status(
+    batch_id: str,
+    include_recipients: bool = False,
+    recipient_status: str = None,
+    page: int = 1,
+    limit: int = 100
+):
+    """
+    Progreso de un envío masivo.
+
+    Parámetros:
+    - include_recipients: incluir el estado por destinatario (paginado)
+    - recipient_status: filtrar destinatarios por estado (pending, sent, failed)
+    """
+    try:
+        if not ObjectId.is_valid(batch_id):
+            return error_response("ID de batch inválido", status_code=status.HTTP_400_BAD_REQUEST)
+        if page < 1 or limit < 1 or limit > 500:
+            return error_response("Parámetros de paginación inválidos", status_code=status.HTTP_400_BAD_REQUEST)
+
+        batch = await emailBatches_collection.find_one({"_id": ObjectId(batch_id)})
+        if not batch:
+            return error_response("Batch no encontrado", status_code=status.HTTP_404_NOT_FOUND)
+
+        data = email_batch_helper(batch)
+
+        if include_recipients:
+            query = {"batch_id": batch["_id"]}
+            if recipient_status:
+                query["status"] = recipient_status
+            cursor = emailBatchRecipients_collection.find(query).sort("seq", 1).skip((page - 1) * limit).limit(limit)
+            data["recipients"] = [email_batch_recipient_helper(r) for r in await cursor.to_list(length=limit)]
+
+        return success_response(data, msg="Estado del envío masivo")
+    except Exception as e:
+        return error_response(f"Error al obtener el envío masivo: {str(e)}")
@@ -0,0 +1,508 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from fastapi import APIRouter, Request, Response, status
+from fastapi.responses import StreamingResponse
+from gridfs.errors import NoFile
+from config.database import generalinformations_collection, reporting_database
+from models.incident_model import IncidentBundleModel
+from models.geo_model import GeoWithinModel
+from schemas.generalinformation_scheme import generalinformation_helper
+from schemas.incidentdetail_scheme import incidentdetail_helper
+from schemas.duringtheincident_scheme import duringtheincident_helper
+from schemas.supervisornotes_scheme import supervisornotes_helper
+from schemas.employeesignature_scheme import employeesignature_helper
+from utils.incidents import (
+    create_incident_bundle,
+    update_incident_bundle,
+    soft_delete_incident,
+    get_prior_incidents,
+    prior_incident_fields,
+    PRIOR_INCIDENT_DAYS,
+    get_incident_children,
+    resolve_during_the_incident_names
+)
+from utils.date_utils import parse_date_range, DENVER_TZ
+from utils.signatures import open_signature, iter_signature, DEFAULT_CONTENT_TYPE, SIGNATURE_CONTENT_TYPES
+from utils.keyset import encode_cursor, decode_cursor, keyset_filter
+from utils.response_helper import success_response, error_response
+
+router = APIRouter()
+
+# Helper de cada parte del reporte
+INCIDENT_HELPERS = {
+    "generalInformation": generalinformation_helper,
+    "incidentDetail": incidentdetail_helper,
+    "duringTheIncident": duringtheincident_helper,
+    "supervisorNotes": supervisornotes_helper,
+    "employeeSignature": employeesignature_helper
+}
+
+
+# Filtros por ID del listado
+INCIDENT_LIST_FILTERS = ("dept_id", "supervisor_id", "typeOfIncident_id", "employee_id", "truck_id")
+
+
+def incident_bundle_helper(bundle: dict) -> dict:
+    return {key: helper(bundle[key]) if bundle.get(key) else None for key, helper in INCIDENT_HELPERS.items()}
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+async def create_incident(incident: IncidentBundleModel):
+    """
+    Crea un reporte de incidente completo en una sola petición y una sola
+    transacción: general information + incident detail, during the incident,
+    supervisor notes y firma del empleado (los hijos son opcionales).
+
+    employeeName, truckNumber, deptName, supervisorName y typeOfIncidentName
+    se resuelven en una sola consulta.
+    """
+    try:
+        try:
+            created = await create_incident_bundle(incident)
+        except ValueError as ve:
+            return error_response(str(ve), status_code=status.HTTP_400_BAD_REQUEST)
+
+        return success_response(
+            incident_bundle_helper(created),
+            msg="Reporte de incidente creado exitosamente",
+            status_code=status.HTTP_201_CREATED
+        )
+    except Exception as e:
+        return error_response(f"Error al crear reporte de incidente: {str(e)}")
+
+
+@router.get("/")
+async def get_incidents(
+    start_date: str = None,
+    end_date: str = None,
+    dept_id: str = None,
+    supervisor_id: str = None,
+    typeOfIncident_id: str = None,
+    employee_id: str = None,
+    truck_id: str = None,
+    wasAnyOneHurt: bool = None,
+    limit: int = 50,
+    cursor: str = None
+):
+    """
+    Lista reportes de incidentes (más recientes primero) con paginación por cursor.
+
+    Parámetros:
+    - start_date / end_date: rango de fechas del incidente (YYYY-MM-DD, inclusivo)
+    - dept_id, supervisor_id, typeOfIncident_id, employee_id, truck_id: filtros por ID
+    - wasAnyOneHurt: true / false
+    - limit: registros por página (default: 50, max: 200)
+    - cursor: el next_cursor de la página anterior
+
+    El total (total_count) se cuenta en paralelo con la página.
+
+    Ejemplos:
+    - GET /api/incidents/?dept_id=ABC123&wasAnyOneHurt=true
+    - GET /api/incidents/?start_date=2025-01-01&cursor=eyJ...
+    """
+    try:
+        if limit < 1 or limit > 200:
+            return error_response("El parámetro 'limit' debe estar entre 1 y 200", status_code=status.HTTP_400_BAD_REQUEST)
+
+        query = {"active": True}
+        try:
+            date_filter = parse_date_range(start_date, end_date)
+        except ValueError as ve:
+            return error_response(str(ve), status_code=status.HTTP_400_BAD_REQUEST)
+        if date_filter:
+            query["date"] = date_filter
+
+        values = {
+            "dept_id": dept_id,
+            "supervisor_id": supervisor_id,
+            "typeOfIncident_id": typeOfIncident_id,
+            "employee_id": employee_id,
+            "truck_id": truck_id
+        }
+        for field in INCIDENT_LIST_FILTERS:
+            if values[field]:
+                if not ObjectId.is_valid(values[field]):
+                    return error_response(f"{field} inválido", status_code=status.HTTP_400_BAD_REQUEST)
+                query[field] = ObjectId(values[field])
+
+        if wasAnyOneHurt is not None:
+            query["wasAnyOneHurt"] = wasAnyOneHurt
+
+        page_query = dict(query)
+        if cursor:
+            try:
+                last_date, last_id = decode_cursor(cursor)
+            except ValueError as ve:
+                return error_response(str(ve), status_code=status.HTTP_400_BAD_REQUEST)
+            page_query = {"$and": [query, keyset_filter("date", last_date, last_id)]}
+
+        find = generalinformations_collection.find(page_query).sort([("date", -1), ("_id", -1)]).limit(limit + 1)
+        docs, total_count = await asyncio.gather(
+            find.to_list(length=limit + 1),
+            generalinformations_collection.count_documents(query)
+        )
+
+        has_next = len(docs) > limit
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1].get("date"), docs[-1]["_id"]) if has_next else None
+
+        return success_response({
+            "data": [generalinformation_helper(d) for d in docs],
+            "pagination": {
+                "limit": limit,
+                "total_count": total_count,
+                "has_next": has_next,
+                "next_cursor": next_cursor
+            },
+            "filters": {
+                "start_date": start_date,
+                "end_date": end_date,
+                **values,
+                "wasAnyOneHurt": wasAnyOneHurt
+            }
+        })
+    except Exception as e:
+        return error_response(f"Error al obtener reportes de incidentes: {str(e)}")
+
+
+def _geo_match(start_date: str = None, end_date: str = None) -> dict:
+    """Filtro base de las consultas geográficas (lanza ValueError si las fechas son inválidas)."""
+    match = {"active": True}
+    date_filter = parse_date_range(start_date, end_date)
+    if date_filter:
+        match["date"] = date_filter
+    return match
+
+
+def _geo_incident_result(doc: dict) -> dict:
+    result = generalinformation_helper(doc)
+    if "distance" in doc:
+        result["distanceMeters"] = round(doc["distance"], 1)
+    return result
+
+
+@router.get("/geo/near")
+async def get_incidents_near(
+    lng: float,
+    lat: float,
+    max_distance: float = 500,
+    start_date: str = None,
+    end_date: str = None,
+    limit: int = 100
+):
+    """
+    Incidentes cerca de un punto, del más cercano al más lejano ($geoNear
+    sobre el índice 2dsphere de geoLocation).
+
+    Parámetros:
+    - lng / lat: punto de referencia
+    - max_distance: radio en metros (default: 500, max: 50000)
+    - start_date / end_date: rango de fechas (YYYY-MM-DD, inclusivo)
+    - limit: máximo de resultados (default: 100, max: 1000)
+
+    Ejemplo: GET /api/incidents/geo/near?lng=-104.9903&lat=39.7392&max_distance=300
+    """
+    try:
+        if not -180 <= lng <= 180 or not -90 <= lat <= 90:
+            return error_response("Coordenadas fuera de rango", status_code=status.HTTP_400_BAD_REQUEST)
+        if max_distance <= 0 or max_distance > 50000:
+            return error_response("max_distance debe estar entre 0 y 50000 metros", status_code=status.HTTP_400_BAD_REQUEST)
+        if limit < 1 or limit > 1000:
+            return error_response("El parámetro 'limit' debe estar entre 1 y 1000", status_code=status.HTTP_400_BAD_REQUEST)
+        try:
+            match = _geo_match(start_date, end_date)
+        except ValueError as ve:
+            return error_response(str(ve), status_code=status.HTTP_400_BAD_REQUEST)
+
+        docs = await generalinformations_collection.aggregate([
+            {"$geoNear": {
+                "near": {"type": "Point", "coordinates": [lng, lat]},
+                "key": "geoLocation",
+                "distanceField": "distance",
+                "maxDistance": max_distance,
+                "spherical": True,
+                "query": match
+            }},
+            {"$limit": limit}
+        ]).to_list(length=limit)
+
+        return success_response({
+            "data": [_geo_incident_result(doc) for doc in docs],
+            "total_count": len(docs),
+            "filters": {
+                "lng": lng, "lat": lat, "max_distance": max_distance,
+                "start_date": start_date, "end_date": end_date
+            }
+        })
+    except Exception as e:
+        return error_response(f"Error al buscar incidentes cercanos: {str(e)}")
+
+
+@router.post("/geo/within")
+async def get_incidents_within(search: GeoWithinModel):
+    """
+    Incidentes dentro de un polígono GeoJSON (por ejemplo una zona o una
+    intersección dibujada en el mapa), más recientes primero.
+
+    Body: {"polygon": {"type": "Polygon", "coordinates": [[[lng, lat], ...]]},
+           "start_date": "2025-01-01", "end_date": null, "limit": 500}
+    """
+    try:
+        try:
+            match = _geo_match(search.start_date, search.end_date)
+        except ValueError as ve:
+            return error_response(str(ve), status_code=status.HTTP_400_BAD_REQUEST)
+        match["geoLocation"] = {"$geoWithin": {"$geometry": search.polygon.model_dump()}}
+
+        docs = await generalinformations_collection.find(match).sort(
+            [("date", -1), ("_id", -1)]
+        ).limit(search.limit).to_list(length=search.limit)
+
+        return success_response({
+            "data": [_geo_incident_result(doc) for doc in docs],
+            "total_count": len(docs)
+        })
+    except Exception as e:
+        return error_response(f"Error al buscar incidentes en el polígono: {str(e)}")
+
+
+@router.get("/geo/heatmap")
+async def get_incident_heatmap(
+    cell_size: float = 0.005,
+    bbox: str = None,
+    start_date: str = None,
+    end_date: str = None,
+    limit: int = 500
+):
+    """
+    Mapa de calor: incidentes agrupados en una cuadrícula de cell_size grados
+    (0.005 ≈ 500 m), calculado en el servidor con una sola agregación.
+    Devuelve las celdas con más incidentes primero.
+
+    Parámetros:
+    - cell_size: tamaño de la celda en grados (entre 0.0005 y 1)
+    - bbox: minLng,minLat,maxLng,maxLat para limitar el área (opcional)
+    - start_date / end_date: rango de fechas (YYYY-MM-DD, inclusivo)
+    - limit: máximo de celdas (default: 500, max: 5000)
+
+    Ejemplo: GET /api/incidents/geo/heatmap?cell_size=0.002&bbox=-105.1,39.6,-104.8,39.9
+    """
+    try:
+        if cell_size < 0.0005 or cell_size > 1:
+            return error_response("cell_size debe estar entre 0.0005 y 1", status_code=status.HTTP_400_BAD_REQUEST)
+        if limit < 1 or limit > 5000:
+            return error_response("El parámetro 'limit' debe estar entre 1 y 5000", status_code=status.HTTP_400_BAD_REQUEST)
+        try:
+            match = _geo_match(start_date, end_date)
+        except ValueError as ve:
+            return error_response(str(ve), status_code=status.HTTP_400_BAD_REQUEST)
+
+        if bbox:
+            try:
+                min_lng, min_lat, max_lng, max_lat = [float(v) for v in bbox.split(",")]
+            except ValueError:
+                return error_response("bbox debe ser minLng,minLat,maxLng,maxLat", status_code=status.HTTP_400_BAD_REQUEST)
+            match["geoLocation"] = {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [[
+                [min_lng, min_lat], [max_lng, min_lat], [max_lng, max_lat], [min_lng, max_lat], [min_lng, min_lat]
+            ]]}}}
+        else:
+            match["geoLocation.type"] = "Point"
+
+        def cell(index: int):
+            return {"$floor": {"$divide": [{"$arrayElemAt": ["$geoLocation.coordinates", index]}, cell_size]}}
+
+        rows = await reporting_database.generalinformations.aggregate([
+            {"$match": match},
+            {"$group": {
+                "_id": {"x": cell(0), "y": cell(1)},
+                "incidents": {"$sum": 1},
+                "injuries": {"$sum": {"$cond": [{"$eq": ["$wasAnyOneHurt", True]}, 1, 0]}}
+            }},
+            {"$sort": {"incidents": -1, "_id.x": 1, "_id.y": 1}},
+            {"$limit": limit}
+        ]).to_list(length=limit)
+
+        cells = [{
+            "lng": round((row["_id"]["x"] + 0.5) * cell_size, 6),
+            "lat": round((row["_id"]["y"] + 0.5) * cell_size, 6),
+            "bounds": [
+                round(row["_id"]["x"] * cell_size, 6), round(row["_id"]["y"] * cell_size, 6),
+                round((row["_id"]["x"] + 1) * cell_size, 6), round((row["_id"]["y"] + 1) * cell_size, 6)
+            ],
+            "incidents": row["incidents"],
+            "injuries": row["injuries"]
+        } for row in rows]
+
+        return success_response({
+            "data": cells,
+            "filters": {"cell_size": cell_size, "bbox": bbox, "start_date": start_date, "end_date": end_date}
+        })
+    except Exception as e:
+        return error_response(f"Error al calcular mapa de calor: {str(e)}")
+
+
+@router.get("/employees/{employee_id}/history")
+async def get_employee_incident_history(employee_id: str, before: str = None, days: int = None):
+    """
+    Historial de incidentes de un empleado (más recientes primero), con los
+    valores de incidentInThePastYear y listDatesOfIncidents para pre-llenar
+    el formulario del supervisor. Es una sola consulta por índice.
+
+    Parámetros:
+    - before: solo reportes anteriores a este día (YYYY-MM-DD, default: mañana,
+      o sea incluye hoy)
+    - days: ventana hacia atrás en días (default: todo el historial)
+
+    Ejemplos:
+    - GET /api/incidents/employees/685594bedb4f505f5f680e2d9/history
+    - GET /api/incidents/employees/685594bedb4f505f5f680e2d9/history?before=2025-06-15&days=365
+    """
+    try:
+        if not ObjectId.is_valid(employee_id):
+            return error_response("ID de empleado inválido", status_code=status.HTTP_400_BAD_REQUEST)
+        if days is not None and days < 1:
+            return error_response("El parámetro 'days' debe ser >= 1", status_code=status.HTTP_400_BAD_REQUEST)
+
+        if before:
+            try:
+                before_date = datetime.strptime(before, "%Y-%m-%d").replace(tzinfo=DENVER_TZ)
+            except ValueError:
+                return error_response("Formato de before inválido. Usa YYYY-MM-DD", status_code=status.HTTP_400_BAD_REQUEST)
+        else:
+            today = datetime.now(DENVER_TZ)
+            before_date = datetime(today.year, today.month, today.day, tzinfo=DENVER_TZ) + timedelta(days=1)
+
+        docs = await get_prior_incidents(ObjectId(employee_id), before_date, days)
+
+        # La ventana del formulario es el último año, aunque se pida todo el historial
+        # (Motor devuelve las fechas en UTC sin tzinfo)
+        cutoff = before_date - timedelta(days=PRIOR_INCIDENT_DAYS)
+        past_year = [doc for doc in docs if doc["date"].replace(tzinfo=timezone.utc) >= cutoff]
+
+        return success_response({
+            "employee_id": employee_id,
+            **prior_incident_fields(past_year),
+            "data": [generalinformation_helper(doc) for doc in docs],
+            "total_count": len(docs)
+        })
+    except Exception as e:
+        return error_response(f"Error al obtener historial de incidentes: {str(e)}")
+
+
+@router.get("/signatures/{file_id}")
+async def get_signature(file_id: str, request: Request):
+    """
+    Imagen de una firma guardada en GridFS (el signatureUrl de employeeSignature).
+
+    El archivo nunca cambia (se identifica por su contenido), así que se
+    responde con ETag = sha256 y caché larga; si el navegador manda el mismo
+    ETag se responde 304 sin leer el archivo.
+    """
+    try:
+        if not ObjectId.is_valid(file_id):
+            return error_response("ID de firma inválido", status_code=status.HTTP_400_BAD_REQUEST)
+        try:
+            grid_out = await open_signature(ObjectId(file_id))
+        except NoFile:
+            return error_response("Firma no encontrada", status_code=status.HTTP_404_NOT_FOUND)
+
+        metadata = grid_out.metadata or {}
+        etag = f'"{metadata.get("sha256") or file_id}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "private, max-age=31536000, immutable",
+            "X-Content-Type-Options": "nosniff"
+        }
+        if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        # Archivos guardados antes de validar el tipo: si no es una imagen
+        # permitida se descarga como binario en lugar de mostrarse
+        content_type = metadata.get("contentType", DEFAULT_CONTENT_TYPE)
+        if content_type not in SIGNATURE_CONTENT_TYPES:
+            content_type = "application/octet-stream"
+            headers["Content-Disposition"] = "attachment"
+
+        headers["Content-Length"] = str(grid_out.length)
+        return StreamingResponse(
+            iter_signature(grid_out),
+            media_type=content_type,
+            headers=headers
+        )
+    except Exception as e:
+        return error_response(f"Error al obtener firma: {str(e)}")
+
+
+@router.get("/{id}")
+async def get_incident(id: str, expand: bool = False):
+    """
+    Obtiene un reporte de incidente (general information) por ID.
+
+    Parámetros:
+    - expand: Si es True, incluye incident detail, during the incident,
+      supervisor notes y firma (consultados en paralelo), con los nombres de
+      dirección, clima y condición del camino tomados de los catálogos en caché.
+
+    Ejemplos:
+    - GET /api/incidents/685594bedb4f505f5f680e2d9
+    - GET /api/incidents/685594bedb4f505f5f680e2d9?expand=true
+    """
+    try:
+        if not ObjectId.is_valid(id):
+            return error_response("ID de reporte inválido", status_code=status.HTTP_400_BAD_REQUEST)
+
+        doc = await generalinformations_collection.find_one({"_id": ObjectId(id), "active": True})
+        if not doc:
+            return error_response("Reporte no encontrado o está eliminado", status_code=status.HTTP_404_NOT_FOUND)
+
+        if not expand:
+            return success_response(generalinformation_helper(doc))
+
+        children = await get_incident_children(doc["_id"])
+        data = incident_bundle_helper({"generalInformation": doc, **children})
+        if children.get("duringTheIncident"):
+            data["duringTheIncident"].update(await resolve_during_the_incident_names(children["duringTheIncident"]))
+
+        return success_response(data)
+    except Exception as e:
+        return error_response(f"Error al obtener reporte de incidente: {str(e)}")
+
+
+@router.put("/{id}")
+async def update_incident(id: str, incident: IncidentBundleModel):
+    """
+    Actualiza un reporte de incidente en una sola transacción. general
+    information se reemplaza completo; de los hijos solo se tocan los que
+    vienen en el body (si no existían se crean).
+    """
+    try:
+        if not ObjectId.is_valid(id):
+            return error_response("ID de reporte inválido", status_code=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            before, updated = await update_incident_bundle(ObjectId(id), incident)
+        except ValueError as ve:
+            return error_response(str(ve), status_code=status.HTTP_400_BAD_REQUEST)
+        if not before:
+            return error_response("Reporte no encontrado o está eliminado", status_code=status.HTTP_404_NOT_FOUND)
+
+        return success_response(incident_bundle_helper(updated), msg="Reporte de incidente actualizado")
+    except Exception as e:
+        return error_response(f"Error al actualizar reporte de incidente: {str(e)}")
+
+
+@router.delete("/{id}")
+async def delete_incident(id: str):
+    """Soft delete del reporte y de todos sus hijos."""
+    try:
+        if not ObjectId.is_valid(id):
+            return error_response("ID de reporte inválido", status_code=status.HTTP_400_BAD_REQUEST)
+
+        before = await soft_delete_incident(ObjectId(id))
+        if not before:
+            return error_response("Reporte no encontrado o ya está eliminado", status_code=status.HTTP_404_NOT_FOUND)
+
+        return success_response(None, msg="Reporte de incidente eliminado")
+    except Exception as e:
+        return error_response(f"Error al eliminar reporte de incidente: {str(e)}")
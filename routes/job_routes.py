@@ -0,0 +1,22 @@
+from fastapi import APIRouter, status
+from bson import ObjectId
+from config.database import jobs_collection
+from schemas.job_scheme import job_helper
+from utils.response_helper import success_response, error_response
+
+router = APIRouter()
+
+
+@router.get("/{id}")
+async def get_job(id: str):
+    """Estado de un job de la cola (queued, running, done, dead)."""
+    try:
+        if not ObjectId.is_valid(id):
+            return error_response("ID de job inválido", status_code=status.HTTP_400_BAD_REQUEST)
+
+        job = await jobs_collection.find_one({"_id": ObjectId(id)}, {"payload": 0})
+        if not job:
+            return error_response("Job no encontrado", status_code=status.HTTP_404_NOT_FOUND)
+        return success_response(job_helper(job), msg="Job encontrado")
+    except Exception as e:
+        return error_response(f"Error al obtener job: {str(e)}")
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, status, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, status, UploadFile, File, Form, HTTPException, Depends
+from pymongo.errors import DuplicateKeyError
 from models.incidentdetail_model import LoadModel
 from config.database import (
     loads_collection,
+    coversheets_collection,
     routes_collection,
     landfills_collection,
     materials_collection
 )
 from schemas.load_scheme import load_helper
+from utils.rollups import apply_load_changes
+from utils.scale_import import import_scale_tickets
+from utils.date_utils import parse_date_range, normalize_time_fields, LOAD_TIME_PAIRS
+from config.dependencies import get_current_user
 from utils.response_helper import success_response, error_response
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -19,6 +25,15 @@ import uuid
 router = APIRouter()
 
 
+def _remove_uploads(paths: list):
+    """Borra imágenes ya escritas en uploads/ cuando el load no llegó a guardarse."""
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
 @router.post("/")
 async def create_load_with_images(
     firstStopTime: Optional[str] = Form(None),
@@ -41,8 +56,9 @@ async def create_load_with_images(
     Nueva estructura: Ya NO actualiza el array en coversheet,
     solo guarda la referencia coversheet_ref_id en el load
     """
+    image_paths = []  # ✅ Siempre inicializa como array vacío
+    saved = False
     try:
-        image_paths = []  # ✅ Siempre inicializa como array vacío
         upload_dir = "uploads"
         os.makedirs(upload_dir, exist_ok=True)
 
@@ -94,7 +110,14 @@ async def create_load_with_images(
         # 🆕 Convertir coversheet_ref_id a ObjectId
         if coversheet_ref_id:
             data["coversheet_ref_id"] = ObjectId(coversheet_ref_id)
+
+            # Desnormalizar la fecha del coversheet (día del load para reportes)
+            coversheet_doc = await coversheets_collection.find_one({"_id": data["coversheet_ref_id"]}, {"date": 1})
+            data["date"] = coversheet_doc.get("date") if coversheet_doc else None
         
+        # Horas de paradas y landfill como datetime de Denver del día del coversheet
+        normalize_time_fields(data, LOAD_TIME_PAIRS, data.get("date"))
+
         # 🆕 Establecer active en True
         data["active"] = True
         
@@ -139,14 +162,27 @@ async def create_load_with_images(
 
         # Insertar el nuevo load
         new = await loads_collection.insert_one(data)
+        saved = True
         created = await loads_collection.find_one({"_id": new.inserted_id})
         
         # ❌ Ya NO llamamos a add_entity_to_coversheet
         # El coversheet ya no mantiene arrays de IDs
 
+        # ✅ Sumar el load a los rollups diarios
+        await apply_load_changes([(None, created)])
+
         return success_response(load_helper(created), msg="Load created successfully")
+    except DuplicateKeyError:
+        return error_response(
+            f"Ticket number '{ticketNumber}' already belongs to another active load",
+            status_code=status.HTTP_409_CONFLICT
+        )
     except Exception as e:
         return error_response(f"Error creating load: {str(e)}")
+    finally:
+        # Ticket repetido (409), ID inválido o cualquier error: no dejar imágenes huérfanas
+        if not saved:
+            _remove_uploads(image_paths)
 
 
 @router.put("/{id}")
@@ -167,6 +203,8 @@ async def update_load_with_form(
     images: Optional[List[UploadFile]] = File(None)  # ✅ Cambiado para aceptar None
 ):
     """Update an existing active load with optional new images"""
+    new_paths = []  # Solo las imágenes escritas en este request
+    saved = False
     try:
         # 🆕 Solo actualizar si el load está activo
         existing = await loads_collection.find_one({
@@ -207,6 +245,7 @@ async def update_load_with_form(
                     file_path = os.path.join(upload_dir, filename)
                     with open(file_path, "wb") as buffer:
                         buffer.write(contents)
+                    new_paths.append(file_path)
                     image_paths.append(file_path)
 
         # Preparar datos para actualización
@@ -224,6 +263,8 @@ async def update_load_with_form(
             "updatedAt": datetime.now(ZoneInfo("America/Denver"))
         }
         
+        normalize_time_fields(data, LOAD_TIME_PAIRS, existing.get("date"))
+
         # 🆕 NO permitir cambiar coversheet_ref_id o active
         # Estos campos no deben ser modificados por este endpoint
         
@@ -277,11 +318,63 @@ async def update_load_with_form(
                 "Load not found or inactive",
                 status_code=status.HTTP_404_NOT_FOUND
             )
+        saved = True
         
         updated = await loads_collection.find_one({"_id": ObjectId(id)})
+
+        # ✅ Restar los valores anteriores y sumar los nuevos en los rollups
+        await apply_load_changes([(existing, updated)])
+
         return success_response(load_helper(updated), msg="Load actualizada")
+    except DuplicateKeyError:
+        return error_response(
+            f"Ticket number '{ticketNumber}' already belongs to another active load",
+            status_code=status.HTTP_409_CONFLICT
+        )
     except Exception as e:
         return error_response(f"Error updating load: {str(e)}")
+    finally:
+        if not saved:
+            _remove_uploads(new_paths)
+
+
+@router.post("/scale-import")
+async def import_scale_house_csv(
+    file: UploadFile = File(...),
+    on_mismatch: str = Form("flag"),
+    start_date: Optional[str] = Form(None),
+    end_date: Optional[str] = Form(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Concilia el CSV diario de la báscula del landfill con los loads por ticketNumber.
+
+    Columnas (el encabezado no distingue mayúsculas, espacios ni símbolos):
+    - Ticket / Ticket Number (requerida)
+    - Gross / Gross Weight, Tare / Tare Weight, Tons / Net Tons (al menos una)
+
+    Parámetros:
+    - on_mismatch: "flag" (default) solo marca los loads con pesos distintos en
+      scaleCheck; "overwrite" los reemplaza por los de la báscula.
+      Los pesos vacíos en el load siempre se llenan.
+    - start_date / end_date: si se envían, también se listan los loads de ese
+      rango cuyo ticket no venía en el CSV.
+    """
+    try:
+        if on_mismatch not in ("flag", "overwrite"):
+            return error_response("on_mismatch debe ser 'flag' u 'overwrite'", status_code=status.HTTP_400_BAD_REQUEST)
+        if not file.filename or not file.filename.lower().endswith(".csv"):
+            return error_response("El archivo debe ser un CSV", status_code=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            date_filter = parse_date_range(start_date, end_date)
+        except ValueError as ve:
+            return error_response(str(ve), status_code=status.HTTP_400_BAD_REQUEST)
+
+        result = await import_scale_tickets(file, on_mismatch, date_filter, source=file.filename)
+        return success_response(result, msg="Scale tickets reconciled")
+    except Exception as e:
+        return error_response(f"Error importing scale tickets: {str(e)}")
 
 
 @router.get("/")
@@ -323,21 +416,11 @@ async def delete_load(id: str):
     ❌ Ya NO es un hard delete
     """
     try:
-        # Verificar que el load existe y está activo
-        load = await loads_collection.find_one({
-            "_id": ObjectId(id),
-            "active": True
-        })
-        
-        if not load:
-            return error_response(
-                "Load no encontrada o ya fue eliminada", 
-                status_code=status.HTTP_404_NOT_FOUND
-            )
-        
-        # 🆕 Soft delete: marcar como inactivo
-        await loads_collection.update_one(
-            {"_id": ObjectId(id)},
+        # 🆕 Soft delete atómico: solo el request que lo desactiva recibe el
+        # documento (estado anterior) y resta del rollup, así dos deletes
+        # simultáneos no restan dos veces
+        load = await loads_collection.find_one_and_update(
+            {"_id": ObjectId(id), "active": True},
             {
                 "$set": {
                     "active": False,
@@ -345,7 +428,16 @@ async def delete_load(id: str):
                 }
             }
         )
+
+        if not load:
+            return error_response(
+                "Load no encontrada o ya fue eliminada", 
+                status_code=status.HTTP_404_NOT_FOUND
+            )
         
+        # ✅ Restar el load de los rollups diarios
+        await apply_load_changes([(load, None)])
+
         return success_response(None, msg="Load eliminada (soft delete)")
     except Exception as e:
         return error_response(f"Error al eliminar load: {str(e)}")
@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends
+from config.database import database
+from config.dependencies import get_current_user
+from utils.db_monitoring import slow_queries, explainable_command, EXPLAINABLE_COMMANDS, MONGO_EXPLAIN_AFTER
+from utils.response_helper import success_response, error_response
+
+router = APIRouter()
+
+
+def _plan_summary(explain: dict) -> dict:
+    """Resume el plan ganador: etapas (COLLSCAN, IXSCAN, ...) e índices usados."""
+    stages, indexes = [], []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if "stage" in node:
+                stages.append(node["stage"])
+            if "indexName" in node:
+                indexes.append(node["indexName"])
+            for key, value in node.items():
+                if key != "rejectedPlans":
+                    walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(explain)
+    return {
+        "stages": stages,
+        "indexes": sorted(set(indexes)),
+        "collscan": "COLLSCAN" in stages
+    }
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(explain: bool = False, current_user: dict = Depends(get_current_user)):
+    """
+    Slow queries registradas por este proceso, agrupadas por forma del filtro
+    (los valores van redactados).
+
+    Parámetros:
+    - explain: si es True, corre explain (queryPlanner) sobre las consultas que
+      se repitieron al menos MONGO_EXPLAIN_AFTER veces
+    """
+    try:
+        result = []
+        for entry in slow_queries.entries():
+            command = entry.pop("last_command", None)
+            entry["avg_ms"] = round(entry["total_ms"] / entry["count"], 2)
+
+            if (
+                explain
+                and command
+                and entry["count"] >= MONGO_EXPLAIN_AFTER
+                and entry["command"] in EXPLAINABLE_COMMANDS
+            ):
+                try:
+                    plan = await database.command({
+                        "explain": explainable_command(command),
+                        "verbosity": "queryPlanner"
+                    })
+                    entry["plan"] = _plan_summary(plan)
+                except Exception as explain_error:
+                    entry["plan"] = {"error": str(explain_error)}
+
+            result.append(entry)
+
+        return success_response(result, msg="Slow queries obtenidas")
+    except Exception as e:
+        return error_response(f"Error al obtener slow queries: {str(e)}")
+
+
+@router.delete("/slow-queries")
+async def clear_slow_queries(current_user: dict = Depends(get_current_user)):
+    slow_queries.clear()
+    return success_response(None, msg="Registro de slow queries reiniciado")
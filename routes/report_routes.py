@@ -0,0 +1,436 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from bson import ObjectId
+from fastapi import APIRouter, status
+from config.database import reporting_database
+from utils.analytics_snapshot import fleet_snapshot, group_table
+from utils.date_utils import parse_date_range
+from utils.productivity_report import get_daily_rows, summarize
+from utils.response_helper import success_response, error_response
+
+router = APIRouter()
+
+# Dimensiones disponibles para agrupar los rollups de tonelaje
+TONNAGE_GROUPS = {
+    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$day", "timezone": "America/Denver"}},
+    "month": {"$dateToString": {"format": "%Y-%m", "date": "$day", "timezone": "America/Denver"}},
+    "year": {"$dateToString": {"format": "%Y", "date": "$day", "timezone": "America/Denver"}},
+    "route": "$route_id",
+    "landfill": "$landFill_id",
+    "material": "$material_id"
+}
+
+# Nombre desnormalizado que acompaña a cada dimensión de ID
+TONNAGE_GROUP_NAMES = {"route": "routeNumber", "landfill": "landfillName", "material": "materialName"}
+
+
+@router.get("/tonnage")
+async def get_tonnage_report(
+    start_date: str = None,
+    end_date: str = None,
+    group_by: str = "day"
+):
+    """
+    Tonelaje (tons, grossWeight, tareWeight y cantidad de loads) desde los
+    rollups diarios, sin leer los loads.
+
+    Parámetros:
+    - start_date / end_date: rango de fechas (YYYY-MM-DD, inclusivo)
+    - group_by: dimensiones separadas por coma: day, month, year, route, landfill, material
+
+    Ejemplos:
+    - GET /api/reports/tonnage?start_date=2025-01-01&end_date=2025-12-31&group_by=month
+    - GET /api/reports/tonnage?start_date=2025-10-01&group_by=day,route
+    """
+    try:
+        groups = [g.strip() for g in group_by.split(",") if g.strip()]
+        invalid = [g for g in groups if g not in TONNAGE_GROUPS]
+        if not groups or invalid:
+            return error_response(
+                f"group_by inválido. Opciones: {', '.join(TONNAGE_GROUPS)}",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            date_filter = parse_date_range(start_date, end_date)
+        except ValueError as ve:
+            return error_response(str(ve), status_code=status.HTTP_400_BAD_REQUEST)
+
+        match = {"day": date_filter} if date_filter else {}
+
+        group_stage = {
+            "_id": {g: TONNAGE_GROUPS[g] for g in groups},
+            "loads": {"$sum": "$loads"},
+            "tons": {"$sum": "$tons"},
+            "grossWeight": {"$sum": "$grossWeight"},
+            "tareWeight": {"$sum": "$tareWeight"}
+        }
+        for g in groups:
+            if g in TONNAGE_GROUP_NAMES:
+                name_field = TONNAGE_GROUP_NAMES[g]
+                group_stage[name_field] = {"$last": f"${name_field}"}
+
+        pipeline = [
+            {"$match": match},
+            {"$group": group_stage},
+            {"$match": {"loads": {"$gt": 0}}},
+            {"$sort": {f"_id.{g}": 1 for g in groups}}
+        ]
+
+        rows = []
+        async for row in reporting_database.daily_load_rollups.aggregate(pipeline):
+            item = {}
+            for g in groups:
+                value = row["_id"].get(g)
+                item[g] = str(value) if g in TONNAGE_GROUP_NAMES and value else value
+                if g in TONNAGE_GROUP_NAMES:
+                    item[TONNAGE_GROUP_NAMES[g]] = row.get(TONNAGE_GROUP_NAMES[g], "")
+            item.update({
+                "loads": row["loads"],
+                "tons": round(row["tons"], 3),
+                "grossWeight": round(row["grossWeight"], 3),
+                "tareWeight": round(row["tareWeight"], 3)
+            })
+            rows.append(item)
+
+        return success_response({
+            "data": rows,
+            "totals": {
+                "loads": sum(r["loads"] for r in rows),
+                "tons": round(sum(r["tons"] for r in rows), 3),
+                "grossWeight": round(sum(r["grossWeight"] for r in rows), 3),
+                "tareWeight": round(sum(r["tareWeight"] for r in rows), 3)
+            },
+            "filters": {"start_date": start_date, "end_date": end_date, "group_by": groups}
+        }, msg="Reporte de tonelaje obtenido")
+    except Exception as e:
+        return error_response(f"Error al obtener reporte de tonelaje: {str(e)}")
+
+
+# Dimensiones disponibles para agrupar los rollups de incidentes
+INCIDENT_GROUPS = {
+    "month": {"$dateToString": {"format": "%Y-%m", "date": "$month", "timezone": "America/Denver"}},
+    "year": {"$dateToString": {"format": "%Y", "date": "$month", "timezone": "America/Denver"}},
+    "type": "$typeOfIncident_id",
+    "dept": "$dept_id"
+}
+
+INCIDENT_GROUP_NAMES = {"type": "typeOfIncidentName", "dept": "deptName"}
+
+
+@router.get("/incidents")
+async def get_incident_report(
+    start_date: str = None,
+    end_date: str = None,
+    group_by: str = "month",
+    typeOfIncident_id: str = None,
+    dept_id: str = None
+):
+    """
+    Incidentes, heridos (wasAnyOneHurt) y vehículos remolcados
+    (wereAnyVehiclesTowed) desde los rollups mensuales, sin leer los reportes.
+
+    Parámetros:
+    - start_date / end_date: rango de fechas (YYYY-MM-DD, inclusivo). Se
+      cuentan los meses completos que tocan el rango.
+    - group_by: dimensiones separadas por coma: month, year, type, dept
+    - typeOfIncident_id / dept_id: filtros opcionales
+
+    Ejemplos:
+    - GET /api/reports/incidents?start_date=2021-01-01&group_by=year,type
+    - GET /api/reports/incidents?group_by=month&dept_id=ABC123
+    """
+    try:
+        groups = [g.strip() for g in group_by.split(",") if g.strip()]
+        invalid = [g for g in groups if g not in INCIDENT_GROUPS]
+        if not groups or invalid:
+            return error_response(
+                f"group_by inválido. Opciones: {', '.join(INCIDENT_GROUPS)}",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            date_filter = parse_date_range(start_date, end_date)
+        except ValueError as ve:
+            return error_response(str(ve), status_code=status.HTTP_400_BAD_REQUEST)
+
+        match = {}
+        if date_filter:
+            # Los rollups guardan el inicio del mes: el rango se lleva a meses
+            if "$gte" in date_filter:
+                date_filter["$gte"] = date_filter["$gte"].replace(day=1)
+            match["month"] = date_filter
+
+        for field, value in (("typeOfIncident_id", typeOfIncident_id), ("dept_id", dept_id)):
+            if value:
+                if not ObjectId.is_valid(value):
+                    return error_response(f"{field} inválido", status_code=status.HTTP_400_BAD_REQUEST)
+                match[field] = ObjectId(value)
+
+        group_stage = {
+            "_id": {g: INCIDENT_GROUPS[g] for g in groups},
+            "incidents": {"$sum": "$incidents"},
+            "injuries": {"$sum": "$injuries"},
+            "towed": {"$sum": "$towed"}
+        }
+        for g in groups:
+            if g in INCIDENT_GROUP_NAMES:
+                name_field = INCIDENT_GROUP_NAMES[g]
+                group_stage[name_field] = {"$last": f"${name_field}"}
+
+        pipeline = [
+            {"$match": match},
+            {"$group": group_stage},
+            {"$match": {"incidents": {"$gt": 0}}},
+            {"$sort": {f"_id.{g}": 1 for g in groups}}
+        ]
+
+        rows = []
+        async for row in reporting_database.incident_monthly_rollups.aggregate(pipeline):
+            item = {}
+            for g in groups:
+                value = row["_id"].get(g)
+                item[g] = str(value) if g in INCIDENT_GROUP_NAMES and value else value
+                if g in INCIDENT_GROUP_NAMES:
+                    item[INCIDENT_GROUP_NAMES[g]] = row.get(INCIDENT_GROUP_NAMES[g], "")
+            item.update({"incidents": row["incidents"], "injuries": row["injuries"], "towed": row["towed"]})
+            rows.append(item)
+
+        return success_response({
+            "data": rows,
+            "totals": {
+                "incidents": sum(r["incidents"] for r in rows),
+                "injuries": sum(r["injuries"] for r in rows),
+                "towed": sum(r["towed"] for r in rows)
+            },
+            "filters": {
+                "start_date": start_date,
+                "end_date": end_date,
+                "group_by": groups,
+                "typeOfIncident_id": typeOfIncident_id,
+                "dept_id": dept_id
+            }
+        }, msg="Reporte de incidentes obtenido")
+    except Exception as e:
+        return error_response(f"Error al obtener reporte de incidentes: {str(e)}")
+
+
+@router.get("/productivity")
+async def get_productivity_report(start_date: str = None, end_date: str = None):
+    """
+    Productividad por driver y por ruta: minutos de ruta (firstStopTime →
+    lastStopTime), turnaround en landfill (landFillTimeIn → landFillTimeOut)
+    y loads por día.
+
+    Parámetros:
+    - start_date / end_date: rango (YYYY-MM-DD, inclusivo, máximo 366 días).
+      Por defecto los últimos 30 días.
+
+    Los días cerrados se sirven desde caché, así que rangos largos responden rápido.
+    """
+    try:
+        today = datetime.now(ZoneInfo("America/Denver")).date()
+        try:
+            end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else today
+            start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else end - timedelta(days=29)
+        except ValueError:
+            return error_response("Formato de fecha inválido. Usa YYYY-MM-DD", status_code=status.HTTP_400_BAD_REQUEST)
+
+        if start > end:
+            return error_response("start_date debe ser menor o igual a end_date", status_code=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days > 365:
+            return error_response("El rango máximo es de 366 días", status_code=status.HTTP_400_BAD_REQUEST)
+
+        rows_by_day = await get_daily_rows(start, end)
+
+        return success_response({
+            "drivers": summarize(rows_by_day, "driver_id", "driverName"),
+            "routes": summarize(rows_by_day, "route_id", "routeNumber"),
+            "filters": {"start_date": start.isoformat(), "end_date": end.isoformat()}
+        }, msg="Reporte de productividad obtenido")
+    except Exception as e:
+        return error_response(f"Error al obtener reporte de productividad: {str(e)}")
+
+
+@router.get("/downtime")
+async def get_downtime_report(
+    start_date: str = None,
+    end_date: str = None,
+    truck_id: str = None,
+    limit: int = 20
+):
+    """
+    Minutos de downtime por camión, por motivo y por semana (ISO), usando la
+    duración calculada al guardar cada downtime.
+
+    Parámetros:
+    - start_date / end_date: rango (YYYY-MM-DD, inclusivo)
+    - truck_id: filtrar por camión
+    - limit: máximo de camiones y motivos en el ranking (default: 20)
+
+    Ejemplo: GET /api/reports/downtime?start_date=2025-10-01&end_date=2025-12-31
+    """
+    try:
+        if limit < 1 or limit > 500:
+            return error_response("El parámetro 'limit' debe estar entre 1 y 500", status_code=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            date_filter = parse_date_range(start_date, end_date)
+        except ValueError as ve:
+            return error_response(str(ve), status_code=status.HTTP_400_BAD_REQUEST)
+
+        match = {"active": True}
+        if date_filter:
+            match["date"] = date_filter
+        if truck_id:
+            if not ObjectId.is_valid(truck_id):
+                return error_response("truck_id inválido", status_code=status.HTTP_400_BAD_REQUEST)
+            match["truck_id"] = ObjectId(truck_id)
+
+        totals = {
+            "minutes": {"$sum": {"$ifNull": ["$durationMinutes", 0]}},
+            "count": {"$sum": 1}
+        }
+        pipeline = [
+            {"$match": match},
+            {"$facet": {
+                "byTruck": [
+                    {"$group": {"_id": "$truck_id", "truckNumber": {"$last": "$truckNumber"}, **totals}},
+                    {"$sort": {"minutes": -1}},
+                    {"$limit": limit}
+                ],
+                "byReason": [
+                    {"$group": {"_id": "$downtimeReason", **totals}},
+                    {"$sort": {"minutes": -1}},
+                    {"$limit": limit}
+                ],
+                "byWeek": [
+                    {"$group": {
+                        "_id": {"$dateToString": {"format": "%G-W%V", "date": "$date", "timezone": "America/Denver"}},
+                        **totals
+                    }},
+                    {"$sort": {"_id": 1}}
+                ]
+            }}
+        ]
+
+        result = await reporting_database.downtimes.aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {"byTruck": [], "byReason": [], "byWeek": []}
+
+        def row(item, key):
+            return {
+                key: str(item["_id"]) if isinstance(item["_id"], ObjectId) else item["_id"],
+                **({"truckNumber": item.get("truckNumber")} if key == "truck_id" else {}),
+                "minutes": round(item["minutes"], 1),
+                "count": item["count"]
+            }
+
+        return success_response({
+            "byTruck": [row(i, "truck_id") for i in facets["byTruck"]],
+            "byReason": [row(i, "downtimeReason") for i in facets["byReason"]],
+            "byWeek": [row(i, "week") for i in facets["byWeek"]],
+            "filters": {"start_date": start_date, "end_date": end_date, "truck_id": truck_id}
+        }, msg="Reporte de downtime obtenido")
+    except Exception as e:
+        return error_response(f"Error al obtener reporte de downtime: {str(e)}")
+
+
+@router.get("/spare-trucks")
+async def get_spare_truck_report():
+    """
+    Millas, combustible, millas por unidad de combustible y horas fuera del
+    yard por spareTruckNumber, leídos de los rollups (se mantienen al guardar
+    cada spare truck info).
+    """
+    try:
+        rows = []
+        cursor = reporting_database.spare_truck_rollups.find({"usages": {"$gt": 0}}).sort("spareTruckNumber", 1)
+        async for doc in cursor:
+            fuel_with_miles = doc.get("fuelWithMiles", 0)
+            rows.append({
+                "spareTruckNumber": doc["spareTruckNumber"],
+                "usages": doc.get("usages", 0),
+                "miles": round(doc.get("miles", 0), 2),
+                "fuel": round(doc.get("fuel", 0), 2),
+                "milesPerFuel": round(doc.get("milesWithFuel", 0) / fuel_with_miles, 2) if fuel_with_miles else None,
+                "hoursOut": round(doc.get("hoursOut", 0), 2),
+                "updatedAt": doc["updatedAt"].isoformat() if doc.get("updatedAt") else None
+            })
+
+        return success_response(rows, msg="Reporte de spare trucks obtenido")
+    except Exception as e:
+        return error_response(f"Error al obtener reporte de spare trucks: {str(e)}")
+
+
+# Datasets del snapshot columnar: dimensiones de agrupación y métricas (sumas, promedios)
+DASHBOARD_DATASETS = {
+    "loads": {
+        "groups": ("day", "week", "month", "monthOfYear", "year", "route", "landfill", "material"),
+        "sum": ("tons", "grossWeight", "tareWeight"),
+        "mean": ("routeMinutes", "landfillMinutes")
+    },
+    "downtimes": {
+        "groups": ("day", "week", "month", "monthOfYear", "year", "truck", "reason"),
+        "sum": ("minutes",),
+        "mean": ("minutes",)
+    }
+}
+
+
+@router.get("/dashboard/{dataset}")
+async def get_dashboard(
+    dataset: str,
+    start_date: str = None,
+    end_date: str = None,
+    group_by: str = "month",
+    refresh: bool = False
+):
+    """
+    Agregados para dashboards desde el snapshot columnar en memoria (NumPy).
+    El snapshot se refresca de forma incremental (createdAt/updatedAt) como
+    máximo cada ANALYTICS_REFRESH_SECONDS; refresh=true lo fuerza.
+
+    Parámetros:
+    - dataset: loads o downtimes
+    - start_date / end_date: rango de fechas (YYYY-MM-DD, inclusivo)
+    - group_by: dimensiones separadas por coma
+      - loads: day, week, month, monthOfYear, year, route, landfill, material
+      - downtimes: day, week, month, monthOfYear, year, truck, reason
+
+    Ejemplos:
+    - GET /api/reports/dashboard/loads?group_by=year,monthOfYear&start_date=2024-01-01
+    - GET /api/reports/dashboard/downtimes?group_by=truck,reason
+    """
+    try:
+        config = DASHBOARD_DATASETS.get(dataset)
+        if not config:
+            return error_response(
+                f"dataset inválido. Opciones: {', '.join(DASHBOARD_DATASETS)}",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        groups = [g.strip() for g in group_by.split(",") if g.strip()]
+        invalid = [g for g in groups if g not in config["groups"]]
+        if not groups or invalid:
+            return error_response(
+                f"group_by inválido. Opciones: {', '.join(config['groups'])}",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+            end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+        except ValueError:
+            return error_response("Formato de fecha inválido. Usa YYYY-MM-DD", status_code=status.HTTP_400_BAD_REQUEST)
+
+        await fleet_snapshot.refresh(force=refresh)
+        table = fleet_snapshot.loads if dataset == "loads" else fleet_snapshot.downtimes
+        rows = group_table(fleet_snapshot, table, groups, config["sum"], config["mean"], start, end)
+
+        return success_response({
+            "data": rows,
+            "snapshot": fleet_snapshot.status(),
+            "filters": {"start_date": start_date, "end_date": end_date, "group_by": groups}
+        }, msg="Dashboard obtenido")
+    except Exception as e:
+        return error_response(f"Error al obtener dashboard: {str(e)}")
@@ -0,0 +1,23 @@
+from models.dept_model import DeptModel
+from models.direction_model import DirectionModel
+from models.weathercondition_model import WeatherConditionModel
+from models.roadconditions_model import RoadConditionsModel
+from models.typeincident_model import TypeIncidentModel
+from models.supervisor_model import SupervisorModel
+from schemas.safety_catalog_scheme import (
+    dept_helper,
+    direction_helper,
+    weathercondition_helper,
+    roadconditions_helper,
+    typeincident_helper,
+    supervisor_helper
+)
+from routes.catalog_routes import build_catalog_router
+
+# Catálogos de los reportes de incidentes (CRUD generado, cacheado con ETag)
+dept_router = build_catalog_router("depts", DeptModel, dept_helper, label="Departamento", plural="departamentos")
+direction_router = build_catalog_router("directions", DirectionModel, direction_helper, label="Dirección", plural="direcciones", feminine=True)
+weather_router = build_catalog_router("weatherConditions", WeatherConditionModel, weathercondition_helper, label="Condición del clima", plural="condiciones del clima", feminine=True)
+road_router = build_catalog_router("roadConditions", RoadConditionsModel, roadconditions_helper, label="Condición del camino", plural="condiciones del camino", feminine=True)
+type_incident_router = build_catalog_router("typeOfIncidents", TypeIncidentModel, typeincident_helper, label="Tipo de incidente", plural="tipos de incidente")
+supervisor_router = build_catalog_router("supervisors", SupervisorModel, supervisor_helper, label="Supervisor", plural="supervisores")
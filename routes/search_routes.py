@@ -0,0 +1,148 @@
+import asyncio
+from fastapi import APIRouter, status
+from config.database import loads_collection, downtimes_collection, incidentDetails_collection
+from schemas.load_scheme import load_helper
+from schemas.downtime_scheme import downtime_helper
+from schemas.incidentdetail_scheme import incidentdetail_helper
+from utils.date_utils import parse_date_range
+from utils.response_helper import success_response, error_response
+
+router = APIRouter()
+
+
+def _parent_date_lookup() -> list:
+    """Fecha del reporte: vive en generalinformations, no en incidentDetails."""
+    return [
+        {"$lookup": {
+            "from": "generalinformations",
+            "localField": "generalInformation_ref_id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"date": 1}}],
+            "as": "generalInformation"
+        }},
+        {"$set": {"date": {"$first": "$generalInformation.date"}}},
+        {"$unset": "generalInformation"}
+    ]
+
+
+def _incident_result(doc: dict) -> dict:
+    return {
+        **incidentdetail_helper(doc),
+        "date": doc["date"].isoformat() if doc.get("date") else None
+    }
+
+
+# Colecciones donde se puede buscar: colección, helper y si la fecha está en el documento
+SEARCH_SCOPES = {
+    "loads": (loads_collection, load_helper, True),
+    "downtimes": (downtimes_collection, downtime_helper, True),
+    "incidents": (incidentDetails_collection, _incident_result, False)
+}
+
+
+async def _search_scope(scope: str, q: str, date_filter: dict, skip: int, limit: int) -> dict:
+    """
+    Una sola agregación por colección: $text (usa el índice de texto),
+    filtro de fechas, orden por relevancia y $facet con página + total.
+    """
+    collection, helper, has_date = SEARCH_SCOPES[scope]
+
+    match = {"$text": {"$search": q}, "active": True}
+    if date_filter and has_date:
+        match["date"] = date_filter
+
+    pipeline = [{"$match": match}, {"$set": {"score": {"$meta": "textScore"}}}]
+    page = [{"$sort": {"score": -1, "_id": 1}}, {"$skip": skip}, {"$limit": limit}]
+    if not has_date:
+        if date_filter:
+            pipeline += _parent_date_lookup() + [{"$match": {"date": date_filter}}]
+        else:
+            # Sin filtro solo hace falta la fecha de los resultados de la página
+            page += _parent_date_lookup()
+
+    pipeline.append({"$facet": {"data": page, "total": [{"$count": "count"}]}})
+
+    result = await collection.aggregate(pipeline).to_list(length=1)
+    facet = result[0] if result else {"data": [], "total": []}
+    total = facet["total"][0]["count"] if facet["total"] else 0
+
+    return {
+        "data": [{**helper(doc), "score": round(doc["score"], 4)} for doc in facet["data"]],
+        "total_count": total
+    }
+
+
+@router.get("/")
+async def search(
+    q: str,
+    scope: str = "loads,downtimes,incidents",
+    start_date: str = None,
+    end_date: str = None,
+    page: int = 1,
+    limit: int = 20
+):
+    """
+    Búsqueda de texto con índices de texto, ordenada por relevancia.
+
+    Cubre:
+    - loads: ticketNumber (pesa más) y note
+    - downtimes: downtimeReason
+    - incidents: incidentDescription, describeAnyInjuries y whatDamageWasDone
+
+    Parámetros:
+    - q: texto a buscar. Frases exactas entre comillas ("A-1234"), -palabra excluye
+    - scope: colecciones separadas por coma (default: todas)
+    - start_date / end_date: rango de fechas (YYYY-MM-DD, inclusivo)
+    - page / limit: paginación por colección (limit máximo 100)
+
+    Ejemplos:
+    - GET /api/search/?q="T-10452"&scope=loads
+    - GET /api/search/?q=brake&start_date=2025-01-01&end_date=2025-06-30
+    """
+    try:
+        q = q.strip()
+        if not q:
+            return error_response("El parámetro 'q' es requerido", status_code=status.HTTP_400_BAD_REQUEST)
+        if page < 1:
+            return error_response("El parámetro 'page' debe ser >= 1", status_code=status.HTTP_400_BAD_REQUEST)
+        if limit < 1 or limit > 100:
+            return error_response("El parámetro 'limit' debe estar entre 1 y 100", status_code=status.HTTP_400_BAD_REQUEST)
+
+        scopes = [s.strip() for s in scope.split(",") if s.strip()]
+        invalid = [s for s in scopes if s not in SEARCH_SCOPES]
+        if not scopes or invalid:
+            return error_response(
+                f"scope inválido. Opciones: {', '.join(SEARCH_SCOPES)}",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            date_filter = parse_date_range(start_date, end_date)
+        except ValueError as ve:
+            return error_response(str(ve), status_code=status.HTTP_400_BAD_REQUEST)
+
+        # Las colecciones se consultan en paralelo
+        skip = (page - 1) * limit
+        results = await asyncio.gather(*[_search_scope(s, q, date_filter, skip, limit) for s in scopes])
+
+        data = {}
+        for s, result in zip(scopes, results):
+            total_pages = (result["total_count"] + limit - 1) // limit
+            data[s] = {
+                "data": result["data"],
+                "pagination": {
+                    "page": page,
+                    "limit": limit,
+                    "total_count": result["total_count"],
+                    "total_pages": total_pages,
+                    "has_next": page < total_pages,
+                    "has_prev": page > 1
+                }
+            }
+
+        return success_response({
+            "results": data,
+            "filters": {"q": q, "scope": scopes, "start_date": start_date, "end_date": end_date}
+        })
+    except Exception as e:
+        return error_response(f"Error al buscar: {str(e)}")
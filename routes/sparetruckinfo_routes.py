@@ -5,6 +5,8 @@ from config.database import sparetruckinfos_collection, routes_collection, truck
 from schemas.sparetruckinfo_scheme import sparetruckinfo_helper
 from utils.response_helper import success_response, error_response
 from config.dependencies import get_current_user
+from utils.rollups import spare_truck_derived_fields, apply_spare_truck_changes
+from utils.date_utils import normalize_time_fields, YARD_TIME_PAIRS
 from datetime import datetime
 from bson import ObjectId
 
@@ -98,10 +100,18 @@ async def create_sparetruckinfo(sparetruckinfo: SpareTruckInfoModel):
         
         # ✅ PASO 5: Desnormalización (fetch nombres relacionados)
         data = await fetch_and_embed_related_data(data)
+        data["date"] = coversheet.get("date")
+        normalize_time_fields(data, YARD_TIME_PAIRS, data["date"])
+
+        # Millas y horas fuera del yard calculadas al guardar
+        data.update(spare_truck_derived_fields(data))
         
         # ✅ PASO 6: Insertar en la base de datos
         new = await sparetruckinfos_collection.insert_one(data)
         created = await sparetruckinfos_collection.find_one({"_id": new.inserted_id})
+
+        # ✅ PASO 7: Sumar al rollup del spare truck
+        await apply_spare_truck_changes([(None, created)])
         
         return success_response(
             sparetruckinfo_helper(created),
@@ -243,6 +253,17 @@ async def update_sparetruckinfo(id: str, sparetruckinfo: SpareTruckInfoModel):
         
         # ✅ PASO 4: Desnormalización
         data = await fetch_and_embed_related_data(data)
+
+        existing = await sparetruckinfos_collection.find_one({"_id": ObjectId(id), "active": True})
+        if not existing:
+            return error_response(
+                "SpareTruckInfo no encontrado o no está activo",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+
+        # Horas como datetime de Denver; luego millas y horas con los valores resultantes
+        normalize_time_fields(data, YARD_TIME_PAIRS, existing.get("date"), existing)
+        data.update(spare_truck_derived_fields({**existing, **data}))
         
         # ✅ PASO 5: Actualizar solo si está activo
         res = await sparetruckinfos_collection.update_one(
@@ -257,6 +278,9 @@ async def update_sparetruckinfo(id: str, sparetruckinfo: SpareTruckInfoModel):
             )
         
         updated = await sparetruckinfos_collection.find_one({"_id": ObjectId(id)})
+
+        # ✅ PASO 6: Restar los valores anteriores y sumar los nuevos en el rollup
+        await apply_spare_truck_changes([(existing, updated)])
         return success_response(
             sparetruckinfo_helper(updated),
             msg="SpareTruckInfo actualizado exitosamente"
@@ -282,22 +306,11 @@ async def delete_sparetruckinfo(id: str):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
-        # Verificar que existe y está activo
-        existing = await sparetruckinfos_collection.find_one({
-            "_id": ObjectId(id),
-            "active": True
-        })
-        
-        if not existing:
-            return error_response(
-                "SpareTruckInfo no encontrado o ya fue eliminado",
-                status_code=status.HTTP_404_NOT_FOUND
-            )
-        
-        # ✅ Soft delete: marcar como inactivo
+        # ✅ Soft delete atómico: solo el request que lo desactiva recibe el
+        # documento (estado anterior) y resta del rollup
         tz = ZoneInfo("America/Denver")
-        await sparetruckinfos_collection.update_one(
-            {"_id": ObjectId(id)},
+        existing = await sparetruckinfos_collection.find_one_and_update(
+            {"_id": ObjectId(id), "active": True},
             {
                 "$set": {
                     "active": False,
@@ -306,6 +319,15 @@ async def delete_sparetruckinfo(id: str):
             }
         )
         
+        if not existing:
+            return error_response(
+                "SpareTruckInfo no encontrado o ya fue eliminado",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        
+        # Restar del rollup del spare truck
+        await apply_spare_truck_changes([(existing, None)])
+
         return success_response(
             {"id": id},
             msg="SpareTruckInfo eliminado (soft delete)"
@@ -342,8 +364,10 @@ async def permanent_delete_sparetruckinfo(id: str, current_user: str = Depends(g
         
         # ✅ Hard delete: eliminar físicamente
         result = await sparetruckinfos_collection.delete_one({"_id": ObjectId(id)})
-        
+
         if result.deleted_count == 1:
+            # Si seguía activo, restarlo del rollup
+            await apply_spare_truck_changes([(existing, None)])
             return success_response(
                 {"id": id},
                 msg="SpareTruckInfo eliminado permanentemente"
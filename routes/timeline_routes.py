@@ -0,0 +1,120 @@
+import asyncio
+from bson import ObjectId
+from fastapi import APIRouter, status
+from config.database import (
+    coversheets_collection,
+    loads_collection,
+    downtimes_collection,
+    generalinformations_collection
+)
+from schemas.coversheet_summary_scheme import coversheet_summary_helper
+from schemas.generalinformation_scheme import generalinformation_helper
+from schemas.load_scheme import load_helper
+from schemas.downtime_scheme import downtime_helper
+from utils.date_utils import denver_isoformat
+from utils.keyset import encode_cursor, decode_cursor
+from utils.timeline import merged_page
+from utils.response_helper import success_response, error_response
+
+router = APIRouter()
+
+
+def timeline_coversheet_helper(coversheet) -> dict:
+    return {
+        "id": str(coversheet["_id"]),
+        "date": coversheet["date"].isoformat() if coversheet.get("date") else None,
+        "truckNumber": coversheet.get("truckNumber", ""),
+        "routeNumber": coversheet.get("routeNumber", ""),
+        "driverName": coversheet.get("driverName", ""),
+        "leaveYard": denver_isoformat(coversheet.get("leaveYard")),
+        "backInYard": denver_isoformat(coversheet.get("backInYard")),
+        "summary": coversheet_summary_helper(coversheet)
+    }
+
+
+async def _coversheet_children(coversheet_ids: list) -> dict:
+    """Loads y downtimes de los coversheets de la página: una consulta $in por colección, en paralelo."""
+    children = {c_id: {"loads": [], "downtimes": []} for c_id in coversheet_ids}
+    if not coversheet_ids:
+        return children
+
+    query = {"coversheet_ref_id": {"$in": coversheet_ids}, "active": True}
+    sources = (("loads", loads_collection, load_helper), ("downtimes", downtimes_collection, downtime_helper))
+    results = await asyncio.gather(*[
+        collection.find(query).sort("_id", 1).to_list(length=None) for _, collection, _ in sources
+    ])
+    for (key, _, helper), docs in zip(sources, results):
+        for doc in docs:
+            children[doc["coversheet_ref_id"]][key].append(helper(doc))
+    return children
+
+
+@router.get("/")
+async def get_timeline(
+    driver_id: str = None,
+    employee_id: str = None,
+    limit: int = 50,
+    cursor: str = None
+):
+    """
+    Línea de tiempo de una persona (más reciente primero): sus coversheets
+    (driver_id, con sus loads y downtimes) y sus reportes de incidentes
+    (employee_id) mezclados por fecha, con paginación por cursor.
+
+    Cada página lee a lo sumo limit + 1 documentos de cada colección usando
+    los índices de fecha, así que no importa cuántos años de historial haya.
+
+    Parámetros:
+    - driver_id: conductor de los coversheets
+    - employee_id: empleado de los reportes de incidentes
+      (se necesita al menos uno de los dos)
+    - limit: elementos por página (default: 50, max: 200)
+    - cursor: el next_cursor de la página anterior
+
+    Ejemplos:
+    - GET /api/timeline/?driver_id=ABC123&employee_id=XYZ789
+    - GET /api/timeline/?driver_id=ABC123&cursor=eyJ...
+    """
+    try:
+        if limit < 1 or limit > 200:
+            return error_response("El parámetro 'limit' debe estar entre 1 y 200", status_code=status.HTTP_400_BAD_REQUEST)
+        if not driver_id and not employee_id:
+            return error_response("Se requiere driver_id o employee_id", status_code=status.HTTP_400_BAD_REQUEST)
+
+        streams = {}
+        for field, value, kind, collection in (
+            ("driver_id", driver_id, "coversheet", coversheets_collection),
+            ("employee_id", employee_id, "incident", generalinformations_collection)
+        ):
+            if value:
+                if not ObjectId.is_valid(value):
+                    return error_response(f"{field} inválido", status_code=status.HTTP_400_BAD_REQUEST)
+                streams[kind] = (collection, {"active": True, field: ObjectId(value)})
+
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError as ve:
+                return error_response(str(ve), status_code=status.HTTP_400_BAD_REQUEST)
+
+        items, has_next = await merged_page(streams, limit, after)
+
+        children = await _coversheet_children([doc["_id"] for kind, doc in items if kind == "coversheet"])
+
+        data = []
+        for kind, doc in items:
+            if kind == "coversheet":
+                data.append({"type": kind, **timeline_coversheet_helper(doc), **children[doc["_id"]]})
+            else:
+                data.append({"type": kind, **generalinformation_helper(doc)})
+
+        next_cursor = encode_cursor(items[-1][1]["date"], items[-1][1]["_id"]) if has_next else None
+
+        return success_response({
+            "data": data,
+            "pagination": {"limit": limit, "has_next": has_next, "next_cursor": next_cursor},
+            "filters": {"driver_id": driver_id, "employee_id": employee_id}
+        })
+    except Exception as e:
+        return error_response(f"Error al obtener línea de tiempo: {str(e)}")
@@ -0,0 +1,8 @@
+def coversheet_summary_helper(coversheet) -> dict:
+    summary = coversheet.get("summary") or {}
+    return {
+        "loadCount": summary.get("loadCount", 0),
+        "totalTons": round(summary.get("totalTons", 0), 3),
+        "downtimeMinutes": round(summary.get("downtimeMinutes", 0), 1),
+        "spareTruckCount": summary.get("spareTruckCount", 0)
+    }
@@ -1,11 +1,16 @@
+from utils.date_utils import denver_isoformat
+
+
 def downtime_helper(downtime) -> dict:
     return {
         "id": str(downtime["_id"]),
         "truck_id": str(downtime["truck_id"]) if downtime.get("truck_id") else None,
         "truckNumber": downtime.get("truckNumber"),
-        "startTime": downtime.get("startTime"),
-        "endTime": downtime.get("endTime"),
+        "startTime": denver_isoformat(downtime.get("startTime")),
+        "endTime": denver_isoformat(downtime.get("endTime")),
         "downtimeReason": downtime.get("downtimeReason"),
+        "durationMinutes": downtime.get("durationMinutes"),
+        "date": downtime["date"].isoformat() if downtime.get("date") else None,
         
         # 🆕 Nueva referencia al coversheet padre
         "coversheet_ref_id": str(downtime["coversheet_ref_id"]) if downtime.get("coversheet_ref_id") else None,
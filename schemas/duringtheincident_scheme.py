@@ -0,0 +1,25 @@
+def duringtheincident_helper(duringtheincident) -> dict:
+    return {
+        "id": str(duringtheincident["_id"]),
+        "usingElectronicDevice": duringtheincident.get("usingElectronicDevice"),
+        "taskPerfomed": duringtheincident.get("taskPerfomed"),
+        "whereWereYouComingFrom": duringtheincident.get("whereWereYouComingFrom"),
+        "whereWereYouGoingTo": duringtheincident.get("whereWereYouGoingTo"),
+        "howFastWereYouGoing": duringtheincident.get("howFastWereYouGoing"),
+        "directionYouWereTraveling_id": str(duringtheincident["directionYouWereTraveling_id"]) if duringtheincident.get("directionYouWereTraveling_id") else None,
+        "weatherConditions_id": str(duringtheincident["weatherConditions_id"]) if duringtheincident.get("weatherConditions_id") else None,
+        "roadConditions_id": str(duringtheincident["roadConditions_id"]) if duringtheincident.get("roadConditions_id") else None,
+        "wasThisIncidentInAnIntersection": duringtheincident.get("wasThisIncidentInAnIntersection"),
+        "witness": duringtheincident.get("witness"),
+        "witnessPhone": duringtheincident.get("witnessPhone"),
+
+        # Referencia al padre
+        "generalInformation_ref_id": str(duringtheincident["generalInformation_ref_id"]) if duringtheincident.get("generalInformation_ref_id") else None,
+
+        # SOFT DELETE FIELD
+        "active": duringtheincident.get("active", True),
+
+        # AUDIT FIELDS
+        "createdAt": duringtheincident["createdAt"].isoformat() if duringtheincident.get("createdAt") else None,
+        "updatedAt": duringtheincident["updatedAt"].isoformat() if duringtheincident.get("updatedAt") else None
+    }
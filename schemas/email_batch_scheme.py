@@ -0,0 +1,27 @@
+def email_batch_helper(batch) -> dict:
+    total = batch.get("total", 0)
+    processed = batch.get("sent", 0) + batch.get("failed", 0)
+    return {
+        "id": str(batch["_id"]),
+        "subject": batch.get("subject"),
+        "filters": batch.get("filters"),
+        "status": batch.get("status"),
+        "total": total,
+        "sent": batch.get("sent", 0),
+        "failed": batch.get("failed", 0),
+        "progress": round(processed / total * 100, 2) if total else 100.0,
+        "error": batch.get("error"),
+        "createdAt": batch["createdAt"].isoformat() if batch.get("createdAt") else None,
+        "startedAt": batch["startedAt"].isoformat() if batch.get("startedAt") else None,
+        "finishedAt": batch["finishedAt"].isoformat() if batch.get("finishedAt") else None
+    }
+
+
+def email_batch_recipient_helper(recipient) -> dict:
+    return {
+        "email": recipient.get("email"),
+        "name": recipient.get("name"),
+        "status": recipient.get("status"),
+        "error": recipient.get("error"),
+        "updatedAt": recipient["updatedAt"].isoformat() if recipient.get("updatedAt") else None
+    }
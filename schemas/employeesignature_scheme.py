@@ -0,0 +1,20 @@
+def employeesignature_helper(employeesignature) -> dict:
+    file_id = employeesignature.get("signatureFile_id")
+    return {
+        "id": str(employeesignature["_id"]),
+        # Solo los documentos que aún no se migran a GridFS traen la imagen en línea
+        "employeeSignature": employeesignature.get("employeeSignature"),
+        "signatureUrl": f"/api/incidents/signatures/{file_id}" if file_id else None,
+        "signatureSha256": employeesignature.get("signatureSha256"),
+        "date": employeesignature.get("date"),
+
+        # Referencia al padre
+        "generalInformation_ref_id": str(employeesignature["generalInformation_ref_id"]) if employeesignature.get("generalInformation_ref_id") else None,
+
+        # SOFT DELETE FIELD
+        "active": employeesignature.get("active", True),
+
+        # AUDIT FIELDS
+        "createdAt": employeesignature["createdAt"].isoformat() if employeesignature.get("createdAt") else None,
+        "updatedAt": employeesignature["updatedAt"].isoformat() if employeesignature.get("updatedAt") else None
+    }
@@ -15,6 +15,7 @@ def generalinformation_helper(generalinformation) -> dict:
         "supervisor_id": str(generalinformation["supervisor_id"]) if generalinformation.get("supervisor_id") else None,
         "typeOfIncident_id": str(generalinformation["typeOfIncident_id"]) if generalinformation.get("typeOfIncident_id") else None,
         "location": generalinformation["location"],
+        "geoLocation": generalinformation.get("geoLocation"),
         "time": generalinformation["time"],
         "timeWorkedYears": generalinformation["timeWorkedYears"],
         "timeWorkedMonths": generalinformation["timeWorkedMonths"],
@@ -26,6 +27,8 @@ def generalinformation_helper(generalinformation) -> dict:
         "deptName": generalinformation.get("deptName", ""),
         "supervisorName": generalinformation.get("supervisorName", ""),
         "typeOfIncidentName": generalinformation.get("typeOfIncidentName", ""), 
+        "wasAnyOneHurt": generalinformation.get("wasAnyOneHurt"),
+        "wereAnyVehiclesTowed": generalinformation.get("wereAnyVehiclesTowed"),
 
         # SOFT DELETE FIELD
         "active": generalinformation.get("active", True),  # ✅ Campo de borrado lógico
@@ -16,6 +16,9 @@ def incidentdetail_helper(incidentdetail) -> dict:
         "whatDamageWasDone": incidentdetail["whatDamageWasDone"],
         "incidentInThePastYear": incidentdetail["incidentInThePastYear"],
         "listDatesOfIncidents": incidentdetail["listDatesOfIncidents"],
+
+        # Referencia al padre
+        "generalInformation_ref_id": str(incidentdetail["generalInformation_ref_id"]) if incidentdetail.get("generalInformation_ref_id") else None,
         
         
 
@@ -0,0 +1,15 @@
+def job_helper(job) -> dict:
+    return {
+        "id": str(job["_id"]),
+        "name": job.get("name"),
+        "status": job.get("status"),
+        "attempts": job.get("attempts", 0),
+        "maxAttempts": job.get("maxAttempts"),
+        "lastError": job.get("lastError"),
+        "result": job.get("result"),
+
+        # AUDIT FIELDS
+        "createdAt": job["createdAt"].isoformat() if job.get("createdAt") else None,
+        "startedAt": job["startedAt"].isoformat() if job.get("startedAt") else None,
+        "finishedAt": job["finishedAt"].isoformat() if job.get("finishedAt") else None
+    }
@@ -1,12 +1,16 @@
+from utils.date_utils import denver_isoformat
+
+
 def load_helper(load) -> dict:
     return {
         "id": str(load["_id"]),
-        "firstStopTime": load.get("firstStopTime"),
+        "date": load["date"].isoformat() if load.get("date") else None,
+        "firstStopTime": denver_isoformat(load.get("firstStopTime")),
         "route_id": str(load["route_id"]) if load.get("route_id") else None,
         "routeNumber": load.get("routeNumber", ""),
-        "lastStopTime": load.get("lastStopTime"),
-        "landFillTimeIn": load.get("landFillTimeIn"),
-        "landFillTimeOut": load.get("landFillTimeOut"),
+        "lastStopTime": denver_isoformat(load.get("lastStopTime")),
+        "landFillTimeIn": denver_isoformat(load.get("landFillTimeIn")),
+        "landFillTimeOut": denver_isoformat(load.get("landFillTimeOut")),
         "grossWeight": load.get("grossWeight"),
         "tareWeight": load.get("tareWeight"),
         "tons": load.get("tons"),
@@ -17,6 +21,10 @@ def load_helper(load) -> dict:
         "ticketNumber": load.get("ticketNumber"),
         "note": load.get("note"),
         "images": load.get("images", []),
+        "scaleCheck": {
+            **load["scaleCheck"],
+            "checkedAt": load["scaleCheck"]["checkedAt"].isoformat() if load["scaleCheck"].get("checkedAt") else None
+        } if load.get("scaleCheck") else None,
         
         # 🆕 Nueva referencia al coversheet padre
         "coversheet_ref_id": str(load["coversheet_ref_id"]) if load.get("coversheet_ref_id") else None,
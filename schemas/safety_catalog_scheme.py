@@ -0,0 +1,46 @@
+def dept_helper(dept) -> dict:
+    return {
+        "id": str(dept["_id"]),
+        "deptName": dept.get("deptName"),
+        "createdAt": dept["createdAt"].isoformat() if "createdAt" in dept else None,
+    }
+
+
+def direction_helper(direction) -> dict:
+    return {
+        "id": str(direction["_id"]),
+        "directionName": direction.get("directionName"),
+        "createdAt": direction["createdAt"].isoformat() if "createdAt" in direction else None,
+    }
+
+
+def weathercondition_helper(weathercondition) -> dict:
+    return {
+        "id": str(weathercondition["_id"]),
+        "weatherName": weathercondition.get("weatherName"),
+        "createdAt": weathercondition["createdAt"].isoformat() if "createdAt" in weathercondition else None,
+    }
+
+
+def roadconditions_helper(roadconditions) -> dict:
+    return {
+        "id": str(roadconditions["_id"]),
+        "roadConditionsName": roadconditions.get("roadConditionsName"),
+        "createdAt": roadconditions["createdAt"].isoformat() if "createdAt" in roadconditions else None,
+    }
+
+
+def typeincident_helper(typeincident) -> dict:
+    return {
+        "id": str(typeincident["_id"]),
+        "typeIncidentName": typeincident.get("typeIncidentName"),
+        "createdAt": typeincident["createdAt"].isoformat() if "createdAt" in typeincident else None,
+    }
+
+
+def supervisor_helper(supervisor) -> dict:
+    return {
+        "id": str(supervisor["_id"]),
+        "supervisorName": supervisor.get("supervisorName"),
+        "createdAt": supervisor["createdAt"].isoformat() if "createdAt" in supervisor else None,
+    }
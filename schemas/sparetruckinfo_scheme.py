@@ -1,14 +1,20 @@
+from utils.date_utils import denver_isoformat
+
+
 def sparetruckinfo_helper(sparetruckinfo) -> dict:
     return {
         "id": str(sparetruckinfo["_id"]),
         "spareTruckNumber": sparetruckinfo.get("spareTruckNumber"),
         "route_id": str(sparetruckinfo["route_id"]) if sparetruckinfo.get("route_id") else None,
         "routeNumber": sparetruckinfo.get("routeNumber", ""),
-        "leaveYard": sparetruckinfo.get("leaveYard"),
-        "backInYard": sparetruckinfo.get("backInYard"),
+        "leaveYard": denver_isoformat(sparetruckinfo.get("leaveYard")),
+        "backInYard": denver_isoformat(sparetruckinfo.get("backInYard")),
         "startMiles": sparetruckinfo.get("startMiles"),
         "endMiles": sparetruckinfo.get("endMiles"),
         "fuel": sparetruckinfo.get("fuel"),
+        "miles": sparetruckinfo.get("miles"),
+        "hoursOut": sparetruckinfo.get("hoursOut"),
+        "date": sparetruckinfo["date"].isoformat() if sparetruckinfo.get("date") else None,
         
         # 🆕 Nueva referencia al coversheet padre
         "coversheet_ref_id": str(sparetruckinfo["coversheet_ref_id"]) if sparetruckinfo.get("coversheet_ref_id") else None,
@@ -0,0 +1,15 @@
+def supervisornotes_helper(supervisornotes) -> dict:
+    return {
+        "id": str(supervisornotes["_id"]),
+        "notes": supervisornotes.get("notes"),
+
+        # Referencia al padre
+        "generalInformation_ref_id": str(supervisornotes["generalInformation_ref_id"]) if supervisornotes.get("generalInformation_ref_id") else None,
+
+        # SOFT DELETE FIELD
+        "active": supervisornotes.get("active", True),
+
+        # AUDIT FIELDS
+        "createdAt": supervisornotes["createdAt"].isoformat() if supervisornotes.get("createdAt") else None,
+        "updatedAt": supervisornotes["updatedAt"].isoformat() if supervisornotes.get("updatedAt") else None
+    }
@@ -0,0 +1,41 @@
+import zipfile
+import io
+
+from utils.coversheet_pdf import render_coversheet_pdf, open_zip_stream, coversheet_pdf_filename
+
+MARKUP_TEXT = ["gross<tare", "<b>x & y", "a & b", "</para>", "<font name='x'>"]
+
+
+def _coversheet(text: str) -> dict:
+    return {
+        "id": "685594bedb4f505f5f680e2d9",
+        "date": "2025-06-15T00:00:00-06:00",
+        "truckNumber": "T-10",
+        "driverName": text,
+        "summary": {},
+        "loads": [{"ticketNumber": "A-1", "note": text, "tons": 1.5}],
+        "downtimes": [{"truckNumber": "T-10", "downtimeReason": text}],
+        "spareTruckInfos": []
+    }
+
+
+def test_render_escapes_free_text():
+    for text in MARKUP_TEXT:
+        pdf = render_coversheet_pdf(_coversheet(text))
+        assert pdf.startswith(b"%PDF")
+
+
+def test_zip_stream_with_markup_text():
+    writer, archive = open_zip_stream()
+    chunks = []
+    for text in MARKUP_TEXT:
+        coversheet = _coversheet(text)
+        coversheet["id"] += str(len(chunks))
+        archive.writestr(coversheet_pdf_filename(coversheet), render_coversheet_pdf(coversheet))
+        chunks.append(writer.drain())
+    archive.close()
+    chunks.append(writer.drain())
+
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as result:
+        assert result.testzip() is None
+        assert len(result.namelist()) == len(MARKUP_TEXT)
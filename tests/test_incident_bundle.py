@@ -0,0 +1,72 @@
+"""
+Integración contra MongoDB real: las transacciones necesitan un replica set.
+Se corre con TEST_MONGODB_URI (por ejemplo mongodb://localhost:27017/?replicaSet=rs0);
+sin esa variable se salta.
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime
+
+import pytest
+
+TEST_MONGODB_URI = os.getenv("TEST_MONGODB_URI")
+
+pytestmark = pytest.mark.skipif(not TEST_MONGODB_URI, reason="TEST_MONGODB_URI no definido (replica set requerido)")
+
+if TEST_MONGODB_URI:
+    os.environ["MONGODB_URI"] = TEST_MONGODB_URI
+    os.environ["DATABASE_NAME"] = f"test_incidents_{uuid.uuid4().hex[:8]}"
+
+
+def test_create_incident_bundle_with_refs():
+    from config.database import client, database
+    from models.incident_model import IncidentBundleModel
+    from utils.incidents import create_incident_bundle
+
+    async def run():
+        try:
+            # Las colecciones deben existir antes de insertar dentro de la transacción
+            for name in ("generalinformations", "incidentDetails", "supervisorNotes", "incident_monthly_rollups"):
+                await database.create_collection(name)
+
+            employee = await database.employees.insert_one({"employeeName": "Jane Doe"})
+            truck = await database.trucks.insert_one({"truckNumber": "T-10"})
+            dept = await database.depts.insert_one({"deptName": "Residential"})
+
+            general = {
+                "date": datetime(2025, 6, 15, 9, 30),
+                "employee_id": str(employee.inserted_id),
+                "truck_id": str(truck.inserted_id),
+                "dept_id": str(dept.inserted_id)
+            }
+            bundle = IncidentBundleModel(
+                generalInformation=general,
+                incidentDetail={"incidentDescription": "Backed into a pole", "wasAnyOneHurt": False},
+                supervisorNotes={}
+            )
+            first = await create_incident_bundle(bundle)
+            second = await create_incident_bundle(bundle)
+
+            created = first["generalInformation"]
+            assert created["employeeName"] == "Jane Doe"
+            assert created["truckNumber"] == "T-10"
+            assert created["deptName"] == "Residential"
+            assert first["incidentDetail"]["generalInformation_ref_id"] == created["_id"]
+            assert first["incidentDetail"]["incidentInThePastYear"] is False
+
+            # El segundo reporte del mismo día ve al primero
+            assert second["incidentDetail"]["incidentInThePastYear"] is True
+            assert second["incidentDetail"]["listDatesOfIncidents"] == "2025-06-15"
+
+            assert await database.generalinformations.count_documents({}) == 2
+            assert await database.incidentDetails.count_documents({"generalInformation_ref_id": created["_id"]}) == 1
+
+            # El rollup se aplicó dentro de la misma transacción
+            rollup = await database.incident_monthly_rollups.find_one({"dept_id": dept.inserted_id})
+            assert rollup["incidents"] == 2
+            assert created["typeOfIncidentName"] == ""
+        finally:
+            await client.drop_database(database.name)
+
+    asyncio.run(run())
@@ -0,0 +1,387 @@
+# utils/analytics_snapshot.py
+# Snapshot columnar (arrays de NumPy) de loads y downtimes para dashboards.
+# Se refresca de forma incremental por createdAt/updatedAt y responde group-bys
+# vectorizados sin pasar cada documento por load_helper.
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from config.database import database, reporting_database
+from utils.date_utils import denver_day_key, minutes_between
+
+# Cada cuánto se buscan cambios, y cada cuánto se recarga todo (para ver hard deletes)
+ANALYTICS_REFRESH_SECONDS = int(os.getenv("ANALYTICS_REFRESH_SECONDS", "60"))
+ANALYTICS_FULL_RELOAD_SECONDS = int(os.getenv("ANALYTICS_FULL_RELOAD_SECONDS", str(6 * 60 * 60)))
+# Margen que se resta a la marca de agua: los sellos de tiempo los pone la app,
+# así que una escritura puede confirmarse (o replicarse) después de otra con
+# un sello mayor. Lo releído se vuelve a aplicar sin problema (upsert idempotente).
+ANALYTICS_WATERMARK_LAG_SECONDS = int(os.getenv("ANALYTICS_WATERMARK_LAG_SECONDS", "300"))
+
+NAT = np.datetime64("NaT", "D")
+
+
+class CategoryCodes:
+    """Convierte claves (IDs) a enteros para agrupar con NumPy, y guarda su etiqueta."""
+
+    def __init__(self):
+        self.codes = {None: 0}
+        self.keys = [None]
+        self.labels = [""]
+
+    def code(self, key, label=None) -> int:
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.keys)
+            self.keys.append(key)
+            self.labels.append(label or "")
+        elif label:
+            self.labels[code] = label
+        return code
+
+
+class ColumnarTable:
+    """Tabla de columnas NumPy con upsert por ID y borrado lógico (máscara valid)."""
+
+    def __init__(self, columns: dict, capacity: int = 4096):
+        self.dtypes = columns
+        self.capacity = capacity
+        self.size = 0
+        self.index = {}
+        self.arrays = {name: np.empty(capacity, dtype=dtype) for name, dtype in columns.items()}
+        self.valid = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, array in self.arrays.items():
+            grown = np.empty(self.capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self.arrays[name] = grown
+        valid = np.zeros(self.capacity, dtype=bool)
+        valid[:self.size] = self.valid[:self.size]
+        self.valid = valid
+
+    def upsert(self, row_id, values: dict, active: bool = True):
+        row = self.index.get(row_id)
+        if row is None:
+            if not active:
+                return
+            if self.size == self.capacity:
+                self._grow()
+            row = self.index[row_id] = self.size
+            self.size += 1
+        for name, value in values.items():
+            self.arrays[name][row] = value
+        self.valid[row] = active
+
+    def column(self, name: str) -> np.ndarray:
+        return self.arrays[name][:self.size]
+
+    def mask(self) -> np.ndarray:
+        return self.valid[:self.size]
+
+    @property
+    def rows(self) -> int:
+        return int(self.mask().sum())
+
+
+def _day(value):
+    return np.datetime64(denver_day_key(value), "D") if isinstance(value, datetime) else NAT
+
+
+def _float(value) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+
+
+LOAD_COLUMNS = {
+    "day": "datetime64[D]",
+    "route": np.int32,
+    "landfill": np.int32,
+    "material": np.int32,
+    "tons": np.float64,
+    "grossWeight": np.float64,
+    "tareWeight": np.float64,
+    "routeMinutes": np.float64,
+    "landfillMinutes": np.float64,
+}
+
+DOWNTIME_COLUMNS = {
+    "day": "datetime64[D]",
+    "truck": np.int32,
+    "reason": np.int32,
+    "minutes": np.float64,
+}
+
+LOAD_PROJECTION = {
+    "date": 1, "active": 1, "route_id": 1, "routeNumber": 1, "landFill_id": 1, "landfillName": 1,
+    "material_id": 1, "materialName": 1, "tons": 1, "grossWeight": 1, "tareWeight": 1,
+    "firstStopTime": 1, "lastStopTime": 1, "landFillTimeIn": 1, "landFillTimeOut": 1,
+    "createdAt": 1, "updatedAt": 1
+}
+
+DOWNTIME_PROJECTION = {
+    "date": 1, "active": 1, "truck_id": 1, "truckNumber": 1, "downtimeReason": 1,
+    "durationMinutes": 1, "createdAt": 1, "updatedAt": 1
+}
+
+
+SNAPSHOT_PROJECTIONS = {"loads": LOAD_PROJECTION, "downtimes": DOWNTIME_PROJECTION}
+PULL_BATCH_SIZE = 5000
+
+
+class SnapshotState:
+    """Categorías, tablas y marcas de agua de una carga del snapshot."""
+
+    def __init__(self):
+        self.categories = {name: CategoryCodes() for name in ("route", "landfill", "material", "truck", "reason")}
+        self.loads = ColumnarTable(LOAD_COLUMNS)
+        self.downtimes = ColumnarTable(DOWNTIME_COLUMNS)
+        self.watermarks = {"loads": None, "downtimes": None}
+
+    def _load_values(self, doc: dict) -> dict:
+        cat = self.categories
+        return {
+            "day": _day(doc.get("date")),
+            "route": cat["route"].code(doc.get("route_id"), doc.get("routeNumber")),
+            "landfill": cat["landfill"].code(doc.get("landFill_id"), doc.get("landfillName")),
+            "material": cat["material"].code(doc.get("material_id"), doc.get("materialName")),
+            "tons": _float(doc.get("tons")),
+            "grossWeight": _float(doc.get("grossWeight")),
+            "tareWeight": _float(doc.get("tareWeight")),
+            "routeMinutes": _float(minutes_between(doc.get("firstStopTime"), doc.get("lastStopTime"), doc.get("date"))),
+            "landfillMinutes": _float(minutes_between(doc.get("landFillTimeIn"), doc.get("landFillTimeOut"), doc.get("date"))),
+        }
+
+    def _downtime_values(self, doc: dict) -> dict:
+        cat = self.categories
+        reason = doc.get("downtimeReason")
+        return {
+            "day": _day(doc.get("date")),
+            "truck": cat["truck"].code(doc.get("truck_id"), doc.get("truckNumber")),
+            "reason": cat["reason"].code(reason, reason),
+            "minutes": _float(doc.get("durationMinutes")),
+        }
+
+    def apply(self, collection: str, docs: list):
+        """Aplica un lote de documentos y avanza la marca de agua (CPU puro, sin I/O)."""
+        if collection == "loads":
+            table, to_values = self.loads, self._load_values
+        else:
+            table, to_values = self.downtimes, self._downtime_values
+        watermark = self.watermarks[collection]
+        for doc in docs:
+            table.upsert(doc["_id"], to_values(doc), active=doc.get("active", True))
+            for field in ("createdAt", "updatedAt"):
+                stamp = doc.get(field)
+                if stamp and (watermark is None or stamp > watermark):
+                    watermark = stamp
+        self.watermarks[collection] = watermark
+
+
+class FleetSnapshot:
+    """
+    Snapshot servido a los dashboards. Los incrementos se aplican sobre el
+    estado vigente; la recarga completa arma un estado nuevo en segundo plano
+    (el CPU va en un hilo) y lo cambia de golpe al terminar, así mientras
+    tanto se sigue respondiendo con el anterior.
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._state = SnapshotState()
+        self._reload_task = None
+        self.refreshed_at = 0.0
+        self.full_loaded_at = 0.0
+
+    @property
+    def categories(self) -> dict:
+        return self._state.categories
+
+    @property
+    def loads(self) -> ColumnarTable:
+        return self._state.loads
+
+    @property
+    def downtimes(self) -> ColumnarTable:
+        return self._state.downtimes
+
+    @property
+    def watermarks(self) -> dict:
+        return self._state.watermarks
+
+    async def _pull(self, state: SnapshotState, collection: str, in_thread: bool = False):
+        """
+        Trae lo creado o modificado desde la última marca de agua (menos el
+        margen). La carga completa lee del nodo de reportes; los incrementos
+        leen del primario para no saltarse escrituras que aún no se replican.
+        in_thread solo se usa con un estado que todavía no se publica: el
+        vigente se modifica en el event loop para no cruzarse con un group-by.
+        """
+        watermark = state.watermarks[collection]
+        query = {}
+        source = reporting_database
+        if watermark is not None:
+            since = watermark - timedelta(seconds=ANALYTICS_WATERMARK_LAG_SECONDS)
+            # Un índice por campo: el $or se resuelve con unión de índices
+            query = {"$or": [{"createdAt": {"$gte": since}}, {"updatedAt": {"$gte": since}}]}
+            source = database
+
+        cursor = source[collection].find(query, SNAPSHOT_PROJECTIONS[collection]).batch_size(PULL_BATCH_SIZE)
+        while docs := await cursor.to_list(PULL_BATCH_SIZE):
+            if in_thread:
+                await asyncio.to_thread(state.apply, collection, docs)
+            else:
+                state.apply(collection, docs)
+
+    async def _full_reload(self):
+        state = SnapshotState()
+        for collection in SNAPSHOT_PROJECTIONS:
+            await self._pull(state, collection, in_thread=True)
+        async with self._lock:
+            # Ponerse al día con lo escrito durante la carga y publicar el estado nuevo
+            for collection in SNAPSHOT_PROJECTIONS:
+                await self._pull(state, collection, in_thread=True)
+            self._state = state
+            self.full_loaded_at = self.refreshed_at = time.monotonic()
+
+    def _start_full_reload(self) -> asyncio.Task:
+        if self._reload_task is None or self._reload_task.done():
+            self._reload_task = asyncio.create_task(self._full_reload())
+            self._reload_task.add_done_callback(_report_reload_error)
+        return self._reload_task
+
+    async def refresh(self, force: bool = False):
+        if not self.full_loaded_at:
+            # Primera carga: no hay snapshot que servir, así que se espera.
+            # shield: si se cancela el request, la carga sigue para el siguiente
+            await asyncio.shield(self._start_full_reload())
+            return
+        if time.monotonic() - self.full_loaded_at > ANALYTICS_FULL_RELOAD_SECONDS:
+            self._start_full_reload()
+
+        now = time.monotonic()
+        if not force and now - self.refreshed_at < ANALYTICS_REFRESH_SECONDS:
+            return
+        async with self._lock:
+            if not force and time.monotonic() - self.refreshed_at < ANALYTICS_REFRESH_SECONDS:
+                return
+            state = self._state
+            for collection in SNAPSHOT_PROJECTIONS:
+                await self._pull(state, collection)
+            self.refreshed_at = time.monotonic()
+
+    def status(self) -> dict:
+        return {
+            "loads": self.loads.rows,
+            "downtimes": self.downtimes.rows,
+            "watermarks": {k: v.isoformat() if v else None for k, v in self.watermarks.items()},
+            "reloading": self._reload_task is not None and not self._reload_task.done()
+        }
+
+
+def _report_reload_error(task: asyncio.Task):
+    # Una recarga en segundo plano que falla no tumba nada: se sigue sirviendo
+    # el estado anterior y el siguiente refresh la vuelve a intentar
+    if not task.cancelled() and task.exception():
+        print(f"Error al recargar el snapshot de analytics: {task.exception()}")
+
+
+def _week_start(days: np.ndarray) -> np.ndarray:
+    """Lunes de la semana de cada día (1970-01-01 fue jueves)."""
+    as_int = days.astype("int64")
+    return (as_int - (as_int + 3) % 7).astype("datetime64[D]")
+
+
+def _time_key(days: np.ndarray, unit: str) -> np.ndarray:
+    """Clave entera de tiempo para agrupar. monthOfYear (1-12) sirve para comparar años."""
+    if unit == "day":
+        return days.astype("int64")
+    if unit == "week":
+        return _week_start(days).astype("int64")
+    if unit == "monthOfYear":
+        return days.astype("datetime64[M]").astype("int64") % 12 + 1
+    return days.astype("datetime64[M]" if unit == "month" else "datetime64[Y]").astype("int64")
+
+
+def _time_label(value, unit: str):
+    if unit == "monthOfYear":
+        return int(value)
+    dtype = {"day": "datetime64[D]", "week": "datetime64[D]", "month": "datetime64[M]", "year": "datetime64[Y]"}[unit]
+    return str(np.int64(value).astype(dtype))
+
+
+TIME_GROUPS = ("day", "week", "month", "monthOfYear", "year")
+
+
+def group_table(
+    snapshot: FleetSnapshot,
+    table: ColumnarTable,
+    group_by: list,
+    sum_fields: tuple,
+    mean_fields: tuple,
+    start=None,
+    end=None
+) -> list:
+    """
+    Group-by vectorizado: filtra por rango de días, agrupa por las columnas
+    pedidas (categorías o unidades de tiempo) y suma / promedia métricas
+    ignorando los valores faltantes.
+    """
+    days = table.column("day")
+    mask = table.mask() & ~np.isnat(days)
+    if start is not None:
+        mask &= days >= np.datetime64(start, "D")
+    if end is not None:
+        mask &= days <= np.datetime64(end, "D")
+
+    selected = np.nonzero(mask)[0]
+    if selected.size == 0:
+        return []
+
+    key_columns = []
+    for group in group_by:
+        if group in TIME_GROUPS:
+            key_columns.append(_time_key(days[selected], group))
+        else:
+            key_columns.append(table.column(group)[selected].astype("int64"))
+
+    keys = np.stack(key_columns, axis=1)
+    unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    groups = unique_keys.shape[0]
+
+    counts = np.bincount(inverse, minlength=groups)
+    metrics = {}
+    for field in dict.fromkeys(sum_fields + mean_fields):
+        values = table.column(field)[selected]
+        present = ~np.isnan(values)
+        total = np.bincount(inverse, weights=np.where(present, values, 0.0), minlength=groups)
+        if field in sum_fields:
+            metrics[field] = total
+        if field in mean_fields:
+            samples = np.bincount(inverse, weights=present.astype(np.float64), minlength=groups)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                metrics[f"avg_{field}"] = np.where(samples > 0, total / samples, np.nan)
+
+    rows = []
+    for i in range(groups):
+        row = {}
+        for j, group in enumerate(group_by):
+            value = unique_keys[i, j]
+            if group in TIME_GROUPS:
+                row[group] = _time_label(value, group)
+            else:
+                category = snapshot.categories[group]
+                key = category.keys[value]
+                row[group] = str(key) if key is not None else None
+                row[f"{group}Name"] = category.labels[value]
+        row["count"] = int(counts[i])
+        for name, array in metrics.items():
+            row[name] = None if np.isnan(array[i]) else round(float(array[i]), 3)
+        rows.append(row)
+    return rows
+
+
+fleet_snapshot = FleetSnapshot()
@@ -0,0 +1,178 @@
+# utils/bulk_email.py
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from config.database import (
+    emailBatches_collection,
+    emailBatchRecipients_collection,
+    drivers_collection,
+    coversheets_collection
+)
+from utils.email_utils import render_email_chunk, build_email_message, send_messages
+
+# Cuántos destinatarios se renderizan / envían por bloque
+EMAIL_BATCH_CHUNK_SIZE = int(os.getenv("EMAIL_BATCH_CHUNK_SIZE", "200"))
+EMAIL_RENDER_WORKERS = int(os.getenv("EMAIL_RENDER_WORKERS", "2"))
+
+_render_pool = None
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Pool de procesos compartido para renderizar plantillas (se crea bajo demanda)."""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(max_workers=EMAIL_RENDER_WORKERS)
+    return _render_pool
+
+
+async def resolve_recipients(target: str, route_id: str = None) -> list:
+    """
+    Resuelve los destinatarios según el filtro:
+    - "drivers": todos los drivers con email
+    - "route": drivers que han trabajado la ruta (según sus coversheets activos)
+    """
+    query = {"email": {"$nin": [None, ""]}}
+
+    if target == "route":
+        driver_ids = await coversheets_collection.distinct(
+            "driver_id",
+            {"route_id": ObjectId(route_id), "active": True}
+        )
+        query["_id"] = {"$in": [d for d in driver_ids if d]}
+    elif target != "drivers":
+        raise ValueError(f"Filtro de destinatarios no soportado: {target}")
+
+    cursor = drivers_collection.find(query, {"email": 1, "name": 1, "employeeName": 1})
+    recipients = []
+    seen = set()
+    async for driver in cursor:
+        email = driver["email"].strip().lower()
+        if email in seen:
+            continue
+        seen.add(email)
+        recipients.append({
+            "email": email,
+            "name": driver.get("name") or driver.get("employeeName") or ""
+        })
+    return recipients
+
+
+async def create_email_batch(recipients: list, subject: str, message: str, filters: dict) -> ObjectId:
+    """Registra el envío masivo y un documento de estado por destinatario."""
+    now = datetime.now(ZoneInfo("America/Denver"))
+    batch = await emailBatches_collection.insert_one({
+        "subject": subject,
+        "message": message,
+        "filters": filters,
+        "status": "queued",
+        "total": len(recipients),
+        "sent": 0,
+        "failed": 0,
+        "createdAt": now,
+        "startedAt": None,
+        "finishedAt": None
+    })
+
+    for i in range(0, len(recipients), EMAIL_BATCH_CHUNK_SIZE):
+        chunk = recipients[i:i + EMAIL_BATCH_CHUNK_SIZE]
+        await emailBatchRecipients_collection.insert_many([
+            {
+                "batch_id": batch.inserted_id,
+                "seq": i + n,
+                "email": r["email"],
+                "name": r["name"],
+                "status": "pending",
+                "error": None,
+                "updatedAt": None
+            }
+            for n, r in enumerate(chunk)
+        ], ordered=False)
+
+    return batch.inserted_id
+
+
+async def run_email_batch(batch_id: ObjectId):
+    """
+    Procesa un envío masivo por bloques:
+    1. Renderiza el bloque en el pool de procesos (plantilla compilada y cacheada)
+    2. Envía el bloque por una sola conexión SMTP
+    3. Guarda el estado de cada destinatario y el progreso del batch
+
+    Solo procesa destinatarios en estado "pending", así que se puede relanzar
+    si el proceso se interrumpe a la mitad.
+    """
+    batch = await emailBatches_collection.find_one({"_id": batch_id})
+    if not batch:
+        return
+
+    tz = ZoneInfo("America/Denver")
+    await emailBatches_collection.update_one(
+        {"_id": batch_id},
+        {"$set": {"status": "running", "startedAt": batch.get("startedAt") or datetime.now(tz)}}
+    )
+
+    loop = asyncio.get_running_loop()
+    pool = get_render_pool()
+
+    try:
+        while True:
+            pending = await emailBatchRecipients_collection.find(
+                {"batch_id": batch_id, "status": "pending"},
+                {"email": 1, "name": 1}
+            ).sort("seq", 1).limit(EMAIL_BATCH_CHUNK_SIZE).to_list(length=EMAIL_BATCH_CHUNK_SIZE)
+            if not pending:
+                break
+
+            recipients = [{"email": r["email"], "name": r.get("name", "")} for r in pending]
+            rendered = await loop.run_in_executor(
+                pool, render_email_chunk, batch["subject"], batch["message"], recipients
+            )
+            messages = [
+                build_email_message(email, batch["subject"], text, html)
+                for email, text, html in rendered
+            ]
+
+            try:
+                results = await asyncio.to_thread(send_messages, messages)
+            except Exception as e:
+                # Falla de conexión: todo el bloque queda como fallido
+                results = [(r["email"], str(e)) for r in recipients]
+
+            errors = dict(results)
+            now = datetime.now(tz)
+            ops = []
+            sent = failed = 0
+            for r in pending:
+                error = errors.get(r["email"], "Sin respuesta del servidor SMTP")
+                if error is None:
+                    sent += 1
+                else:
+                    failed += 1
+                ops.append(UpdateOne(
+                    {"_id": r["_id"]},
+                    {"$set": {"status": "sent" if error is None else "failed", "error": error, "updatedAt": now}}
+                ))
+
+            await emailBatchRecipients_collection.bulk_write(ops, ordered=False)
+            await emailBatches_collection.update_one(
+                {"_id": batch_id},
+                {"$inc": {"sent": sent, "failed": failed}}
+            )
+
+        await emailBatches_collection.update_one(
+            {"_id": batch_id},
+            {"$set": {"status": "completed", "finishedAt": datetime.now(tz)}}
+        )
+    except Exception as e:
+        await emailBatches_collection.update_one(
+            {"_id": batch_id},
+            {"$set": {"status": "error", "error": str(e), "finishedAt": datetime.now(tz)}}
+        )
+        raise
+
@@ -0,0 +1,117 @@
+# utils/catalog_cache.py
+# Caché en memoria de los catálogos pequeños (trucks, routes, depts, directions, ...).
+# Cada proceso guarda su copia; se invalida al escribir y caduca sola por si
+# otro proceso modificó el catálogo.
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+from config.database import database
+
+CATALOG_CACHE_TTL_SECONDS = int(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300"))
+
+
+class CatalogCache:
+    """
+    Documentos de un catálogo indexados por _id, cargados con una sola consulta.
+    list_filter decide qué documentos salen en el listado (los demás se
+    siguen pudiendo leer por ID); sort_field ordena el listado.
+    """
+
+    def __init__(
+        self,
+        collection: str,
+        name_field: str,
+        list_filter=None,
+        sort_field: str = None,
+        ttl: int = CATALOG_CACHE_TTL_SECONDS
+    ):
+        self.collection = collection
+        self.name_field = name_field
+        self.list_filter = list_filter
+        self.sort_field = sort_field
+        self.ttl = ttl
+        self._docs = None
+        self._listing = None
+        self._loaded_at = 0.0
+        self._generation = 0  # Sube con cada invalidate()
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._docs is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def get_all(self) -> dict:
+        if self._fresh():
+            return self._docs
+        async with self._lock:
+            if self._fresh():
+                return self._docs
+            generation = self._generation
+            docs = await database[self.collection].find().to_list(length=None)
+            docs = {doc["_id"]: doc for doc in docs}
+            # Si se invalidó mientras se consultaba, lo leído puede ser anterior
+            # a la escritura: se responde pero no se guarda (la siguiente
+            # llamada vuelve a leer)
+            if generation == self._generation:
+                self._docs = docs
+                self._listing = None
+                self._loaded_at = time.monotonic()
+        return docs
+
+    def invalidate(self):
+        self._generation += 1
+        self._docs = None
+        self._listing = None
+
+    async def get(self, doc_id):
+        return (await self.get_all()).get(doc_id)
+
+    async def name(self, doc_id) -> str:
+        """Nombre del documento, o None si no existe."""
+        if not doc_id:
+            return None
+        doc = await self.get(doc_id)
+        return doc.get(self.name_field) if doc else None
+
+    async def listing(self, helper) -> tuple:
+        """
+        (lista serializada con helper, ETag). Se calcula una vez por carga del
+        catálogo, así que los GET repetidos no serializan de nuevo.
+        """
+        docs = await self.get_all()
+        listing = self._listing
+        if listing is None:
+            selected = [d for d in docs.values() if self.list_filter is None or self.list_filter(d)]
+            if self.sort_field:
+                selected.sort(key=lambda d: (d.get(self.sort_field) is None, str(d.get(self.sort_field) or "")))
+            data = [helper(d) for d in selected]
+            digest = hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+            listing = (data, f'"{digest}"')
+            if docs is self._docs:  # No guardar un listado de una carga ya invalidada
+                self._listing = listing
+        return listing
+
+
+catalogs = {
+    "trucks": CatalogCache("trucks", "truckNumber"),
+    "routes": CatalogCache("routes", "routeNumber", list_filter=lambda d: d.get("active") is True),
+    "landfills": CatalogCache("landfills", "landfillName", sort_field="landfillName"),
+    "materials": CatalogCache("materials", "materialName"),
+    "depts": CatalogCache("depts", "deptName", sort_field="deptName"),
+    "directions": CatalogCache("directions", "directionName"),
+    "weatherConditions": CatalogCache("weatherConditions", "weatherName"),
+    "roadConditions": CatalogCache("roadConditions", "roadConditionsName"),
+    "typeOfIncidents": CatalogCache("typeOfIncidents", "typeIncidentName", sort_field="typeIncidentName"),
+    "supervisors": CatalogCache("supervisors", "supervisorName", sort_field="supervisorName")
+}
+
+
+def get_catalog(name: str) -> CatalogCache:
+    return catalogs[name]
+
+
+def invalidate_catalogs(*names):
+    for name in names:
+        catalogs[name].invalidate()
@@ -0,0 +1,215 @@
+# utils/catalog_import.py
+# Alta masiva de trucks, routes y drivers desde CSV: upsert por lotes con
+# bulk_write y contraseñas de drivers hasheadas en un pool de procesos.
+import asyncio
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from config.auth import hash_password
+from config.database import trucks_collection, routes_collection, drivers_collection
+from utils.catalog_cache import invalidate_catalogs
+from utils.csv_stream import iter_csv_batches, pick_column
+
+CATALOG_IMPORT_BATCH_SIZE = int(os.getenv("CATALOG_IMPORT_BATCH_SIZE", "500"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Máximo de filas con error que se listan en la respuesta (errors trae el total)
+CATALOG_IMPORT_ERROR_LIMIT = 500
+# Roles que se pueden asignar a un driver desde el CSV (nunca Admin)
+DRIVER_IMPORT_ROLES = tuple(
+    role.strip() for role in os.getenv("DRIVER_IMPORT_ROLES", "Driver").split(",") if role.strip()
+)
+
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+TRUE_VALUES = ("true", "yes", "y", "1", "si", "sí", "active")
+FALSE_VALUES = ("false", "no", "n", "0", "inactive")
+
+_hash_pool = None
+
+
+def get_hash_pool() -> ProcessPoolExecutor:
+    """Pool de procesos compartido para bcrypt (se crea bajo demanda)."""
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+    return _hash_pool
+
+
+def _required(row: dict, aliases: tuple, label: str) -> str:
+    value = (pick_column(row, aliases) or "").strip()
+    if not value:
+        raise ValueError(f"Fila sin {label}")
+    return value
+
+
+def _parse_bool(value: str, label: str):
+    value = (value or "").strip().lower()
+    if not value:
+        return None
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f"{label} debe ser true o false")
+
+
+def _parse_truck(row: dict) -> tuple:
+    """(llave, campos a guardar, campos solo al crear). Lanza ValueError si la fila no es válida."""
+    number = _required(row, ("trucknumber", "truck", "truckno", "number"), "truckNumber")
+    return number, {"truckNumber": number}, {}
+
+
+def _parse_route(row: dict) -> tuple:
+    number = _required(row, ("routenumber", "route", "routeno", "number"), "routeNumber")
+    data = {"routeNumber": number}
+    on_insert = {}
+    lob = (pick_column(row, ("lob", "lineofbusiness")) or "").strip()
+    if lob:
+        data["lob"] = lob
+    else:
+        on_insert["lob"] = ""
+    active = _parse_bool(pick_column(row, ("active",)), "active")
+    if active is None:
+        on_insert["active"] = True
+    else:
+        data["active"] = active
+    return number, data, on_insert
+
+
+def _parse_driver(row: dict) -> tuple:
+    email = _required(row, ("email", "emailaddress"), "email")
+    if not EMAIL_RE.match(email):
+        raise ValueError("email inválido")
+    data = {"email": email}
+    on_insert = {}
+    # Las columnas vacías no pisan lo que ya tiene un driver existente
+    name = (pick_column(row, ("name", "drivername", "fullname")) or "").strip()
+    if name:
+        data["name"] = name
+    else:
+        on_insert["name"] = ""
+    rol = (pick_column(row, ("rol", "role")) or "").strip()
+    if rol:
+        allowed = {role.lower(): role for role in DRIVER_IMPORT_ROLES}
+        if rol.lower() not in allowed:
+            raise ValueError(f"rol inválido. Opciones: {', '.join(DRIVER_IMPORT_ROLES)}")
+        data["rol"] = allowed[rol.lower()]
+    else:
+        on_insert["rol"] = "Driver"
+    password = pick_column(row, ("password",)) or ""
+    if password:
+        data["password"] = password  # Se reemplaza por el hash antes de guardar
+    return email, data, on_insert
+
+
+# Tipo de importación -> (colección, campo llave, parser, catálogo en caché)
+CATALOG_IMPORTS = {
+    "trucks": (trucks_collection, "truckNumber", _parse_truck, "trucks"),
+    "routes": (routes_collection, "routeNumber", _parse_route, "routes"),
+    "drivers": (drivers_collection, "email", _parse_driver, None)
+}
+
+
+async def _hash_passwords(rows: list):
+    """Reemplaza las contraseñas en texto plano del lote por su hash bcrypt (en paralelo, fuera del event loop)."""
+    with_password = [data for _, _, data, _ in rows if data.get("password")]
+    if not with_password:
+        return
+    loop = asyncio.get_running_loop()
+    pool = get_hash_pool()
+    hashes = await asyncio.gather(*[
+        loop.run_in_executor(pool, hash_password, data["password"]) for data in with_password
+    ])
+    for data, hashed in zip(with_password, hashes):
+        data["password"] = hashed
+
+
+async def import_catalog_csv(kind: str, upload, overwrite_passwords: bool = False) -> dict:
+    """
+    Crea o actualiza (upsert por la llave del tipo) los registros de un CSV.
+
+    Por cada lote: validación de las filas, hash de contraseñas en el pool
+    (solo drivers) y un bulk_write no ordenado. Las filas con error se
+    reportan con su número y no detienen el resto. La caché del catálogo se
+    invalida una sola vez al final.
+
+    La contraseña de un driver existente solo se reemplaza con
+    overwrite_passwords; si no, se ignora la columna para ese driver.
+    """
+    collection, key_field, parse_row, catalog = CATALOG_IMPORTS[kind]
+    now = datetime.now(ZoneInfo("America/Denver"))
+    counts = {"rows": 0, "created": 0, "updated": 0, "errors": 0}
+    errors = []
+    seen_keys = set()
+
+    def report(error: dict):
+        counts["errors"] += 1
+        if len(errors) < CATALOG_IMPORT_ERROR_LIMIT:
+            errors.append(error)
+
+    async for batch in iter_csv_batches(upload, CATALOG_IMPORT_BATCH_SIZE):
+        rows = []
+        for row_number, row in batch:
+            counts["rows"] += 1
+            try:
+                key, data, on_insert = parse_row(row)
+            except ValueError as ve:
+                report({"row": row_number, "error": str(ve)})
+                continue
+            if key in seen_keys:
+                report({"row": row_number, key_field: key, "error": f"{key_field} repetido en el archivo"})
+                continue
+            seen_keys.add(key)
+            rows.append((row_number, key, data, on_insert))
+
+        if kind == "drivers" and rows:
+            # Un driver nuevo necesita contraseña: una consulta $in por lote
+            existing = set()
+            cursor = collection.find({key_field: {"$in": [key for _, key, _, _ in rows]}}, {key_field: 1})
+            async for doc in cursor:
+                existing.add(doc[key_field])
+            valid = []
+            for item in rows:
+                row_number, key, data, _ = item
+                if key not in existing and not data.get("password"):
+                    report({"row": row_number, key_field: key, "error": "Driver nuevo sin password"})
+                    continue
+                if key in existing and not overwrite_passwords:
+                    data.pop("password", None)
+                valid.append(item)
+            rows = valid
+            await _hash_passwords(rows)
+
+        if not rows:
+            continue
+
+        ops = [
+            UpdateOne(
+                {key_field: key},
+                {"$set": data, "$setOnInsert": {**on_insert, "createdAt": now}},
+                upsert=True
+            )
+            for _, key, data, on_insert in rows
+        ]
+        try:
+            result = await collection.bulk_write(ops, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as bwe:
+            details = bwe.details
+            for error in details.get("writeErrors", []):
+                row_number, key, _, _ = rows[error["index"]]
+                report({"row": row_number, key_field: key, "error": error.get("errmsg", "Error al guardar")})
+
+        counts["created"] += details.get("nUpserted", 0)
+        counts["updated"] += details.get("nMatched", 0)
+
+    if catalog and (counts["created"] or counts["updated"]):
+        invalidate_catalogs(catalog)
+
+    errors.sort(key=lambda e: e["row"])
+    return {**counts, "errorRows": errors}
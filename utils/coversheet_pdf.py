@@ -0,0 +1,188 @@
+# utils/coversheet_pdf.py
+# PDF imprimible de un coversheet (con loads, downtimes y spare truck info)
+# y escritura de ZIP en streaming para el modo por rango de fechas.
+import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+# Cuántos coversheets se expanden y renderizan a la vez en el modo ZIP
+PDF_BATCH_SIZE = int(os.getenv("PDF_BATCH_SIZE", "20"))
+
+_pdf_pool = None
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Pool de procesos compartido para renderizar PDFs (se crea bajo demanda)."""
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=PDF_RENDER_WORKERS)
+    return _pdf_pool
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+def _paragraph(value, style) -> Paragraph:
+    """Texto libre en un Paragraph: se escapa porque reportlab lo interpreta como markup."""
+    return Paragraph(escape(_text(value)), style)
+
+
+def _time(value) -> str:
+    """Hora local (HH:MM) de un ISO de Denver; los textos antiguos se muestran tal cual."""
+    try:
+        return datetime.fromisoformat(value).strftime("%H:%M")
+    except (TypeError, ValueError):
+        return _text(value)
+
+
+def _table(headers: list, rows: list) -> Table:
+    table = Table([headers] + (rows or [[""] * len(headers)]), repeatRows=1)
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1f3b57")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f2f4f7")]),
+    ]))
+    return table
+
+
+def render_coversheet_pdf(coversheet: dict) -> bytes:
+    """
+    Renderiza el coversheet expandido (salida de expand_related_data_for_docs)
+    a PDF. Solo recibe datos ya serializados, así que puede correr en el pool
+    de procesos.
+    """
+    styles = getSampleStyleSheet()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=landscape(letter),
+        leftMargin=0.5 * inch, rightMargin=0.5 * inch,
+        topMargin=0.5 * inch, bottomMargin=0.5 * inch,
+        title=f"Coversheet {(coversheet.get('date') or '')[:10]}",
+        pageCompression=1
+    )
+
+    summary = coversheet.get("summary") or {}
+    story = [
+        _paragraph(f"Coversheet {(coversheet.get('date') or '')[:10]}", styles["Title"]),
+        _table(
+            ["Truck", "Driver", "Route", "Loads", "Tons", "Downtime (min)", "Spare trucks"],
+            [[
+                _text(coversheet.get("truckNumber")),
+                _text(coversheet.get("driverName")),
+                _text(coversheet.get("routeNumber")),
+                _text(summary.get("loadCount")),
+                _text(summary.get("totalTons")),
+                _text(summary.get("downtimeMinutes")),
+                _text(summary.get("spareTruckCount"))
+            ]]
+        ),
+        Spacer(1, 0.2 * inch),
+        Paragraph("Loads", styles["Heading2"]),
+        _table(
+            ["Ticket", "Route", "First stop", "Last stop", "Landfill", "In", "Out", "Material", "Gross", "Tare", "Tons", "Note"],
+            [[
+                _text(load.get("ticketNumber")),
+                _text(load.get("routeNumber")),
+                _time(load.get("firstStopTime")),
+                _time(load.get("lastStopTime")),
+                _text(load.get("landfillName")),
+                _time(load.get("landFillTimeIn")),
+                _time(load.get("landFillTimeOut")),
+                _text(load.get("materialName")),
+                _text(load.get("grossWeight")),
+                _text(load.get("tareWeight")),
+                _text(load.get("tons")),
+                _paragraph(load.get("note"), styles["BodyText"])
+            ] for load in coversheet.get("loads", [])]
+        ),
+        Spacer(1, 0.2 * inch),
+        Paragraph("Downtimes", styles["Heading2"]),
+        _table(
+            ["Truck", "Start", "End", "Minutes", "Reason"],
+            [[
+                _text(downtime.get("truckNumber")),
+                _time(downtime.get("startTime")),
+                _time(downtime.get("endTime")),
+                _text(downtime.get("durationMinutes")),
+                _paragraph(downtime.get("downtimeReason"), styles["BodyText"])
+            ] for downtime in coversheet.get("downtimes", [])]
+        ),
+        Spacer(1, 0.2 * inch),
+        Paragraph("Spare truck info", styles["Heading2"]),
+        _table(
+            ["Spare truck", "Route", "Leave yard", "Back in yard", "Start miles", "End miles", "Miles", "Fuel", "Hours out"],
+            [[
+                _text(spare.get("spareTruckNumber")),
+                _text(spare.get("routeNumber")),
+                _time(spare.get("leaveYard")),
+                _time(spare.get("backInYard")),
+                _text(spare.get("startMiles")),
+                _text(spare.get("endMiles")),
+                _text(spare.get("miles")),
+                _text(spare.get("fuel")),
+                _text(spare.get("hoursOut"))
+            ] for spare in coversheet.get("spareTruckInfos", [])]
+        )
+    ]
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def coversheet_error_filename(coversheet: dict) -> str:
+    """Archivo de texto que reemplaza en el ZIP al PDF que no se pudo generar."""
+    return coversheet_pdf_filename(coversheet)[:-len(".pdf")] + "_ERROR.txt"
+
+
+def coversheet_pdf_filename(coversheet: dict) -> str:
+    day = (coversheet.get("date") or "")[:10] or "sin-fecha"
+    truck = "".join(c for c in _text(coversheet.get("truckNumber")) if c.isalnum() or c in "-_") or "truck"
+    return f"coversheet_{day}_{truck}_{coversheet['id']}.pdf"
+
+
+class ZipChunkWriter:
+    """
+    Destino no "seekable" para zipfile: acumula lo escrito y lo entrega en
+    pedazos con drain(). zipfile usa data descriptors, así que el ZIP se
+    puede enviar mientras se genera sin tenerlo completo en memoria.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def open_zip_stream():
+    """Devuelve (writer, zip) para ir agregando archivos y drenando bytes."""
+    writer = ZipChunkWriter()
+    return writer, zipfile.ZipFile(writer, mode="w", compression=zipfile.ZIP_STORED)
@@ -0,0 +1,89 @@
+# utils/csv_stream.py
+# Lectura de CSV subidos (UploadFile) por pedazos, sin cargar el archivo completo.
+import codecs
+import csv
+import io
+import re
+
+CSV_READ_CHUNK_BYTES = 64 * 1024
+
+
+def normalize_header(name: str) -> str:
+    """'Ticket #' -> 'ticket', 'Gross_Weight' -> 'grossweight'."""
+    return re.sub(r"[^a-z0-9]", "", (name or "").lower())
+
+
+def _complete_records_end(text: str) -> int:
+    """
+    Posición hasta donde hay registros completos: el último salto de línea
+    que no está dentro de un campo entre comillas.
+    """
+    in_quotes = False
+    end = 0
+    for i, char in enumerate(text):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == "\n" and not in_quotes:
+            end = i + 1
+    return end
+
+
+async def iter_csv_rows(upload, chunk_size: int = CSV_READ_CHUNK_BYTES):
+    """
+    Itera las filas de un CSV subido como (número_de_fila, dict). La primera
+    fila es el encabezado (normalizado con normalize_header); las filas
+    vacías se saltan. Acepta UTF-8 con o sin BOM.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    header = None
+    row_number = 0
+
+    while True:
+        chunk = await upload.read(chunk_size)
+        final = not chunk
+        pending += decoder.decode(chunk, final=final)
+
+        if final:
+            ready, pending = pending, ""
+        else:
+            end = _complete_records_end(pending)
+            ready, pending = pending[:end], pending[end:]
+
+        for values in csv.reader(io.StringIO(ready)):
+            if not any(v.strip() for v in values):
+                continue
+            if header is None:
+                header = [normalize_header(v) for v in values]
+                continue
+            row_number += 1
+            yield row_number, dict(zip(header, (v.strip() for v in values)))
+
+        if final:
+            break
+
+
+async def iter_csv_batches(upload, batch_size: int):
+    """Agrupa iter_csv_rows en listas de hasta batch_size filas."""
+    batch = []
+    async for row in iter_csv_rows(upload):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def parse_csv_number(value):
+    """'1,234.5' -> 1234.5; vacío -> None. Lanza ValueError si no es número."""
+    value = (value or "").replace(",", "").strip()
+    return float(value) if value else None
+
+
+def pick_column(row: dict, aliases: tuple):
+    """Valor de la primera columna presente entre los alias (ya normalizados)."""
+    for alias in aliases:
+        if alias in row:
+            return row[alias]
+    return None
@@ -0,0 +1,150 @@
+# utils/date_utils.py
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+DENVER_TZ = ZoneInfo("America/Denver")
+
+
+def parse_date_range(start_date: str = None, end_date: str = None) -> dict:
+    """
+    Convierte start_date / end_date (YYYY-MM-DD, ambos inclusivos) en un filtro
+    de MongoDB con medianoche de Denver, igual que el listado de coversheets.
+    Lanza ValueError si el formato es inválido.
+    """
+    date_filter = {}
+    if start_date:
+        try:
+            start = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=DENVER_TZ)
+        except ValueError:
+            raise ValueError("Formato de start_date inválido. Usa YYYY-MM-DD")
+        date_filter["$gte"] = start
+    if end_date:
+        try:
+            end = datetime.strptime(end_date, "%Y-%m-%d").replace(tzinfo=DENVER_TZ) + timedelta(days=1)
+        except ValueError:
+            raise ValueError("Formato de end_date inválido. Usa YYYY-MM-DD")
+        date_filter["$lt"] = end
+    return date_filter
+
+
+def denver_day_key(value: datetime) -> str:
+    """Día (YYYY-MM-DD) en Denver. Motor devuelve las fechas en UTC sin tzinfo."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(DENVER_TZ).strftime("%Y-%m-%d")
+
+
+def denver_midnight(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=DENVER_TZ)
+
+
+def denver_month_start(value: datetime) -> datetime:
+    """Medianoche de Denver del primer día del mes de value (naive = UTC, como lo devuelve Motor)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    value = value.astimezone(DENVER_TZ)
+    return datetime(value.year, value.month, 1, tzinfo=DENVER_TZ)
+
+
+def days_in_range(start: date, end: date) -> list:
+    """Lista de días entre start y end (inclusivo)."""
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+# Formatos de hora que manda el frontend (solo hora, sin fecha)
+TIME_FORMATS = ("%H:%M", "%H:%M:%S", "%I:%M %p", "%I:%M:%S %p", "%I:%M%p")
+
+
+def parse_time_value(value, base_day: datetime = None):
+    """
+    Convierte una hora a datetime de Denver.
+    Acepta datetime, strings ISO completos o solo la hora ("08:30", "8:30 AM");
+    en ese caso se usa el día de base_day (el día del coversheet).
+    Devuelve None si no se puede interpretar.
+    """
+    if value is None or value == "":
+        return None
+
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(DENVER_TZ)
+
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+
+    for fmt in TIME_FORMATS:
+        try:
+            parsed = datetime.strptime(text.upper(), fmt)
+        except ValueError:
+            continue
+        if base_day is None:
+            return None
+        day = parse_time_value(base_day) if isinstance(base_day, datetime) else base_day
+        return datetime(day.year, day.month, day.day, parsed.hour, parsed.minute, parsed.second, tzinfo=DENVER_TZ)
+
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=DENVER_TZ)
+    return parsed.astimezone(DENVER_TZ)
+
+
+def minutes_between(start, end, base_day: datetime = None):
+    """
+    Minutos entre dos horas (ver parse_time_value). Si la hora final es menor
+    que la inicial se asume que pasó la medianoche. None si falta alguna.
+    """
+    start_dt = parse_time_value(start, base_day)
+    end_dt = parse_time_value(end, base_day)
+    if start_dt is None or end_dt is None:
+        return None
+
+    minutes = (end_dt - start_dt).total_seconds() / 60
+    if minutes < 0:
+        minutes += 24 * 60
+    return round(minutes, 2)
+
+
+# Pares (inicio, fin) de horas que se guardan como datetime de Denver
+LOAD_TIME_PAIRS = (("firstStopTime", "lastStopTime"), ("landFillTimeIn", "landFillTimeOut"))
+YARD_TIME_PAIRS = (("leaveYard", "backInYard"),)
+DOWNTIME_TIME_PAIRS = (("startTime", "endTime"),)
+
+
+def normalize_time_fields(data: dict, pairs: tuple, base_day: datetime, existing: dict = None) -> dict:
+    """
+    Convierte en data las horas de cada par (ver parse_time_value) a datetime
+    de Denver anclado al día base_day. Si el fin queda antes del inicio se
+    pasa al día siguiente (turno que cruzó la medianoche).
+    existing: documento actual, para completar el par cuando solo llega una hora.
+    Los valores que no se pueden interpretar se dejan como vienen.
+    """
+    existing = existing or {}
+    for start_field, end_field in pairs:
+        start_value = data[start_field] if start_field in data else existing.get(start_field)
+        end_value = data[end_field] if end_field in data else existing.get(end_field)
+
+        start = parse_time_value(start_value, base_day)
+        end = parse_time_value(end_value, base_day)
+        shifted = start is not None and end is not None and end < start
+        if shifted:
+            end += timedelta(days=1)
+
+        if start_field in data and start is not None:
+            data[start_field] = start
+        if end is not None and (end_field in data or shifted):
+            data[end_field] = end
+    return data
+
+
+def denver_isoformat(value):
+    """Fecha guardada -> ISO con hora de Denver. Los textos antiguos se devuelven tal cual."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(DENVER_TZ).isoformat()
+    return value
@@ -0,0 +1,178 @@
+# utils/db_monitoring.py
+import json
+import os
+import threading
+
+from colorama import Fore
+from pymongo import monitoring
+
+from utils.metrics import add_request_timing, registry
+
+# Comandos más lentos que este umbral se registran en el log de slow queries
+MONGO_SLOW_QUERY_MS = float(os.getenv("MONGO_SLOW_QUERY_MS", "200"))
+# A partir de cuántas repeticiones una slow query se puede analizar con explain
+MONGO_EXPLAIN_AFTER = int(os.getenv("MONGO_EXPLAIN_AFTER", "5"))
+# Máximo de formas de consulta distintas que se guardan en memoria
+MONGO_SLOW_QUERY_MAX_ENTRIES = int(os.getenv("MONGO_SLOW_QUERY_MAX_ENTRIES", "200"))
+
+# Comandos internos del driver que no interesa medir
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "endSessions", "buildInfo"}
+
+# Dónde está el filtro de cada comando
+FILTER_FIELDS = {
+    "find": lambda c: c.get("filter"),
+    "count": lambda c: c.get("query"),
+    "distinct": lambda c: c.get("query"),
+    "findAndModify": lambda c: c.get("query"),
+    "aggregate": lambda c: c.get("pipeline"),
+    "update": lambda c: (c.get("updates") or [{}])[0].get("q"),
+    "delete": lambda c: (c.get("deletes") or [{}])[0].get("q"),
+}
+
+# Comandos que se pueden analizar con explain
+EXPLAINABLE_COMMANDS = set(FILTER_FIELDS)
+
+mongodb_command_duration_seconds = registry.histogram(
+    "mongodb_command_duration_seconds",
+    "Duración de los comandos de MongoDB por colección y comando",
+    ["collection", "command"]
+)
+mongodb_command_failures_total = registry.counter(
+    "mongodb_command_failures_total",
+    "Comandos de MongoDB que fallaron",
+    ["collection", "command"]
+)
+mongodb_slow_commands_total = registry.counter(
+    "mongodb_slow_commands_total",
+    "Comandos de MongoDB por encima del umbral de slow query",
+    ["collection", "command"]
+)
+
+
+def redact_shape(value):
+    """
+    Devuelve la "forma" de un filtro: conserva campos y operadores pero
+    reemplaza los valores por "?" para no escribir datos en el log.
+    """
+    if isinstance(value, dict):
+        return {k: redact_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], (dict, list, tuple)):
+            return [redact_shape(v) for v in value]
+        return ["?"]
+    return "?"
+
+
+def command_collection(command_name: str, command: dict) -> str:
+    if command_name == "getMore":
+        return str(command.get("collection", "-"))
+    target = command.get(command_name)
+    return target if isinstance(target, str) else "-"
+
+
+class SlowQueryTracker:
+    """Agrupa las slow queries por forma para detectar las que se repiten."""
+
+    def __init__(self, max_entries: int = MONGO_SLOW_QUERY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def record(self, collection: str, command_name: str, shape, duration_ms: float, command: dict):
+        key = (collection, command_name, json.dumps(shape, sort_keys=True, default=str))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_entries:
+                    # Sacamos la forma menos frecuente para hacer espacio
+                    least = min(self._entries, key=lambda k: self._entries[k]["count"])
+                    del self._entries[least]
+                entry = self._entries[key] = {
+                    "collection": collection,
+                    "command": command_name,
+                    "shape": shape,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0
+                }
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["last_ms"] = duration_ms
+            # Guardamos el último comando completo (solo en memoria) para poder correr explain
+            entry["last_command"] = command
+
+    def entries(self) -> list:
+        with self._lock:
+            return sorted((dict(e) for e in self._entries.values()), key=lambda e: e["count"], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_queries = SlowQueryTracker()
+
+
+class DbTimingListener(monitoring.CommandListener):
+    """
+    Listener de comandos de MongoDB:
+    - Suma la duración al tiempo de BD del request en curso (Server-Timing)
+    - Histograma de latencia por colección y comando (/metrics)
+    - Log de slow queries con el filtro redactado
+    """
+
+    def __init__(self, slow_query_ms: float = MONGO_SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                command_collection(event.command_name, event.command),
+                event.command
+            )
+
+    def _finish(self, event, failed: bool):
+        seconds = event.duration_micros / 1_000_000
+        add_request_timing("db", seconds)
+
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+
+        collection, command = pending
+        labels = (collection, event.command_name)
+        mongodb_command_duration_seconds.observe(labels, seconds)
+        if failed:
+            mongodb_command_failures_total.inc(labels)
+
+        duration_ms = seconds * 1000
+        if duration_ms >= self.slow_query_ms:
+            get_filter = FILTER_FIELDS.get(event.command_name)
+            shape = redact_shape(get_filter(command)) if get_filter else None
+            mongodb_slow_commands_total.inc(labels)
+            slow_queries.record(collection, event.command_name, shape, duration_ms, command)
+            print(
+                Fore.YELLOW
+                + f"🐢 Slow query {duration_ms:.0f}ms {collection}.{event.command_name} "
+                + json.dumps(shape, default=str)
+            )
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+
+def explainable_command(command: dict) -> dict:
+    """Quita del comando los campos de sesión/cluster que explain no acepta."""
+    return {
+        k: v for k, v in command.items()
+        if not k.startswith("$") and k not in ("lsid", "txnNumber", "autocommit", "startTransaction")
+    }
@@ -1,9 +1,11 @@
 # utils/email_utils.py
 import smtplib
 from email.message import EmailMessage
+from functools import lru_cache
 import os
 from dotenv import load_dotenv
 from jinja2 import Environment, FileSystemLoader
+from jinja2.sandbox import SandboxedEnvironment
 
 # Cargar .env
 load_dotenv()
@@ -12,28 +14,93 @@ EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
 EMAIL_USER = os.getenv("EMAIL_USER")
 EMAIL_PASS = os.getenv("EMAIL_PASS")
 
+DEFAULT_TEMPLATE = "welcome_email.html"
+
+# Puedes cambiar esta URL a cualquier logo que tengas en tu servidor o CDN
+LOGO_URL = "https://www.acedisposal.com/wp-content/uploads/2025/03/acedisposal-logo.png"
+
 # Configurar Jinja2
+# auto_reload=False: las plantillas no cambian en producción, así evitamos
+# revisar el mtime del archivo en cada render.
 template_loader = FileSystemLoader("templates/email")
-jinja_env = Environment(loader=template_loader)
+jinja_env = Environment(loader=template_loader, auto_reload=False)
 
-def send_email(to_email: str, subject: str, message: str):
-    template = jinja_env.get_template("welcome_email.html")
+# El texto de los envíos masivos lo escribe el usuario: se compila en sandbox
+message_env = SandboxedEnvironment()
+
+
+@lru_cache(maxsize=None)
+def get_email_template(template_name: str = DEFAULT_TEMPLATE):
+    """Devuelve la plantilla compilada (se compila una sola vez por proceso)."""
+    return jinja_env.get_template(template_name)
 
-    # Puedes cambiar esta URL a cualquier logo que tengas en tu servidor o CDN
-    logo_url = "https://www.acedisposal.com/wp-content/uploads/2025/03/acedisposal-logo.png"
 
-    html_content = template.render(subject=subject, message=message, logo_url=logo_url)
+def render_email_html(subject: str, message: str, template_name: str = DEFAULT_TEMPLATE, **context) -> str:
+    template = get_email_template(template_name)
+    return template.render(subject=subject, message=message, logo_url=LOGO_URL, **context)
 
+
+def build_email_message(to_email: str, subject: str, message: str, html_content: str) -> EmailMessage:
     msg = EmailMessage()
     msg["Subject"] = subject
     msg["From"] = EMAIL_USER
     msg["To"] = to_email
     msg.set_content(message)
     msg.add_alternative(html_content, subtype="html")
+    return msg
+
+
+def open_smtp_connection() -> smtplib.SMTP:
+    smtp = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT)
+    smtp.starttls()
+    smtp.login(EMAIL_USER, EMAIL_PASS)
+    return smtp
+
 
-    with smtplib.SMTP(EMAIL_HOST, EMAIL_PORT) as smtp:
-        smtp.starttls()
-        smtp.login(EMAIL_USER, EMAIL_PASS)
+def send_messages(messages):
+    """
+    Envía varios mensajes reutilizando una sola conexión SMTP.
+    Devuelve una lista de (destinatario, error) donde error es None si se envió.
+    """
+    results = []
+    with open_smtp_connection() as smtp:
+        for msg in messages:
+            try:
+                smtp.send_message(msg)
+                results.append((msg["To"], None))
+            except Exception as e:
+                results.append((msg["To"], str(e)))
+    return results
+
+
+def send_email(to_email: str, subject: str, message: str):
+    html_content = render_email_html(subject, message)
+    msg = build_email_message(to_email, subject, message, html_content)
+
+    with open_smtp_connection() as smtp:
         smtp.send_message(msg)
 
     print(f"Correo enviado a {to_email} usando plantilla Jinja2")
+
+
+@lru_cache(maxsize=32)
+def _get_message_template(message: str):
+    return message_env.from_string(message)
+
+
+def render_email_chunk(subject: str, message: str, recipients: list, template_name: str = DEFAULT_TEMPLATE) -> list:
+    """
+    Renderiza un bloque de destinatarios (mail-merge).
+    El mensaje puede usar variables como {{ name }} o {{ email }}.
+    Pensado para ejecutarse dentro de un ProcessPoolExecutor: cada proceso
+    compila la plantilla una sola vez gracias al cache.
+
+    Devuelve una lista de (email, texto, html).
+    """
+    message_template = _get_message_template(message)
+    rendered = []
+    for recipient in recipients:
+        text = message_template.render(**recipient)
+        html = render_email_html(subject, text, template_name, **recipient)
+        rendered.append((recipient["email"], text, html))
+    return rendered
@@ -0,0 +1,313 @@
+# utils/incidents.py
+# Reportes de incidentes: general information (padre) + incident detail,
+# during the incident, supervisor notes y firma del empleado (hijos).
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from config.database import (
+    client,
+    database,
+    generalinformations_collection,
+    incidentDetails_collection,
+    duringTheIncidents_collection,
+    supervisorNotes_collection,
+    employeeSignatures_collection
+)
+from utils.catalog_cache import get_catalog
+from utils.date_utils import DENVER_TZ, denver_midnight, denver_day_key
+from utils.signatures import store_signature
+from utils.rollups import apply_incident_changes
+
+# Campo de referencia de general information -> (colección, campo del nombre, campo desnormalizado)
+INCIDENT_NAME_SOURCES = {
+    "employee_id": ("employees", "employeeName", "employeeName"),
+    "truck_id": ("trucks", "truckNumber", "truckNumber"),
+    "dept_id": ("depts", "deptName", "deptName"),
+    "supervisor_id": ("supervisors", "supervisorName", "supervisorName"),
+    "typeOfIncident_id": ("typeOfIncidents", "typeIncidentName", "typeOfIncidentName")
+}
+
+# Hijos del reporte: clave en el bundle -> colección
+INCIDENT_CHILDREN = {
+    "incidentDetail": incidentDetails_collection,
+    "duringTheIncident": duringTheIncidents_collection,
+    "supervisorNotes": supervisorNotes_collection,
+    "employeeSignature": employeeSignatures_collection
+}
+
+# Banderas de incident detail que se copian a general information
+INCIDENT_FLAGS = ("wasAnyOneHurt", "wereAnyVehiclesTowed")
+
+# Ventana de "incidentes en el último año" del incident detail
+PRIOR_INCIDENT_DAYS = 365
+
+# IDs de catálogos dentro de during the incident -> (catálogo en caché, campo con el nombre)
+DURING_THE_INCIDENT_REFS = {
+    "directionYouWereTraveling_id": ("directions", "directionYouWereTravelingName"),
+    "weatherConditions_id": ("weatherConditions", "weatherConditionsName"),
+    "roadConditions_id": ("roadConditions", "roadConditionsName")
+}
+
+
+async def resolve_incident_names(refs: dict) -> dict:
+    """
+    Resuelve los nombres que espera generalinformation_helper: un find_one
+    por _id en cada colección, en paralelo. Se llama antes de abrir la
+    transacción (así no depende de lo que se permite dentro de una).
+    refs: {campo_id: ObjectId}. Devuelve {campo_id: nombre} de los encontrados.
+    """
+    fields = list(refs)
+    docs = await asyncio.gather(*[
+        database[INCIDENT_NAME_SOURCES[field][0]].find_one(
+            {"_id": refs[field]}, {INCIDENT_NAME_SOURCES[field][1]: 1}
+        )
+        for field in fields
+    ])
+    return {
+        field: doc.get(INCIDENT_NAME_SOURCES[field][1]) or ""
+        for field, doc in zip(fields, docs)
+        if doc
+    }
+
+
+def _object_id(value, field: str):
+    if not value:
+        return None
+    if not ObjectId.is_valid(value):
+        raise ValueError(f"{field} inválido")
+    return ObjectId(value)
+
+
+def _prepare_general(general: dict) -> dict:
+    """Convierte los IDs y la fecha de general information. Devuelve {campo_id: ObjectId}."""
+    refs = {}
+    for field in INCIDENT_NAME_SOURCES:
+        general[field] = _object_id(general.get(field), field)
+        if general[field]:
+            refs[field] = general[field]
+
+    # Fecha del incidente a medianoche de Denver (igual que los coversheets)
+    if general.get("date"):
+        day = general["date"]
+        day = day.replace(tzinfo=DENVER_TZ) if day.tzinfo is None else day.astimezone(DENVER_TZ)
+        general["date"] = denver_midnight(day.date())
+    return refs
+
+
+async def _prepare_children(bundle) -> dict:
+    """Hijos incluidos en el bundle, listos para guardar (sin auditoría ni referencia al padre)."""
+    children = {}
+    for key in INCIDENT_CHILDREN:
+        child = getattr(bundle, key)
+        if child is None:
+            continue
+        data = child.model_dump(exclude={"active", "createdAt", "updatedAt", "generalInformation_ref_id"})
+        if key == "duringTheIncident":
+            for field in DURING_THE_INCIDENT_REFS:
+                data[field] = _object_id(data.get(field), field)
+        if key == "employeeSignature" and data.get("employeeSignature"):
+            # La imagen va a GridFS fuera de la transacción; si esta falla el
+            # archivo se reutiliza al reintentar (se busca por sha256)
+            data.update(await store_signature(data.pop("employeeSignature")))
+        children[key] = data
+    return children
+
+
+def _incident_flags(detail: dict) -> dict:
+    """Banderas del incident detail desnormalizadas en general information (listado y rollups)."""
+    return {field: detail.get(field) if detail else None for field in INCIDENT_FLAGS}
+
+
+async def _set_incident_names(general: dict, refs: dict):
+    names = await resolve_incident_names(refs)
+    missing = [field for field in refs if field not in names]
+    if missing:
+        raise ValueError(f"No existen: {', '.join(missing)}")
+    # Una referencia vacía deja también vacío su nombre (al editar no queda el anterior)
+    for field, (_, _, name_field) in INCIDENT_NAME_SOURCES.items():
+        general[name_field] = names.get(field, "")
+
+
+async def get_prior_incidents(
+    employee_id: ObjectId,
+    before: datetime,
+    days: int = None,
+    same_day: bool = False,
+    incident_id: ObjectId = None,
+    session=None
+) -> list:
+    """
+    Reportes activos del empleado con fecha anterior a before (los más
+    recientes primero); days limita la ventana hacia atrás. Usa el índice
+    (active, employee_id, date, _id) del listado.
+
+    same_day: before es la fecha de un incidente (medianoche de Denver) y
+    también cuentan los reportes de ese mismo día. Si se pasa incident_id
+    (al editar), del mismo día solo cuentan los creados antes que él: el _id
+    crece con la creación, y el propio reporte queda fuera.
+    """
+    window = {"$gte": before - timedelta(days=days)} if days else {}
+    query = {"active": True, "employee_id": employee_id}
+    if not same_day:
+        query["date"] = {"$lt": before, **window}
+    elif incident_id is None:
+        query["date"] = {"$lte": before, **window}
+    else:
+        query["$or"] = [
+            {"date": {"$lt": before, **window}},
+            {"date": before, "_id": {"$lt": incident_id}}
+        ]
+    cursor = generalinformations_collection.find(query, session=session).sort([("date", -1), ("_id", -1)])
+    return await cursor.to_list(length=None)
+
+
+def prior_incident_fields(priors: list) -> dict:
+    """incidentInThePastYear y listDatesOfIncidents del incident detail a partir de los reportes previos."""
+    dates = sorted({denver_day_key(doc["date"]) for doc in priors})
+    return {
+        "incidentInThePastYear": bool(priors),
+        "listDatesOfIncidents": ", ".join(dates) if dates else None
+    }
+
+
+async def _fill_prior_incidents(general: dict, children: dict, session, incident_id=None):
+    """Calcula el historial del incident detail en lugar de lo escrito a mano (si hay empleado y fecha)."""
+    detail = children.get("incidentDetail")
+    if detail is None or not general.get("employee_id") or not general.get("date"):
+        return
+    priors = await get_prior_incidents(
+        general["employee_id"], general["date"], PRIOR_INCIDENT_DAYS,
+        same_day=True, incident_id=incident_id, session=session
+    )
+    detail.update(prior_incident_fields(priors))
+
+
+async def create_incident_bundle(bundle) -> dict:
+    """
+    Inserta general information y todos los hijos del bundle en una sola
+    transacción: o se guarda el reporte completo o nada.
+    Lanza ValueError si algún ID es inválido o no existe.
+    """
+    now = datetime.now(DENVER_TZ)
+    general = bundle.generalInformation.model_dump()
+    refs = _prepare_general(general)
+
+    general["active"] = True
+    general["createdAt"] = now
+    general["updatedAt"] = None
+
+    children = await _prepare_children(bundle)
+    general.update(_incident_flags(children.get("incidentDetail")))
+    await _set_incident_names(general, refs)
+
+    async with await client.start_session() as session:
+        async with session.start_transaction():
+            await _fill_prior_incidents(general, children, session)
+
+            result = await generalinformations_collection.insert_one(general, session=session)
+            general["_id"] = result.inserted_id
+
+            for key, data in children.items():
+                data.update({"generalInformation_ref_id": result.inserted_id, "active": True, "createdAt": now, "updatedAt": None})
+                child_result = await INCIDENT_CHILDREN[key].insert_one(data, session=session)
+                data["_id"] = child_result.inserted_id
+
+            # Rollups en la misma transacción: si fallan no queda el reporte sin contar
+            await apply_incident_changes([(None, general)], session=session)
+
+    return {"generalInformation": general, **children}
+
+
+async def update_incident_bundle(general_id: ObjectId, bundle) -> tuple:
+    """
+    Reemplaza general information y los hijos incluidos en el bundle en una
+    sola transacción (un hijo que no existía se crea). Los hijos que no vienen
+    no se tocan.
+    Devuelve (general antes, reporte actualizado) o (None, None) si no existe.
+    Lanza ValueError si algún ID es inválido o no existe.
+    """
+    now = datetime.now(DENVER_TZ)
+    general = bundle.generalInformation.model_dump(exclude={"active", "createdAt", "updatedAt"})
+    refs = _prepare_general(general)
+    general["updatedAt"] = now
+
+    children = await _prepare_children(bundle)
+    if "incidentDetail" in children:
+        general.update(_incident_flags(children["incidentDetail"]))
+    await _set_incident_names(general, refs)
+
+    async with await client.start_session() as session:
+        async with session.start_transaction():
+            before = await generalinformations_collection.find_one({"_id": general_id, "active": True}, session=session)
+            if not before:
+                return None, None
+            await _fill_prior_incidents(general, children, session, incident_id=general_id)
+
+            after = await generalinformations_collection.find_one_and_update(
+                {"_id": general_id},
+                {"$set": general},
+                return_document=ReturnDocument.AFTER,
+                session=session
+            )
+
+            updated = {}
+            for key, data in children.items():
+                updated[key] = await INCIDENT_CHILDREN[key].find_one_and_update(
+                    {"generalInformation_ref_id": general_id, "active": True},
+                    {
+                        "$set": {**data, "updatedAt": now},
+                        "$setOnInsert": {"active": True, "createdAt": now}
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                    session=session
+                )
+            await apply_incident_changes([(before, after)], session=session)
+
+    return before, {"generalInformation": after, **updated}
+
+
+async def soft_delete_incident(general_id: ObjectId) -> dict:
+    """
+    Marca el reporte y sus hijos como inactivos en una transacción.
+    Devuelve general information antes del cambio, o None si no existe.
+    """
+    now = datetime.now(DENVER_TZ)
+    async with await client.start_session() as session:
+        async with session.start_transaction():
+            before = await generalinformations_collection.find_one_and_update(
+                {"_id": general_id, "active": True},
+                {"$set": {"active": False, "updatedAt": now}},
+                session=session
+            )
+            if not before:
+                return None
+            for collection in INCIDENT_CHILDREN.values():
+                await collection.update_many(
+                    {"generalInformation_ref_id": general_id, "active": True},
+                    {"$set": {"active": False, "updatedAt": now}},
+                    session=session
+                )
+            await apply_incident_changes([(before, None)], session=session)
+    return before
+
+
+async def get_incident_children(general_id: ObjectId) -> dict:
+    """Trae los hijos activos del reporte en paralelo (una consulta por colección)."""
+    keys = list(INCIDENT_CHILDREN)
+    docs = await asyncio.gather(*[
+        INCIDENT_CHILDREN[key].find_one({"generalInformation_ref_id": general_id, "active": True})
+        for key in keys
+    ])
+    return dict(zip(keys, docs))
+
+
+async def resolve_during_the_incident_names(doc: dict) -> dict:
+    """Nombres de dirección, clima y condición del camino desde los catálogos en caché."""
+    names = {}
+    for field, (catalog, name_field) in DURING_THE_INCIDENT_REFS.items():
+        names[name_field] = await get_catalog(catalog).name(doc.get(field)) or ""
+    return names
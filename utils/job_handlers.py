@@ -0,0 +1,25 @@
+# utils/job_handlers.py
+# Handlers de la cola de jobs. Importar este módulo registra los handlers.
+import asyncio
+from bson import ObjectId
+
+from utils.job_queue import job_handler
+from utils.email_utils import send_email
+from utils.bulk_email import run_email_batch
+from utils.rollups import repair_coversheet_summaries
+
+
+@job_handler("email.send")
+async def handle_send_email(payload: dict):
+    await asyncio.to_thread(send_email, payload["to"], payload["subject"], payload["message"])
+
+
+@job_handler("email.bulk")
+async def handle_bulk_email(payload: dict):
+    # run_email_batch solo procesa pendientes, así que un reintento continúa donde quedó
+    await run_email_batch(ObjectId(payload["batch_id"]))
+
+
+@job_handler("coversheets.repair_summaries")
+async def handle_repair_coversheet_summaries(payload: dict):
+    return await repair_coversheet_summaries()
@@ -0,0 +1,112 @@
+# utils/job_queue.py
+import os
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from config.database import jobs_collection
+
+# Tiempo que un worker "reserva" un job. Si no termina ni renueva la reserva
+# antes de que expire, otro worker lo vuelve a tomar.
+JOB_VISIBILITY_TIMEOUT_SECONDS = int(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = int(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+
+# Registro de handlers: nombre del job -> corutina que recibe el payload
+job_handlers = {}
+
+
+def job_handler(name: str):
+    """Decorador para registrar el handler de un tipo de job."""
+    def decorator(fn):
+        job_handlers[name] = fn
+        return fn
+    return decorator
+
+
+def _now():
+    return datetime.now(ZoneInfo("America/Denver"))
+
+
+async def enqueue_job(name: str, payload: dict = None, max_attempts: int = JOB_MAX_ATTEMPTS, delay_seconds: int = 0) -> ObjectId:
+    """Guarda un job en la cola. El payload debe ser serializable a BSON."""
+    now = _now()
+    result = await jobs_collection.insert_one({
+        "name": name,
+        "payload": payload or {},
+        "status": "queued",
+        "attempts": 0,
+        "maxAttempts": max_attempts,
+        "availableAt": now + timedelta(seconds=delay_seconds),
+        "leaseToken": None,
+        "lastError": None,
+        "createdAt": now,
+        "startedAt": None,
+        "finishedAt": None
+    })
+    return result.inserted_id
+
+
+async def lease_job(worker_id: str, visibility_timeout: int = JOB_VISIBILITY_TIMEOUT_SECONDS):
+    """
+    Toma el siguiente job disponible de forma atómica (find_one_and_update).
+
+    Un job está disponible si está en cola y ya llegó su availableAt, o si está
+    "running" pero su reserva expiró (el worker que lo tenía murió).
+    """
+    now = _now()
+    return await jobs_collection.find_one_and_update(
+        {
+            "status": {"$in": ["queued", "running"]},
+            "availableAt": {"$lte": now}
+        },
+        {
+            "$set": {
+                "status": "running",
+                "availableAt": now + timedelta(seconds=visibility_timeout),
+                "leaseToken": ObjectId(),
+                "leasedBy": worker_id,
+                "startedAt": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("availableAt", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def extend_lease(job: dict, visibility_timeout: int = JOB_VISIBILITY_TIMEOUT_SECONDS) -> bool:
+    """Renueva la reserva de un job largo. Devuelve False si ya la perdió."""
+    res = await jobs_collection.update_one(
+        {"_id": job["_id"], "leaseToken": job["leaseToken"], "status": "running"},
+        {"$set": {"availableAt": _now() + timedelta(seconds=visibility_timeout)}}
+    )
+    return res.matched_count == 1
+
+
+async def complete_job(job: dict, result=None):
+    await jobs_collection.update_one(
+        {"_id": job["_id"], "leaseToken": job["leaseToken"]},
+        {"$set": {"status": "done", "result": result, "finishedAt": _now(), "leaseToken": None}}
+    )
+
+
+async def fail_job(job: dict, error: str):
+    """
+    Registra el error. Si quedan intentos, el job vuelve a la cola con
+    backoff exponencial; si no, queda como "dead" para revisión manual.
+    """
+    now = _now()
+    if job["attempts"] >= job.get("maxAttempts", JOB_MAX_ATTEMPTS):
+        update = {"status": "dead", "finishedAt": now}
+    else:
+        delay = JOB_RETRY_BASE_SECONDS * (2 ** (job["attempts"] - 1))
+        update = {"status": "queued", "availableAt": now + timedelta(seconds=delay)}
+
+    update.update({"lastError": error, "leaseToken": None})
+    await jobs_collection.update_one(
+        {"_id": job["_id"], "leaseToken": job["leaseToken"]},
+        {"$set": update}
+    )
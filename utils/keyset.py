@@ -0,0 +1,40 @@
+# utils/keyset.py
+# Paginación por cursor (keyset): en lugar de skip se continúa desde el
+# último (campo de orden, _id) visto, así cada página usa el índice.
+import base64
+
+from bson import json_util
+
+
+def encode_cursor(value, doc_id) -> str:
+    """Cursor opaco con el valor de orden y el _id del último documento."""
+    raw = json_util.dumps([value, doc_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Lanza ValueError si el cursor no es válido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        value, doc_id = json_util.loads(raw)
+    except Exception:
+        raise ValueError("cursor inválido")
+    return value, doc_id
+
+
+def keyset_filter(field: str, value, doc_id, descending: bool = True) -> dict:
+    """
+    Documentos que van después de (value, doc_id) en el orden
+    [(field, dirección), (_id, dirección)]. Los nulos quedan al final en orden
+    descendente (MongoDB los ordena como el menor valor).
+    """
+    op = "$lt" if descending else "$gt"
+    if value is None:
+        if descending:
+            return {field: None, "_id": {op: doc_id}}
+        return {"$or": [{field: {"$ne": None}}, {field: None, "_id": {op: doc_id}}]}
+
+    branches = [{field: {op: value}}, {field: value, "_id": {op: doc_id}}]
+    if descending:
+        branches.append({field: None})
+    return {"$or": branches}
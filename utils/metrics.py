@@ -0,0 +1,180 @@
+# utils/metrics.py
+# Métricas en memoria con salida en formato de texto de Prometheus.
+# Cada proceso (worker de uvicorn) lleva sus propias métricas.
+import threading
+import time
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=None) -> str:
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, labels=(), amount: float = 1.0):
+        self.inc(labels, -amount)
+
+    def set(self, labels=(), value: float = 0.0):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram:
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels=(), value: float = 0.0):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, dict(state, buckets=list(state["buckets"]))) for labels, state in self._values.items()]
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["buckets"]):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket",
+                    _format_labels(self.labelnames, labels, ("le", _format_value(bound))),
+                    cumulative
+                )
+            yield f"{self.name}_sum", _format_labels(self.labelnames, labels), state["sum"]
+            yield f"{self.name}_count", _format_labels(self.labelnames, labels), state["count"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "Duración de los requests HTTP por ruta",
+    ["method", "route", "status"]
+)
+http_requests_total = registry.counter(
+    "http_requests_total",
+    "Total de requests HTTP por ruta y código de respuesta",
+    ["method", "route", "status"]
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight",
+    "Requests HTTP en curso",
+    ["method"]
+)
+
+
+# ===========================
+# TIEMPOS POR REQUEST (Server-Timing)
+# ===========================
+
+# Acumuladores del request actual. Motor copia el contexto al ejecutar en su
+# thread pool, así que el listener de pymongo suma sobre el mismo dict.
+request_timings: ContextVar = ContextVar("request_timings", default=None)
+
+
+def start_request_timing() -> dict:
+    timings = {"db": 0.0, "serialize": 0.0}
+    request_timings.set(timings)
+    return timings
+
+
+def add_request_timing(kind: str, seconds: float):
+    timings = request_timings.get()
+    if timings is not None:
+        timings[kind] = timings.get(kind, 0.0) + seconds
+
+
+class timed:
+    """Context manager que suma el tiempo del bloque al acumulador indicado."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        add_request_timing(self.kind, time.perf_counter() - self._start)
+        return False
@@ -0,0 +1,186 @@
+# utils/productivity_report.py
+# Productividad por driver y por ruta: minutos de ruta, turnaround en landfill
+# y loads por día. Los días cerrados se guardan en caché.
+import asyncio
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from pymongo import UpdateOne
+
+from config.database import database, reporting_database, productivity_daily_cache_collection
+from utils.date_utils import denver_midnight, days_in_range
+
+TZ_NAME = "America/Denver"
+
+
+def _as_datetime(field: str):
+    """
+    Expresión de agregación que convierte un campo de hora a fecha.
+    Acepta fechas, strings ISO completos, o solo la hora ("08:30"),
+    en cuyo caso se combina con el día del coversheet.
+    """
+    return {"$switch": {
+        "branches": [
+            {"case": {"$eq": [{"$type": field}, "date"]}, "then": field},
+            {"case": {"$eq": [{"$type": field}, "string"]}, "then": {"$dateFromString": {
+                "dateString": {"$cond": [
+                    {"$lte": [{"$strLenCP": field}, 8]},
+                    {"$concat": ["$day", "T", field]},
+                    field
+                ]},
+                "timezone": TZ_NAME,
+                "onError": None,
+                "onNull": None
+            }}}
+        ],
+        "default": None
+    }}
+
+
+def _minutes_between(start_field: str, end_field: str):
+    """Minutos entre dos horas; si la salida es menor (pasó medianoche) suma un día."""
+    diff = {"$divide": [{"$subtract": [_as_datetime(end_field), _as_datetime(start_field)]}, 60000]}
+    return {"$let": {
+        "vars": {"diff": diff},
+        "in": {"$cond": [
+            {"$eq": ["$$diff", None]},
+            None,
+            {"$cond": [{"$lt": ["$$diff", 0]}, {"$add": ["$$diff", 1440]}, "$$diff"]}
+        ]}
+    }}
+
+
+def _daily_pipeline(day_dates: list) -> list:
+    """Agrupa por día, driver y ruta los minutos de cada load de esos días."""
+    return [
+        {"$match": {"active": True, "date": {"$in": day_dates}}},
+        {"$lookup": {
+            "from": "loads",
+            "localField": "_id",
+            "foreignField": "coversheet_ref_id",
+            "pipeline": [
+                {"$match": {"active": True}},
+                {"$project": {
+                    "firstStopTime": 1, "lastStopTime": 1,
+                    "landFillTimeIn": 1, "landFillTimeOut": 1,
+                    "route_id": 1, "routeNumber": 1
+                }}
+            ],
+            "as": "load"
+        }},
+        {"$unwind": "$load"},
+        {"$set": {"day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date", "timezone": TZ_NAME}}}},
+        {"$set": {
+            "route_id": {"$ifNull": ["$load.route_id", "$route_id"]},
+            "routeNumber": {"$ifNull": ["$load.routeNumber", "$routeNumber"]},
+            "routeMinutes": _minutes_between("$load.firstStopTime", "$load.lastStopTime"),
+            "landfillMinutes": _minutes_between("$load.landFillTimeIn", "$load.landFillTimeOut")
+        }},
+        {"$group": {
+            "_id": {"day": "$day", "driver_id": "$driver_id", "route_id": "$route_id"},
+            "driverName": {"$last": "$driverName"},
+            "routeNumber": {"$last": "$routeNumber"},
+            "loads": {"$sum": 1},
+            "routeMinutes": {"$sum": {"$ifNull": ["$routeMinutes", 0]}},
+            "routeSamples": {"$sum": {"$cond": [{"$eq": ["$routeMinutes", None]}, 0, 1]}},
+            "landfillMinutes": {"$sum": {"$ifNull": ["$landfillMinutes", 0]}},
+            "landfillSamples": {"$sum": {"$cond": [{"$eq": ["$landfillMinutes", None]}, 0, 1]}}
+        }}
+    ]
+
+
+async def _compute_days(days: list, source) -> dict:
+    """Calcula las filas de los días indicados en source (base de datos). Devuelve {día: [filas]}."""
+    result = {day.isoformat(): [] for day in days}
+    if not days:
+        return result
+
+    pipeline = _daily_pipeline([denver_midnight(day) for day in days])
+    async for row in source.coversheets.aggregate(pipeline):
+        key = row.pop("_id")
+        row["driver_id"] = str(key["driver_id"]) if key.get("driver_id") else None
+        row["route_id"] = str(key["route_id"]) if key.get("route_id") else None
+        result.setdefault(key["day"], []).append(row)
+    return result
+
+
+async def get_daily_rows(start, end) -> dict:
+    """
+    Filas diarias del rango. Los días cerrados (antes de hoy en Denver) se
+    leen del caché; los que faltan y el día de hoy se calculan en el servidor.
+
+    Los días cerrados que se van a guardar en el caché se calculan en el
+    primario: un secundario atrasado podría no tener aún la edición que
+    invalidó el día, y el caché quedaría viejo para siempre. Hoy no se guarda,
+    así que se lee del nodo de reportes.
+    """
+    today = datetime.now(ZoneInfo(TZ_NAME)).date()
+    days = days_in_range(start, end)
+    closed = [d.isoformat() for d in days if d < today]
+
+    rows_by_day = {}
+    async for doc in productivity_daily_cache_collection.find({"day": {"$in": closed}}):
+        rows_by_day[doc["day"]] = doc["rows"]
+
+    missing = [d for d in days if d.isoformat() not in rows_by_day]
+    computed, current = await asyncio.gather(
+        _compute_days([d for d in missing if d < today], database),
+        _compute_days([d for d in missing if d >= today], reporting_database)
+    )
+    rows_by_day.update(computed)
+    rows_by_day.update(current)
+
+    now = datetime.now(ZoneInfo(TZ_NAME))
+    ops = [
+        UpdateOne({"day": day}, {"$set": {"rows": rows, "computedAt": now}}, upsert=True)
+        for day, rows in computed.items()
+    ]
+    if ops:
+        await productivity_daily_cache_collection.bulk_write(ops, ordered=False)
+
+    return rows_by_day
+
+
+async def invalidate_productivity_days(days):
+    """Borra del caché los días que cambiaron (por ejemplo al editar un load)."""
+    days = sorted(set(days))
+    if days:
+        await productivity_daily_cache_collection.delete_many({"day": {"$in": days}})
+
+
+def summarize(rows_by_day: dict, key_field: str, name_field: str) -> list:
+    """Combina las filas diarias por driver o por ruta."""
+    summary = {}
+    for day, rows in rows_by_day.items():
+        for row in rows:
+            key = row.get(key_field)
+            item = summary.setdefault(key, {
+                key_field: key,
+                name_field: row.get(name_field) or "",
+                "days": set(),
+                "loads": 0,
+                "routeMinutes": 0.0,
+                "routeSamples": 0,
+                "landfillMinutes": 0.0,
+                "landfillSamples": 0
+            })
+            item["days"].add(day)
+            for field in ("loads", "routeMinutes", "routeSamples", "landfillMinutes", "landfillSamples"):
+                item[field] += row.get(field, 0)
+
+    result = []
+    for item in summary.values():
+        days_worked = len(item.pop("days"))
+        route_samples = item.pop("routeSamples")
+        landfill_samples = item.pop("landfillSamples")
+        item.update({
+            "daysWorked": days_worked,
+            "routeMinutes": round(item["routeMinutes"], 1),
+            "avgRouteMinutes": round(item["routeMinutes"] / route_samples, 1) if route_samples else None,
+            "landfillMinutes": round(item["landfillMinutes"], 1),
+            "avgLandfillTurnaroundMinutes": round(item["landfillMinutes"] / landfill_samples, 1) if landfill_samples else None,
+            "loadsPerDay": round(item["loads"] / days_worked, 2) if days_worked else 0
+        })
+        result.append(item)
+
+    return sorted(result, key=lambda r: r["loads"], reverse=True)
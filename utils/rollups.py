@@ -0,0 +1,302 @@
+# utils/rollups.py
+# Rollups mantenidos de forma incremental con $inc desde los handlers de escritura.
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from pymongo import UpdateOne
+
+from config.database import (
+    daily_load_rollups_collection,
+    coversheets_collection,
+    spare_truck_rollups_collection,
+    incident_monthly_rollups_collection
+)
+from utils.date_utils import denver_day_key, denver_month_start, minutes_between
+from utils.productivity_report import invalidate_productivity_days
+
+# Campos numéricos del load que se acumulan por día
+LOAD_ROLLUP_FIELDS = ("tons", "grossWeight", "tareWeight")
+
+# Campos del spare truck info que se acumulan por spareTruckNumber
+SPARE_TRUCK_ROLLUP_FIELDS = ("miles", "fuel", "hoursOut")
+
+# Contadores del rollup mensual de incidentes -> bandera desnormalizada en general information
+INCIDENT_ROLLUP_FLAGS = {"injuries": "wasAnyOneHurt", "towed": "wereAnyVehiclesTowed"}
+
+
+def _number(value) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else 0.0
+
+
+def _add_summary_delta(summary_deltas: dict, doc: dict, field: str, amount: float):
+    """Acumula un delta para summary.<field> del coversheet padre del documento."""
+    coversheet_id = doc.get("coversheet_ref_id")
+    if not coversheet_id or not amount:
+        return
+    delta = summary_deltas.setdefault(coversheet_id, {})
+    delta[f"summary.{field}"] = delta.get(f"summary.{field}", 0) + amount
+
+
+async def _apply_summary_deltas(summary_deltas: dict):
+    """Aplica los contadores materializados de cada coversheet en un solo bulk_write."""
+    ops = [
+        UpdateOne({"_id": coversheet_id}, {"$inc": delta})
+        for coversheet_id, delta in summary_deltas.items()
+        if any(delta.values())
+    ]
+    if ops:
+        await coversheets_collection.bulk_write(ops, ordered=False)
+
+
+async def _resolve_load_day(load: dict, cache: dict):
+    """Día del load: su campo date o, para loads antiguos, la fecha del coversheet."""
+    if load.get("date"):
+        return load["date"]
+
+    coversheet_id = load.get("coversheet_ref_id")
+    if not coversheet_id:
+        return None
+    if coversheet_id not in cache:
+        coversheet = await coversheets_collection.find_one({"_id": coversheet_id}, {"date": 1})
+        cache[coversheet_id] = coversheet.get("date") if coversheet else None
+    return cache[coversheet_id]
+
+
+async def apply_load_changes(changes: list):
+    """
+    Aplica cambios de loads a daily_load_rollups y al resumen del coversheet
+    (summary.loadCount, summary.totalTons).
+
+    changes: lista de (antes, después). Usar (None, load) al crear,
+    (load, None) al eliminar y (existente, actualizado) al editar.
+    Solo cuentan los loads activos, así que un soft delete resta.
+    Todos los deltas van en un solo bulk_write. También invalida el caché
+    de productividad de los días afectados.
+    """
+    deltas = {}
+    names = {}
+    coversheet_days = {}
+    touched_days = set()
+    summary_deltas = {}
+
+    for before, after in changes:
+        for load, sign in ((before, -1), (after, 1)):
+            if not load or not load.get("active", True):
+                continue
+            _add_summary_delta(summary_deltas, load, "loadCount", sign)
+            _add_summary_delta(summary_deltas, load, "totalTons", sign * _number(load.get("tons")))
+
+            day = await _resolve_load_day(load, coversheet_days)
+            if day is None:
+                continue
+            touched_days.add(denver_day_key(day))
+
+            key = (day, load.get("route_id"), load.get("landFill_id"), load.get("material_id"))
+            delta = deltas.setdefault(key, {"loads": 0, **{f: 0.0 for f in LOAD_ROLLUP_FIELDS}})
+            delta["loads"] += sign
+            for field in LOAD_ROLLUP_FIELDS:
+                delta[field] += sign * _number(load.get(field))
+
+            names[key] = {
+                "routeNumber": load.get("routeNumber", ""),
+                "landfillName": load.get("landfillName", ""),
+                "materialName": load.get("materialName", "")
+            }
+
+    now = datetime.now(ZoneInfo("America/Denver"))
+    ops = []
+    for (day, route_id, landfill_id, material_id), delta in deltas.items():
+        if not any(delta.values()):
+            continue
+        ops.append(UpdateOne(
+            {"day": day, "route_id": route_id, "landFill_id": landfill_id, "material_id": material_id},
+            {"$inc": delta, "$set": {**names[(day, route_id, landfill_id, material_id)], "updatedAt": now}},
+            upsert=True
+        ))
+
+    if ops:
+        await daily_load_rollups_collection.bulk_write(ops, ordered=False)
+
+    await _apply_summary_deltas(summary_deltas)
+    await invalidate_productivity_days(touched_days)
+
+
+async def apply_incident_changes(changes: list, session=None):
+    """
+    Aplica cambios de reportes de incidentes (general information) a
+    incident_monthly_rollups: incidentes, heridos y vehículos remolcados por
+    mes, tipo de incidente y departamento.
+
+    changes: lista de (antes, después), igual que apply_load_changes.
+    Solo cuentan los reportes activos con fecha. session: transacción del
+    reporte, para que el rollup se confirme o se descarte junto con él.
+    """
+    deltas = {}
+    names = {}
+
+    for before, after in changes:
+        for incident, sign in ((before, -1), (after, 1)):
+            if not incident or not incident.get("active", True) or not incident.get("date"):
+                continue
+            key = (denver_month_start(incident["date"]), incident.get("typeOfIncident_id"), incident.get("dept_id"))
+            delta = deltas.setdefault(key, {"incidents": 0, **{f: 0 for f in INCIDENT_ROLLUP_FLAGS}})
+            delta["incidents"] += sign
+            for field, flag in INCIDENT_ROLLUP_FLAGS.items():
+                if incident.get(flag) is True:
+                    delta[field] += sign
+            names[key] = {
+                "typeOfIncidentName": incident.get("typeOfIncidentName", ""),
+                "deptName": incident.get("deptName", "")
+            }
+
+    now = datetime.now(ZoneInfo("America/Denver"))
+    ops = []
+    for (month, type_id, dept_id), delta in deltas.items():
+        if not any(delta.values()):
+            continue
+        ops.append(UpdateOne(
+            {"month": month, "typeOfIncident_id": type_id, "dept_id": dept_id},
+            {"$inc": delta, "$set": {**names[(month, type_id, dept_id)], "updatedAt": now}},
+            upsert=True
+        ))
+
+    if ops:
+        await incident_monthly_rollups_collection.bulk_write(ops, ordered=False, session=session)
+
+
+def spare_truck_derived_fields(data: dict) -> dict:
+    """
+    Millas y horas fuera del yard de un uso de spare truck, calculadas al
+    guardar. data debe traer startMiles, endMiles, leaveYard, backInYard y date.
+    """
+    miles = None
+    if isinstance(data.get("startMiles"), (int, float)) and isinstance(data.get("endMiles"), (int, float)):
+        miles = round(data["endMiles"] - data["startMiles"], 2)
+        if miles < 0:
+            miles = None  # Odómetro mal capturado
+
+    minutes = minutes_between(data.get("leaveYard"), data.get("backInYard"), data.get("date"))
+    return {
+        "miles": miles,
+        "hoursOut": round(minutes / 60, 2) if minutes is not None else None
+    }
+
+
+async def apply_spare_truck_changes(changes: list):
+    """
+    Aplica cambios de spare truck infos a spare_truck_rollups (por
+    spareTruckNumber) y a summary.spareTruckCount del coversheet.
+    Mismo formato de changes que apply_load_changes.
+    """
+    deltas = {}
+    summary_deltas = {}
+    for before, after in changes:
+        for spare, sign in ((before, -1), (after, 1)):
+            if not spare or not spare.get("active", True):
+                continue
+            _add_summary_delta(summary_deltas, spare, "spareTruckCount", sign)
+            if not spare.get("spareTruckNumber"):
+                continue
+            delta = deltas.setdefault(
+                spare["spareTruckNumber"],
+                {"usages": 0, "milesWithFuel": 0.0, "fuelWithMiles": 0.0, **{f: 0.0 for f in SPARE_TRUCK_ROLLUP_FIELDS}}
+            )
+            delta["usages"] += sign
+            for field in SPARE_TRUCK_ROLLUP_FIELDS:
+                delta[field] += sign * _number(spare.get(field))
+            # Usos con millas y combustible: base para millas por unidad de combustible
+            if _number(spare.get("miles")) and _number(spare.get("fuel")):
+                delta["milesWithFuel"] += sign * _number(spare.get("miles"))
+                delta["fuelWithMiles"] += sign * _number(spare.get("fuel"))
+
+    now = datetime.now(ZoneInfo("America/Denver"))
+    ops = [
+        UpdateOne(
+            {"spareTruckNumber": number},
+            {"$inc": delta, "$set": {"updatedAt": now}},
+            upsert=True
+        )
+        for number, delta in deltas.items()
+        if any(delta.values())
+    ]
+    if ops:
+        await spare_truck_rollups_collection.bulk_write(ops, ordered=False)
+
+    await _apply_summary_deltas(summary_deltas)
+
+
+async def apply_downtime_changes(changes: list):
+    """
+    Aplica cambios de downtimes a summary.downtimeMinutes del coversheet.
+    Mismo formato de changes que apply_load_changes.
+    """
+    summary_deltas = {}
+    for before, after in changes:
+        for downtime, sign in ((before, -1), (after, 1)):
+            if not downtime or not downtime.get("active", True):
+                continue
+            _add_summary_delta(summary_deltas, downtime, "downtimeMinutes", sign * _number(downtime.get("durationMinutes")))
+
+    await _apply_summary_deltas(summary_deltas)
+
+
+def _child_summary_lookup(collection: str, fields: dict) -> dict:
+    return {"$lookup": {
+        "from": collection,
+        "localField": "_id",
+        "foreignField": "coversheet_ref_id",
+        "pipeline": [
+            {"$match": {"active": True}},
+            {"$group": {"_id": None, **fields}}
+        ],
+        "as": collection
+    }}
+
+
+async def repair_coversheet_summaries(query: dict = None, batch_size: int = 500) -> dict:
+    """
+    Recalcula el resumen de los coversheets (por defecto los activos) desde
+    sus loads, downtimes y spare truck infos, y corrige solo los que se
+    desviaron. Escribe un bulk_write por lote.
+    """
+    pipeline = [
+        {"$match": query or {"active": True}},
+        {"$project": {"summary": 1}},
+        _child_summary_lookup("loads", {
+            "loadCount": {"$sum": 1},
+            "totalTons": {"$sum": {"$cond": [{"$isNumber": "$tons"}, "$tons", 0]}}
+        }),
+        _child_summary_lookup("downtimes", {
+            "downtimeMinutes": {"$sum": {"$cond": [{"$isNumber": "$durationMinutes"}, "$durationMinutes", 0]}}
+        }),
+        _child_summary_lookup("sparetruckinfos", {"spareTruckCount": {"$sum": 1}})
+    ]
+
+    checked = repaired = 0
+    ops = []
+    async for doc in coversheets_collection.aggregate(pipeline):
+        checked += 1
+        loads = doc["loads"][0] if doc["loads"] else {}
+        downtimes = doc["downtimes"][0] if doc["downtimes"] else {}
+        spares = doc["sparetruckinfos"][0] if doc["sparetruckinfos"] else {}
+        expected = {
+            "loadCount": loads.get("loadCount", 0),
+            "totalTons": round(loads.get("totalTons", 0), 4),
+            "downtimeMinutes": round(downtimes.get("downtimeMinutes", 0), 4),
+            "spareTruckCount": spares.get("spareTruckCount", 0)
+        }
+        current = doc.get("summary") or {}
+        drifted = any(abs(_number(current.get(k)) - v) > 1e-6 for k, v in expected.items())
+        if drifted or set(current) != set(expected):
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"summary": expected}}))
+
+        if len(ops) >= batch_size:
+            await coversheets_collection.bulk_write(ops, ordered=False)
+            repaired += len(ops)
+            ops = []
+
+    if ops:
+        await coversheets_collection.bulk_write(ops, ordered=False)
+        repaired += len(ops)
+
+    return {"checked": checked, "repaired": repaired}
@@ -0,0 +1,170 @@
+# utils/scale_import.py
+# Conciliación de tickets de la báscula del landfill (CSV) contra los loads.
+import os
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from pymongo import UpdateOne
+
+from config.database import loads_collection
+from utils.csv_stream import iter_csv_batches, parse_csv_number, pick_column
+from utils.rollups import apply_load_changes
+
+SCALE_IMPORT_BATCH_SIZE = int(os.getenv("SCALE_IMPORT_BATCH_SIZE", "500"))
+# Diferencia máxima (en las unidades del CSV) para considerar que un peso coincide
+SCALE_WEIGHT_TOLERANCE = float(os.getenv("SCALE_WEIGHT_TOLERANCE", "0.01"))
+# Máximo de tickets / loads sin pareja (y de filas con error) que se listan en la respuesta
+SCALE_UNMATCHED_REPORT_LIMIT = 500
+
+TICKET_COLUMNS = ("ticketnumber", "ticket", "ticketno", "ticketnum")
+WEIGHT_COLUMNS = {
+    "grossWeight": ("grossweight", "gross"),
+    "tareWeight": ("tareweight", "tare"),
+    "tons": ("tons", "nettons", "net")
+}
+
+
+def _parse_scale_row(row: dict) -> dict:
+    """Ticket y pesos de una fila del CSV. Lanza ValueError si algo no es válido."""
+    ticket = (pick_column(row, TICKET_COLUMNS) or "").strip()
+    if not ticket:
+        raise ValueError("Fila sin número de ticket")
+
+    weights = {}
+    for field, aliases in WEIGHT_COLUMNS.items():
+        try:
+            value = parse_csv_number(pick_column(row, aliases))
+        except ValueError:
+            raise ValueError(f"{field} no es un número")
+        if value is not None:
+            weights[field] = value
+    if not weights:
+        raise ValueError("Fila sin pesos (gross, tare o tons)")
+    return {"ticket": ticket, "weights": weights}
+
+
+def _reconcile(load: dict, scale: dict, on_mismatch: str) -> tuple:
+    """
+    Compara los pesos del load con los de la báscula.
+    Devuelve (status, cambios a guardar en el load, diferencias).
+    - filled: el load no tenía esos pesos y se llenan
+    - matched: coinciden
+    - mismatch: difieren y solo se marca el load
+    - overwritten: difieren y se reemplazan (on_mismatch="overwrite")
+    """
+    fill, differences = {}, {}
+    for field, scale_value in scale.items():
+        current = load.get(field)
+        if not isinstance(current, (int, float)) or isinstance(current, bool):
+            fill[field] = scale_value
+        elif abs(current - scale_value) > SCALE_WEIGHT_TOLERANCE:
+            differences[field] = {"load": current, "scale": scale_value}
+
+    if differences and on_mismatch == "overwrite":
+        return "overwritten", {**fill, **{f: d["scale"] for f, d in differences.items()}}, differences
+    if differences:
+        return "mismatch", fill, differences
+    return ("filled" if fill else "matched"), fill, differences
+
+
+async def import_scale_tickets(upload, on_mismatch: str = "flag", date_filter: dict = None, source: str = None) -> dict:
+    """
+    Concilia un CSV de la báscula con los loads por ticketNumber.
+
+    Por cada lote del CSV: una consulta $in por ticketNumber (índice único
+    parcial), join en memoria por ticket, un bulk_write con los resultados y
+    los rollups actualizados con apply_load_changes.
+
+    Si se pasa date_filter, al final también lista los loads de ese rango
+    con ticket que no venían en el CSV.
+    """
+    now = datetime.now(ZoneInfo("America/Denver"))
+    counts = {"rows": 0, "matched": 0, "filled": 0, "mismatch": 0, "overwritten": 0, "duplicates": 0}
+    errors = []
+    errors_count = 0
+    unmatched_tickets = []
+    unmatched_tickets_count = 0
+    seen_tickets = set()
+
+    async for batch in iter_csv_batches(upload, SCALE_IMPORT_BATCH_SIZE):
+        rows = {}
+        for row_number, row in batch:
+            counts["rows"] += 1
+            try:
+                parsed = _parse_scale_row(row)
+            except ValueError as ve:
+                errors_count += 1
+                if len(errors) < SCALE_UNMATCHED_REPORT_LIMIT:
+                    errors.append({"row": row_number, "error": str(ve)})
+                continue
+            if parsed["ticket"] in seen_tickets:
+                counts["duplicates"] += 1
+                errors_count += 1
+                if len(errors) < SCALE_UNMATCHED_REPORT_LIMIT:
+                    errors.append({"row": row_number, "ticket": parsed["ticket"], "error": "Ticket repetido en el archivo"})
+                continue
+            seen_tickets.add(parsed["ticket"])
+            rows[parsed["ticket"]] = parsed["weights"]
+
+        if not rows:
+            continue
+
+        # Hash join: tickets del lote contra los loads activos con esos tickets
+        loads = {}
+        cursor = loads_collection.find({"ticketNumber": {"$in": list(rows)}, "active": True})
+        async for load in cursor:
+            loads[load["ticketNumber"]] = load
+
+        ops = []
+        changes = []
+        for ticket, weights in rows.items():
+            load = loads.get(ticket)
+            if load is None:
+                unmatched_tickets_count += 1
+                if len(unmatched_tickets) < SCALE_UNMATCHED_REPORT_LIMIT:
+                    unmatched_tickets.append(ticket)
+                continue
+
+            result, updates, differences = _reconcile(load, weights, on_mismatch)
+            counts[result] += 1
+            scale_check = {
+                "status": result,
+                "scale": weights,
+                "differences": differences,
+                "source": source,
+                "checkedAt": now
+            }
+            ops.append(UpdateOne({"_id": load["_id"]}, {"$set": {**updates, "scaleCheck": scale_check, "updatedAt": now}}))
+            if updates:
+                changes.append((load, {**load, **updates}))
+
+        if ops:
+            await loads_collection.bulk_write(ops, ordered=False)
+        if changes:
+            await apply_load_changes(changes)
+
+    unmatched_loads = []
+    unmatched_loads_count = 0
+    if date_filter:
+        query = {"active": True, "date": date_filter, "ticketNumber": {"$gt": ""}}
+        async for load in loads_collection.find(query, {"ticketNumber": 1, "date": 1, "coversheet_ref_id": 1}):
+            if load["ticketNumber"] in seen_tickets:
+                continue
+            unmatched_loads_count += 1
+            if len(unmatched_loads) < SCALE_UNMATCHED_REPORT_LIMIT:
+                unmatched_loads.append({
+                    "id": str(load["_id"]),
+                    "ticketNumber": load["ticketNumber"],
+                    "date": load["date"].isoformat() if load.get("date") else None,
+                    "coversheet_ref_id": str(load["coversheet_ref_id"]) if load.get("coversheet_ref_id") else None
+                })
+
+    return {
+        **counts,
+        "errors": errors,
+        "errorsCount": errors_count,
+        "unmatchedTickets": unmatched_tickets,
+        "unmatchedTicketsCount": unmatched_tickets_count,
+        "unmatchedLoads": unmatched_loads,
+        "unmatchedLoadsCount": unmatched_loads_count
+    }
@@ -0,0 +1,101 @@
+# utils/signatures.py
+# Firmas de empleados: la imagen va a GridFS (bucket "signatures") y el
+# documento de employeeSignatures solo guarda el ID del archivo y su sha256.
+import base64
+import binascii
+import hashlib
+import os
+import re
+
+from config.database import signatures_bucket, signatureFiles_collection
+
+DATA_URL_RE = re.compile(r"^data:(?P<type>[\w.+-]+/[\w.+-]+)?(?:;[\w=.-]+)*?;base64,(?P<data>.*)$", re.DOTALL)
+
+DEFAULT_CONTENT_TYPE = "image/png"
+# Solo imágenes raster: un SVG (o HTML) servido desde la API podría ejecutar scripts
+SIGNATURE_CONTENT_TYPES = ("image/png", "image/jpeg", "image/webp")
+SIGNATURE_MAX_BYTES = int(os.getenv("SIGNATURE_MAX_BYTES", str(1024 * 1024)))
+
+
+def _sniff_content_type(data: bytes):
+    """Tipo de imagen según los primeros bytes, o None si no es PNG, JPEG ni WebP."""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def decode_signature(value: str) -> tuple:
+    """
+    (bytes, content type) de una firma en data URL ("data:image/png;base64,...")
+    o en base64 sin prefijo. El tipo se toma del contenido, no del prefijo.
+    Lanza ValueError si no es base64 válido, si pasa de SIGNATURE_MAX_BYTES o
+    si no es PNG, JPEG ni WebP.
+    """
+    value = value.strip()
+    match = DATA_URL_RE.match(value)
+    if match:
+        declared = (match.group("type") or DEFAULT_CONTENT_TYPE).lower()
+        if declared not in SIGNATURE_CONTENT_TYPES:
+            raise ValueError(f"employeeSignature debe ser {', '.join(SIGNATURE_CONTENT_TYPES)}")
+        value = match.group("data")
+    value = "".join(value.split())
+    # Se revisa el tamaño antes de decodificar (4 caracteres base64 = 3 bytes)
+    if len(value) // 4 * 3 > SIGNATURE_MAX_BYTES + 2:
+        raise ValueError(f"employeeSignature pasa de {SIGNATURE_MAX_BYTES} bytes")
+    try:
+        data = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("employeeSignature no es una imagen en base64 válida")
+    if not data:
+        raise ValueError("employeeSignature está vacía")
+    if len(data) > SIGNATURE_MAX_BYTES:
+        raise ValueError(f"employeeSignature pasa de {SIGNATURE_MAX_BYTES} bytes")
+    content_type = _sniff_content_type(data)
+    if not content_type:
+        raise ValueError(f"employeeSignature debe ser {', '.join(SIGNATURE_CONTENT_TYPES)}")
+    return data, content_type
+
+
+async def store_signature(value: str) -> dict:
+    """
+    Guarda la firma en GridFS y devuelve los campos de referencia para el
+    documento. Si ya existe un archivo con el mismo contenido se reutiliza,
+    así que reintentar (o migrar dos veces) no duplica archivos.
+    """
+    data, content_type = decode_signature(value)
+    sha256 = hashlib.sha256(data).hexdigest()
+
+    existing = await signatureFiles_collection.find_one({"metadata.sha256": sha256}, {"_id": 1})
+    if existing:
+        file_id = existing["_id"]
+    else:
+        file_id = await signatures_bucket.upload_from_stream(
+            f"{sha256}.{content_type.split('/')[-1]}",
+            data,
+            metadata={"sha256": sha256, "contentType": content_type}
+        )
+
+    return {
+        "signatureFile_id": file_id,
+        "signatureSha256": sha256,
+        "signatureContentType": content_type,
+        "signatureSize": len(data)
+    }
+
+
+async def open_signature(file_id):
+    """GridOut de la firma (lanza gridfs.errors.NoFile si no existe)."""
+    return await signatures_bucket.open_download_stream(file_id)
+
+
+async def iter_signature(grid_out):
+    """Chunks del archivo tal como están en GridFS, sin cargarlo completo."""
+    while True:
+        chunk = await grid_out.readchunk()
+        if not chunk:
+            break
+        yield chunk
@@ -0,0 +1,40 @@
+# utils/timeline.py
+# Línea de tiempo que mezcla varias colecciones ordenadas por (date, _id)
+# descendente. Cada página lee a lo sumo limit + 1 documentos por colección
+# (con el índice de fecha) y los mezcla en memoria: merge de k listas ordenadas.
+import asyncio
+import heapq
+
+from utils.keyset import keyset_filter
+
+
+async def _read_stream(collection, query: dict, limit: int, after: tuple = None) -> list:
+    conditions = [query, {"date": {"$type": "date"}}]
+    if after:
+        conditions.append(keyset_filter("date", after[0], after[1]))
+    cursor = collection.find({"$and": conditions}).sort([("date", -1), ("_id", -1)]).limit(limit)
+    return await cursor.to_list(length=limit)
+
+
+async def merged_page(streams: dict, limit: int, after: tuple = None) -> tuple:
+    """
+    streams: {tipo: (colección, query)}. after: (date, _id) del último
+    elemento de la página anterior.
+    Devuelve ([(tipo, documento), ...], hay_más) en orden de fecha descendente.
+    """
+    kinds = list(streams)
+    results = await asyncio.gather(*[
+        _read_stream(collection, query, limit + 1, after) for collection, query in streams.values()
+    ])
+
+    merged = heapq.merge(
+        *[[(kind, doc) for doc in docs] for kind, docs in zip(kinds, results)],
+        key=lambda item: (item[1]["date"], item[1]["_id"]),
+        reverse=True
+    )
+    items = []
+    for item in merged:
+        items.append(item)
+        if len(items) > limit:
+            break
+    return items[:limit], len(items) > limit
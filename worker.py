@@ -0,0 +1,93 @@
+"""
+Worker de la cola de jobs (colección "jobs" en MongoDB).
+Ejecutar: python worker.py
+
+Variables de entorno:
+- JOB_WORKER_CONCURRENCY: jobs en paralelo por proceso (default: 4)
+- JOB_POLL_INTERVAL_SECONDS: espera cuando la cola está vacía (default: 2)
+"""
+import asyncio
+import os
+import socket
+import traceback
+import uuid
+
+from colorama import Fore
+
+from config.database import ping_database
+from config.indexes import ensure_indexes
+from utils.job_queue import (
+    job_handlers,
+    lease_job,
+    extend_lease,
+    complete_job,
+    fail_job,
+    JOB_VISIBILITY_TIMEOUT_SECONDS
+)
+import utils.job_handlers  # noqa: F401  (registra los handlers)
+
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "2"))
+
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+async def keep_lease(job: dict):
+    """Renueva la reserva a mitad del visibility timeout mientras el job corre."""
+    while True:
+        await asyncio.sleep(JOB_VISIBILITY_TIMEOUT_SECONDS / 2)
+        if not await extend_lease(job):
+            return
+
+
+async def run_job(job: dict):
+    name = job["name"]
+    handler = job_handlers.get(name)
+
+    if handler is None:
+        await fail_job(job, f"No hay handler registrado para '{name}'")
+        return
+
+    # El worker anterior murió con este job en la mano demasiadas veces
+    if job["attempts"] > job.get("maxAttempts", 1):
+        await fail_job(job, job.get("lastError") or "Reserva expirada demasiadas veces")
+        return
+
+    heartbeat = asyncio.create_task(keep_lease(job))
+    try:
+        result = await handler(job.get("payload", {}))
+        await complete_job(job, result)
+        print(Fore.GREEN + f"✅ Job {name} ({job['_id']}) completado")
+    except Exception as e:
+        traceback.print_exc()
+        await fail_job(job, str(e))
+        print(Fore.RED + f"❌ Job {name} ({job['_id']}) falló (intento {job['attempts']}): {e}")
+    finally:
+        heartbeat.cancel()
+
+
+async def worker_loop(slot: int):
+    worker_id = f"{WORKER_ID}-{slot}"
+    while True:
+        try:
+            job = await lease_job(worker_id)
+        except Exception as e:
+            print(Fore.RED + f"❌ Error al leer la cola: {e}")
+            job = None
+
+        if job is None:
+            await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS)
+            continue
+
+        await run_job(job)
+
+
+async def main():
+    await ping_database()
+    await ensure_indexes()
+    print(Fore.GREEN + f"✅ Worker {WORKER_ID} iniciado ({JOB_WORKER_CONCURRENCY} slots)")
+    await asyncio.gather(*(worker_loop(i) for i in range(JOB_WORKER_CONCURRENCY)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())